@@ -1,6 +1,51 @@
 from django.contrib import admin
-from django.db.models import Avg
-from .models import Category, Ticket, TicketComment, TicketRating
+from django.core.paginator import Paginator
+from django.db import connection, transaction
+from django.db.models import BooleanField, Q
+from django.db.models.expressions import RawSQL
+from django.utils.functional import cached_property
+
+from . import events
+from .models import (
+    ArchivedTicket,
+    Category,
+    OutboxMessage,
+    Reporter,
+    Ticket,
+    TicketComment,
+    TicketEvent,
+    TicketRating,
+    TicketTombstone,
+    WebhookDeadLetter,
+    WebhookDelivery,
+    WebhookEndpoint,
+)
+from .services import update_tickets
+
+
+# Below this many rows an exact COUNT(*) is cheap enough.
+ESTIMATED_COUNT_THRESHOLD = 100_000
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Uses planner statistics instead of COUNT(*) for unfiltered changelists on
+    PostgreSQL. Filtered lists and other backends fall back to the exact count.
+    """
+
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, "query", None)
+        if query is not None and not query.where and connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT reltuples::bigint FROM pg_class WHERE relname = %s",
+                    [self.object_list.model._meta.db_table],
+                )
+                row = cursor.fetchone()
+            if row and row[0] >= ESTIMATED_COUNT_THRESHOLD:
+                return row[0]
+        return super().count
 
 
 @admin.register(Category)
@@ -34,43 +79,109 @@ class TicketAdmin(admin.ModelAdmin):
         "is_answered",
         "is_anonymous",
     )
-    list_filter = ("type", "status", "priority", "category", "is_answered", "is_anonymous")
-    search_fields = ("subject", "message", "name", "email")
+    # без category: RelatedFieldListFilter грузит все категории на каждой
+    # странице; фильтр по ней остаётся доступен как ?category__id__exact=<id>
+    list_filter = ("type", "status", "priority", "is_answered", "is_anonymous")
+    # на PostgreSQL поиск идёт через полнотекстовый индекс, см. get_search_results
+    search_fields = ("=id", "subject", "message", "name", "email")
     ordering = ("-created_at",)
     list_display_links = ("id", "subject")
     list_editable = ("status", "priority", "is_answered")
+    readonly_fields = (
+        "rating_count",
+        "rating_sum",
+        "rating_avg",
+        "comment_count",
+        "last_activity_at",
+        "first_answered_at",
+        "closed_at",
+        "suggested_category",
+        "suggested_priority",
+    )
+    list_select_related = ("category",)
+    raw_id_fields = ("user", "reporter", "duplicate_of")
+    list_per_page = 50
+    list_max_show_all = 200
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    show_facets = admin.ShowFacets.NEVER
+    date_hierarchy = "created_at"
     actions = ("mark_open", "mark_in_progress", "mark_closed", "mark_answered", "mark_unanswered")
     inlines = [TicketCommentInline, TicketRatingInline]
 
-    def get_queryset(self, request):
-        queryset = super().get_queryset(request)
-        return queryset.annotate(avg_rating=Avg("ratings__score"))
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if term and connection.vendor == "postgresql":
+            if term.isdigit():
+                return queryset.filter(pk=int(term)), False
+            # совпадает с выражением индекса ticket_fulltext_idx (миграция 0003)
+            match = RawSQL(
+                "to_tsvector('simple', \"complaints_ticket\".\"subject\" || ' ' || "
+                "\"complaints_ticket\".\"message\") @@ plainto_tsquery('simple', %s)",
+                [term],
+                output_field=BooleanField(),
+            )
+            # имя и почта не входят в полнотекстовый индекс: префикс и точное
+            # совпадение идут по ticket_name_upper_idx/ticket_email_upper_idx (миграция 0019)
+            return queryset.filter(match | Q(name__istartswith=term) | Q(email__iexact=term)), False
+        return super().get_search_results(request, queryset, search_term)
+
+    def delete_model(self, request, obj):
+        with transaction.atomic():
+            TicketTombstone.record([obj.pk])
+            Ticket.release_reporters([obj.pk])
+            super().delete_model(request, obj)
 
-    @admin.display(description="Avg rating", ordering="avg_rating")
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic():
+            ids = list(queryset.values_list("pk", flat=True))
+            TicketTombstone.record(ids)
+            Ticket.release_reporters(ids)
+            super().delete_queryset(request, queryset)
+
+    def save_model(self, request, obj, form, change):
+        if not change:
+            super().save_model(request, obj, form, change)
+            events.record_created(obj, request.user)
+            return
+        before = Ticket.objects.values(*events.TRACKED_FIELDS).get(pk=obj.pk)
+        super().save_model(request, obj, form, change)
+        events.record_changes(obj, before, request.user)
+
+    @admin.display(description="Avg rating", ordering="rating_avg")
     def avg_rating_display(self, obj):
-        if obj.avg_rating is None:
+        if obj.rating_avg is None:
             return "-"
-        return f"{obj.avg_rating:.1f}"
+        return f"{obj.rating_avg:.1f}"
 
     @admin.action(description="Set status: Open")
     def mark_open(self, request, queryset):
-        queryset.update(status=Ticket.OPEN)
+        update_tickets(queryset.values_list("pk", flat=True), {"status": Ticket.OPEN}, user=request.user)
 
     @admin.action(description="Set status: In progress")
     def mark_in_progress(self, request, queryset):
-        queryset.update(status=Ticket.IN_PROGRESS)
+        update_tickets(queryset.values_list("pk", flat=True), {"status": Ticket.IN_PROGRESS}, user=request.user)
 
     @admin.action(description="Set status: Closed")
     def mark_closed(self, request, queryset):
-        queryset.update(status=Ticket.CLOSED)
+        update_tickets(queryset.values_list("pk", flat=True), {"status": Ticket.CLOSED}, user=request.user)
 
     @admin.action(description="Mark as answered")
     def mark_answered(self, request, queryset):
-        queryset.update(is_answered=True)
+        update_tickets(queryset.values_list("pk", flat=True), {"is_answered": True}, user=request.user)
 
     @admin.action(description="Mark as unanswered")
     def mark_unanswered(self, request, queryset):
-        queryset.update(is_answered=False)
+        update_tickets(queryset.values_list("pk", flat=True), {"is_answered": False}, user=request.user)
+
+
+@admin.register(Reporter)
+class ReporterAdmin(admin.ModelAdmin):
+    list_display = ("id", "display_name", "email", "user", "ticket_count", "rating_count", "created_at")
+    search_fields = ("=id", "^display_name", "=email")
+    raw_id_fields = ("user",)
+    readonly_fields = ("ticket_count", "rating_count", "rating_sum")
+    ordering = ("-ticket_count", "id")
 
 
 @admin.register(TicketComment)
@@ -85,3 +196,75 @@ class TicketRatingAdmin(admin.ModelAdmin):
     list_display = ("id", "ticket", "score", "rater_name", "created_at")
     list_filter = ("score", "created_at")
     search_fields = ("rater_name", "comment")
+
+
+@admin.register(TicketEvent)
+class TicketEventAdmin(admin.ModelAdmin):
+    list_display = ("id", "ticket_id", "kind", "old_value", "new_value", "actor", "created_at")
+    list_filter = ("kind",)
+    ordering = ("-created_at",)
+    date_hierarchy = "created_at"
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ArchivedTicket)
+class ArchivedTicketAdmin(admin.ModelAdmin):
+    list_display = ("id", "subject", "priority", "category", "closed_at", "archived_at")
+    list_filter = ("priority", "category")
+    search_fields = ("=id", "^subject")
+    ordering = ("-archived_at",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(admin.ModelAdmin):
+    list_display = ("id", "ticket_id", "kind", "recipient", "state", "attempts", "available_at", "sent_at")
+    list_filter = ("state", "kind")
+    search_fields = ("=ticket__id", "=recipient")
+    ordering = ("-id",)
+    readonly_fields = ("ticket", "kind", "dedupe_key", "recipient", "subject", "body", "created_at", "sent_at")
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(WebhookEndpoint)
+class WebhookEndpointAdmin(admin.ModelAdmin):
+    list_display = ("id", "url", "event_kinds", "is_active", "max_concurrency", "created_at")
+    list_filter = ("is_active",)
+
+
+@admin.register(WebhookDeadLetter)
+class WebhookDeadLetterAdmin(admin.ModelAdmin):
+    list_display = ("id", "endpoint", "attempts", "last_error", "created_at", "failed_at")
+    list_filter = ("endpoint",)
+    ordering = ("-failed_at",)
+    actions = ["replay"]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    @admin.action(description="Queue selected events for delivery again")
+    def replay(self, request, queryset):
+        with transaction.atomic():
+            WebhookDelivery.objects.bulk_create(
+                WebhookDelivery(endpoint_id=row.endpoint_id, payload=row.payload) for row in queryset
+            )
+            queryset.delete()
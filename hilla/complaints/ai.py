@@ -0,0 +1,403 @@
+"""
+AI text generation behind a small provider interface.
+
+Providers expose an async ``agenerate(prompt)``; the sync ``generate`` used by
+views wraps it. Provider SDKs are imported lazily so the project runs without
+them. ``StubProvider`` answers deterministically and is used by tests and dry
+runs of the batch commands.
+
+``Router`` puts several providers behind the same interface. It keeps a
+latency average and a recent error rate per provider, tries the fastest
+healthy one first and fails over on errors or timeouts. After
+``failure_threshold`` consecutive failures a provider's circuit opens and it
+is skipped until ``reset_timeout`` passes; then one trial call decides
+whether it closes again. With ``hedge_after`` set, a second provider is
+started when the first has not answered in that many seconds and the first
+answer wins.
+"""
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+
+
+SUMMARY_MAX_LENGTH = 255
+
+PROMPTS = {
+    "summary": "Summarize the issue in 3 bullets: What, Where, Impact.\n\n{text}",
+    "rewrite": (
+        "Rewrite this into a clear request for campus support, include location, "
+        "impact, urgency, and desired fix. Keep it under 120 words.\n\n{text}"
+    ),
+    "ticket_summary": (
+        "Summarize this support ticket in one short sentence for a moderator "
+        "scanning a queue. No preamble.\n\n{text}"
+    ),
+}
+
+
+class ProviderError(Exception):
+    """
+    A provider call failed; ``user_message`` is safe to show in the UI.
+    """
+
+    def __init__(self, message, user_message="Ошибка AI. Попробуй позже.", status=500):
+        super().__init__(message)
+        self.user_message = user_message
+        self.status = status
+
+
+class ProviderNotConfigured(ProviderError):
+    def __init__(self, message, user_message="AI ключ не настроен."):
+        super().__init__(message, user_message, status=503)
+
+
+def build_prompt(mode, text):
+    try:
+        return PROMPTS[mode].format(text=text)
+    except KeyError:
+        raise ValueError(f"Unknown mode: {mode}") from None
+
+
+def user_message(exc):
+    lower = str(exc).lower()
+    if "insufficient_quota" in lower or "quota" in lower:
+        return "Лимит запросов исчерпан. Попробуй позже."
+    if "api key" in lower or "permission" in lower or "unauthorized" in lower:
+        return "Неверный ключ API."
+    if "rate" in lower and "limit" in lower:
+        return "Слишком много запросов. Подожди немного."
+    return "Ошибка AI. Попробуй позже."
+
+
+class Provider:
+    name = ""
+
+    async def agenerate(self, prompt, max_tokens=180):
+        raise NotImplementedError
+
+    def generate(self, prompt, max_tokens=180):
+        return asyncio.run(self.agenerate(prompt, max_tokens))
+
+    async def _call(self, coro):
+        try:
+            return (await coro or "").strip()
+        except ProviderError:
+            raise
+        except Exception as exc:
+            raise ProviderError(str(exc), user_message(exc)) from exc
+
+
+class OpenAIProvider(Provider):
+    name = "openai"
+
+    def __init__(self, model=None):
+        if not os.environ.get("OPENAI_API_KEY"):
+            raise ProviderNotConfigured("OPENAI_API_KEY is not configured")
+        self.model = model or os.environ.get("OPENAI_MODEL", "gpt-5-mini")
+
+    async def agenerate(self, prompt, max_tokens=180):
+        from openai import AsyncOpenAI
+
+        async def request():
+            async with AsyncOpenAI() as client:
+                response = await client.responses.create(
+                    model=self.model,
+                    input=prompt,
+                    max_output_tokens=max_tokens,
+                )
+            return response.output_text
+
+        return await self._call(request())
+
+
+class GeminiProvider(Provider):
+    name = "gemini"
+
+    def __init__(self, model=None):
+        if not os.environ.get("GEMINI_API_KEY"):
+            raise ProviderNotConfigured("GEMINI_API_KEY is not configured")
+        self.model = model or os.environ.get("GEMINI_MODEL", "gemini-2.5-flash")
+
+    async def agenerate(self, prompt, max_tokens=180):
+        from google import genai
+
+        async def request():
+            client = genai.Client()
+            response = await client.aio.models.generate_content(
+                model=self.model,
+                contents=prompt,
+                config={"max_output_tokens": max_tokens},
+            )
+            return response.text
+
+        return await self._call(request())
+
+
+class StubProvider(Provider):
+    """
+    Offline provider: echoes the start of the prompt's text after ``delay``
+    seconds, or raises for prompts containing ``fail_marker``.
+    """
+
+    name = "stub"
+
+    def __init__(self, delay=0.0, fail_marker=None):
+        self.delay = delay
+        self.fail_marker = fail_marker
+        self.calls = 0
+
+    async def agenerate(self, prompt, max_tokens=180):
+        self.calls += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.fail_marker and self.fail_marker in prompt:
+            raise ProviderError("stub failure")
+        text = prompt.rsplit("\n\n", 1)[-1]
+        return " ".join(text.split())[:max_tokens]
+
+
+PROVIDERS = {
+    "openai": OpenAIProvider,
+    "gemini": GeminiProvider,
+    "stub": StubProvider,
+}
+
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class ProviderHealth:
+    """
+    Latency and error bookkeeping plus circuit state for one provider.
+    """
+
+    def __init__(self, window=50, latency_weight=0.2):
+        self.window = deque(maxlen=window)
+        self.latency_weight = latency_weight
+        self.latency = None
+        self.calls = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.state = CLOSED
+        self.opened_at = None
+        self.trial_running = False
+
+    @property
+    def error_rate(self):
+        return self.window.count(False) / len(self.window) if self.window else 0.0
+
+    def record(self, ok, elapsed):
+        self.calls += 1
+        self.window.append(ok)
+        if ok:
+            self.consecutive_failures = 0
+            if self.latency is None:
+                self.latency = elapsed
+            else:
+                self.latency += self.latency_weight * (elapsed - self.latency)
+        else:
+            self.failures += 1
+            self.consecutive_failures += 1
+
+
+class Router(Provider):
+    name = "router"
+
+    def __init__(
+        self,
+        providers,
+        timeout=20.0,
+        failure_threshold=3,
+        reset_timeout=30.0,
+        hedge_after=None,
+        clock=time.monotonic,
+    ):
+        self.providers = list(providers)
+        self.timeout = timeout
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.hedge_after = hedge_after
+        self.clock = clock
+        self.health = {provider.name: ProviderHealth() for provider in self.providers}
+        self._lock = threading.Lock()
+
+    def candidates(self):
+        """
+        Providers allowed to take a call, best first. A provider whose circuit
+        has waited out reset_timeout is let through for a single trial call.
+        """
+        now = self.clock()
+        ready = []
+        with self._lock:
+            for position, provider in enumerate(self.providers):
+                health = self.health[provider.name]
+                if health.state == OPEN and now - health.opened_at >= self.reset_timeout:
+                    health.state = HALF_OPEN
+                if health.state == HALF_OPEN:
+                    if health.trial_running:
+                        continue
+                    health.trial_running = True
+                elif health.state == OPEN:
+                    continue
+                # пробный вызов идёт первым; остальные по доле ошибок и задержке,
+                # непроверенные — в порядке настройки
+                trial = 0 if health.state == HALF_OPEN else 1
+                ready.append((trial, health.error_rate, health.latency or 0.0, position, provider))
+        ready.sort(key=lambda item: item[:4])
+        return [item[-1] for item in ready]
+
+    def _record(self, provider, ok, elapsed):
+        with self._lock:
+            health = self.health[provider.name]
+            health.record(ok, elapsed)
+            health.trial_running = False
+            if ok:
+                health.state = CLOSED
+            elif health.state == HALF_OPEN or health.consecutive_failures >= self.failure_threshold:
+                health.state = OPEN
+                health.opened_at = self.clock()
+
+    def _release(self, provider):
+        # кандидат не был вызван: пробный слот полуоткрытой цепи освобождается
+        with self._lock:
+            self.health[provider.name].trial_running = False
+
+    async def _attempt(self, provider, prompt, max_tokens):
+        started = self.clock()
+        try:
+            text = await asyncio.wait_for(provider.agenerate(prompt, max_tokens), self.timeout)
+        except asyncio.CancelledError:
+            self._release(provider)
+            raise
+        except asyncio.TimeoutError:
+            self._record(provider, False, self.clock() - started)
+            raise ProviderError(f"{provider.name} timed out after {self.timeout}s")
+        except Exception:
+            self._record(provider, False, self.clock() - started)
+            raise
+        self._record(provider, True, self.clock() - started)
+        return text
+
+    async def agenerate(self, prompt, max_tokens=180):
+        queue = self.candidates()
+        if not queue:
+            raise ProviderError("All AI providers are unavailable", status=503)
+
+        errors = []
+        pending = set()
+        try:
+            while queue or pending:
+                if queue and not pending:
+                    pending.add(asyncio.ensure_future(self._attempt(queue.pop(0), prompt, max_tokens)))
+                hedge = self.hedge_after if queue and self.hedge_after is not None else None
+                done, pending = await asyncio.wait(pending, timeout=hedge, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    pending.add(asyncio.ensure_future(self._attempt(queue.pop(0), prompt, max_tokens)))
+                    continue
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    errors.append(task.exception())
+        finally:
+            for task in pending:
+                task.cancel()
+            for provider in queue:
+                self._release(provider)
+
+        last = errors[-1]
+        if isinstance(last, ProviderError):
+            raise ProviderError(str(last), last.user_message, last.status)
+        raise ProviderError(str(last), user_message(last))
+
+    def metrics(self):
+        with self._lock:
+            providers = []
+            for provider in self.providers:
+                health = self.health[provider.name]
+                providers.append(
+                    {
+                        "name": provider.name,
+                        "state": health.state,
+                        "calls": health.calls,
+                        "failures": health.failures,
+                        "error_rate": round(health.error_rate, 4),
+                        "latency_ms": round(health.latency * 1000, 1) if health.latency is not None else None,
+                    }
+                )
+        return {"providers": providers, "timeout": self.timeout, "hedge_after": self.hedge_after}
+
+
+_router = None
+_router_lock = threading.Lock()
+
+
+def _env_float(name, default=None):
+    value = os.environ.get(name, "").strip()
+    return float(value) if value else default
+
+
+def _provider_names():
+    names = [n.strip().lower() for n in os.environ.get("AI_PROVIDERS", "").split(",") if n.strip()]
+    # AI_PROVIDER (одиночный провайдер) идёт первым в порядке роутера
+    first = os.environ.get("AI_PROVIDER", "").strip().lower()
+    if first:
+        names = [first] + [n for n in names if n != first]
+    return names
+
+
+def _build_router(names, strict):
+    providers = []
+    for name in names:
+        try:
+            providers.append(PROVIDERS[name]())
+        except ProviderNotConfigured:
+            if strict:
+                raise
+        except KeyError:
+            raise ProviderNotConfigured(f"Unknown AI provider: {name}", "AI провайдер не настроен.") from None
+    if not providers:
+        raise ProviderNotConfigured("No AI provider configured", "AI провайдер не настроен.")
+    return Router(
+        providers,
+        timeout=_env_float("AI_TIMEOUT", 20.0),
+        failure_threshold=int(_env_float("AI_FAILURE_THRESHOLD", 3)),
+        reset_timeout=_env_float("AI_RESET_TIMEOUT", 30.0),
+        hedge_after=_env_float("AI_HEDGE_AFTER"),
+    )
+
+
+def get_router():
+    """
+    Process-wide router over AI_PROVIDER followed by the providers in
+    AI_PROVIDERS (comma separated), or over every provider with an API key
+    configured.
+    """
+    global _router
+    if _router is None:
+        with _router_lock:
+            if _router is None:
+                names = _provider_names()
+                _router = _build_router(names or ["openai", "gemini"], strict=bool(names))
+    return _router
+
+
+def get_provider(name=None):
+    """
+    A router over just the provider named by ``name``, else the shared router.
+    Either way calls get the router's timeout and circuit breaker.
+    """
+    name = (name or "").strip().lower()
+    if not name:
+        return get_router()
+    return _build_router([name], strict=True)
+
+
+def clean_summary(text):
+    line = " ".join((text or "").split())
+    if len(line) > SUMMARY_MAX_LENGTH:
+        line = line[: SUMMARY_MAX_LENGTH - 1].rstrip() + "…"
+    return line
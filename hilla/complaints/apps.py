@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class ComplaintsConfig(AppConfig):
     name = 'complaints'
+
+    def ready(self):
+        from . import checks, signals  # noqa: F401
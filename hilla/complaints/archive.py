@@ -0,0 +1,132 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import F
+from django.utils.dateparse import parse_datetime
+
+from .models import ArchivedTicket, ArchiveTotal, Ticket, TicketComment, TicketRating, TicketTombstone
+
+
+COPIED_FIELDS = [
+    "id",
+    "user_id",
+    "category_id",
+    "type",
+    "priority",
+    "status",
+    "name",
+    "email",
+    "is_anonymous",
+    "reporter_id",
+    "subject",
+    "message",
+    "answer",
+    "is_answered",
+    "first_answered_at",
+    "closed_at",
+    "rating_count",
+    "rating_sum",
+    "rating_avg",
+    "created_at",
+    "updated_at",
+]
+
+
+def archive_tickets(ticket_ids):
+    """
+    Move closed tickets with their comments and ratings into ArchivedTicket in
+    one transaction and add them to the ArchiveTotal snapshot.
+    Returns the number of archived tickets.
+    """
+    with transaction.atomic():
+        tickets = list(
+            Ticket.objects.select_for_update()
+            .filter(pk__in=list(ticket_ids), status=Ticket.CLOSED)
+            .order_by("pk")
+        )
+        if not tickets:
+            return 0
+        ids = [t.pk for t in tickets]
+
+        comments = defaultdict(list)
+        for row in TicketComment.objects.filter(ticket_id__in=ids).order_by("pk").values(
+            "id", "ticket_id", "author_name", "text", "created_at"
+        ):
+            row["created_at"] = row["created_at"].isoformat()
+            comments[row.pop("ticket_id")].append(row)
+        ratings = defaultdict(list)
+        for row in TicketRating.objects.filter(ticket_id__in=ids).order_by("-pk").values(
+            "id", "ticket_id", "score", "rater_name", "comment", "created_at"
+        ):
+            row["created_at"] = row["created_at"].isoformat()
+            ratings[row.pop("ticket_id")].append(row)
+
+        ArchivedTicket.objects.bulk_create(
+            [
+                ArchivedTicket(
+                    comments=comments[t.pk],
+                    ratings=ratings[t.pk],
+                    **{field: getattr(t, field) for field in COPIED_FIELDS},
+                )
+                for t in tickets
+            ]
+        )
+        _add_totals(tickets)
+        TicketTombstone.record(ids, TicketTombstone.ARCHIVED)
+        Ticket.objects.filter(pk__in=ids).delete()
+    return len(tickets)
+
+
+def _add_totals(tickets):
+    totals = defaultdict(lambda: [0, 0, 0])
+    for t in tickets:
+        keys = [
+            (ArchiveTotal.ALL, ""),
+            (ArchiveTotal.STATUS, t.status),
+            (ArchiveTotal.PRIORITY, t.priority),
+            (ArchiveTotal.CATEGORY, str(t.category_id)),
+        ]
+        for key in keys:
+            row = totals[key]
+            row[0] += 1
+            row[1] += t.rating_count
+            row[2] += t.rating_sum
+
+    for (dimension, key), (count, rating_count, rating_sum) in totals.items():
+        updated = ArchiveTotal.objects.filter(dimension=dimension, key=key).update(
+            tickets=F("tickets") + count,
+            rating_count=F("rating_count") + rating_count,
+            rating_sum=F("rating_sum") + rating_sum,
+        )
+        if not updated:
+            ArchiveTotal.objects.create(
+                dimension=dimension,
+                key=key,
+                tickets=count,
+                rating_count=rating_count,
+                rating_sum=rating_sum,
+            )
+
+
+def totals_by(dimension):
+    """
+    {key: ArchiveTotal} for one snapshot dimension.
+    """
+    return {row.key: row for row in ArchiveTotal.objects.filter(dimension=dimension)}
+
+
+def all_totals():
+    """
+    {dimension: {key: ArchiveTotal}} for every dimension in one query.
+    """
+    totals = {}
+    for row in ArchiveTotal.objects.all():
+        totals.setdefault(row.dimension, {})[row.key] = row
+    return totals
+
+
+def thaw_items(items):
+    """
+    Archived comments/ratings with created_at turned back into datetimes.
+    """
+    return [{**item, "created_at": parse_datetime(item["created_at"])} for item in items]
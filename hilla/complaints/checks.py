@@ -0,0 +1,49 @@
+import json
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import ManifestFilesMixin, staticfiles_storage
+from django.core.checks import Tags, Warning, register
+
+
+# только для "manage.py check --deploy": тесты и runserver манифест не собирают
+@register(Tags.staticfiles, deploy=True)
+def check_static_manifest(app_configs, **kwargs):
+    """
+    Outside DEBUG static files are served only from STATIC_ROOT, so a
+    collectstatic run older than the sources means missing or outdated assets.
+    """
+    if settings.DEBUG or not settings.STATIC_ROOT or not isinstance(staticfiles_storage, ManifestFilesMixin):
+        return []
+
+    manifest_path = os.path.join(settings.STATIC_ROOT, "staticfiles.json")
+    try:
+        built_at = os.path.getmtime(manifest_path)
+        with open(manifest_path, encoding="utf-8") as fh:
+            paths = json.load(fh).get("paths", {})
+    except (OSError, ValueError):
+        return [
+            Warning(
+                "Static files manifest is missing or unreadable.",
+                hint="Run 'manage.py collectstatic --noinput' as part of the build.",
+                obj=manifest_path,
+                id="complaints.W001",
+            )
+        ]
+
+    stale = []
+    for finder in finders.get_finders():
+        for path, storage in finder.list(["CVS", ".*", "*~"]):
+            if path not in paths or os.path.getmtime(storage.path(path)) > built_at:
+                stale.append(path)
+    if not stale:
+        return []
+    return [
+        Warning(
+            f"{len(stale)} static file(s) changed since the last collectstatic: {', '.join(sorted(stale)[:5])}.",
+            hint="Run 'manage.py collectstatic --noinput' so the hashed, compressed copies are rebuilt.",
+            obj=manifest_path,
+            id="complaints.W002",
+        )
+    ]
@@ -0,0 +1,165 @@
+"""
+Offline category/priority suggestions for new tickets.
+
+A multinomial naive Bayes over hashed word unigrams and bigrams, trained by
+the train_classifier command and saved as a NumPy .npz file. The file is
+loaded lazily on first use and reloaded when it changes on disk. Scoring one
+ticket is a gather over a few dozen columns, so it takes microseconds.
+"""
+import hashlib
+import os
+import re
+import threading
+
+from django.conf import settings
+
+from .models import Category
+
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+
+N_FEATURES = 1 << 16
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+_lock = threading.Lock()
+_cache = {"mtime": None, "model": None}
+
+
+def model_path():
+    return getattr(settings, "TICKET_CLASSIFIER_PATH", settings.BASE_DIR / "ticket_classifier.npz")
+
+
+def features(subject, message):
+    """
+    Hashed feature indices (with repeats) for a ticket's text.
+    """
+    words = _WORD.findall(f"{subject} {message}".lower())
+    tokens = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    return [
+        int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=4).digest(), "little") % N_FEATURES
+        for token in tokens
+    ]
+
+
+class NaiveBayes:
+    def __init__(self, labels, log_prior, log_likelihood):
+        self.labels = list(labels)
+        self.log_prior = log_prior
+        self.log_likelihood = log_likelihood
+
+    @classmethod
+    def fit(cls, labels, counts, class_totals, alpha=1.0):
+        """
+        counts: (n_classes, N_FEATURES) token counts, class_totals: documents per class.
+        """
+        smoothed = counts + alpha
+        log_likelihood = np.log(smoothed / smoothed.sum(axis=1, keepdims=True)).astype(np.float32)
+        log_prior = np.log(class_totals / class_totals.sum()).astype(np.float32)
+        return cls(labels, log_prior, log_likelihood)
+
+    def predict(self, indices):
+        if not indices:
+            return None
+        scores = self.log_prior + self.log_likelihood[:, indices].sum(axis=1)
+        return self.labels[int(scores.argmax())]
+
+    def predict_many(self, batch):
+        """
+        Vectorized predict for a list of feature-index lists.
+        """
+        lengths = np.array([len(indices) for indices in batch])
+        if not lengths.any():
+            return [None] * len(batch)
+        flat = np.concatenate([np.asarray(indices, dtype=np.int64) for indices in batch if indices])
+        offsets = np.concatenate(([0], np.cumsum(lengths[lengths > 0])[:-1]))
+        sums = np.add.reduceat(self.log_likelihood[:, flat], offsets, axis=1)
+        best = (sums + self.log_prior[:, None]).argmax(axis=0)
+        predictions = iter(self.labels[int(i)] for i in best)
+        return [next(predictions) if length else None for length in lengths]
+
+
+class TicketClassifier:
+    def __init__(self, category, priority):
+        self.category = category
+        self.priority = priority
+
+    def predict(self, subject, message):
+        indices = features(subject, message)
+        return self.category.predict(indices), self.priority.predict(indices)
+
+    def predict_many(self, texts):
+        batch = [features(subject, message) for subject, message in texts]
+        return list(zip(self.category.predict_many(batch), self.priority.predict_many(batch)))
+
+    def save(self, path):
+        tmp_path = f"{path}.tmp.npz"
+        np.savez_compressed(
+            tmp_path,
+            category_labels=np.array(self.category.labels, dtype=np.int64),
+            category_prior=self.category.log_prior,
+            category_likelihood=self.category.log_likelihood,
+            priority_labels=np.array(self.priority.labels),
+            priority_prior=self.priority.log_prior,
+            priority_likelihood=self.priority.log_likelihood,
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            category = NaiveBayes(
+                [int(label) for label in data["category_labels"]],
+                data["category_prior"],
+                data["category_likelihood"],
+            )
+            priority = NaiveBayes(
+                [str(label) for label in data["priority_labels"]],
+                data["priority_prior"],
+                data["priority_likelihood"],
+            )
+        return cls(category, priority)
+
+
+def get_classifier():
+    """
+    The trained classifier, or None when NumPy or the model file is missing.
+    """
+    if np is None:
+        return None
+    path = model_path()
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+    if _cache["mtime"] != mtime:
+        with _lock:
+            if _cache["mtime"] != mtime:
+                _cache["model"] = TicketClassifier.load(path)
+                _cache["mtime"] = mtime
+    return _cache["model"]
+
+
+def existing_categories(category_ids):
+    """
+    The subset of predicted category ids that still exist; the model may
+    have been trained before a category was deleted.
+    """
+    wanted = {pk for pk in category_ids if pk is not None}
+    if not wanted:
+        return set()
+    return set(Category.objects.filter(pk__in=wanted).values_list("pk", flat=True))
+
+
+def suggest(ticket):
+    """
+    Fill suggested_category/suggested_priority on an unsaved ticket.
+    """
+    model = get_classifier()
+    if model is None:
+        return
+    category_id, priority = model.predict(ticket.subject, ticket.message)
+    ticket.suggested_category_id = category_id if category_id in existing_categories([category_id]) else None
+    ticket.suggested_priority = priority or ""
@@ -0,0 +1,109 @@
+from . import notifications, rollups, webhooks
+from .models import Ticket, TicketEvent, TicketRating
+
+
+# Ticket field -> event kind. Values are stored as short strings.
+TRACKED_FIELDS = {
+    "status": TicketEvent.STATUS,
+    "priority": TicketEvent.PRIORITY,
+    "is_answered": TicketEvent.ANSWERED,
+    "answer": TicketEvent.ANSWER,
+}
+
+INSERT_BATCH_SIZE = 500
+
+
+def snapshot(ticket):
+    """
+    Remember the tracked field values of a ticket before it is changed.
+    """
+    return {field: getattr(ticket, field) for field in TRACKED_FIELDS}
+
+
+def _as_value(field, value):
+    if field == "answer":
+        # текст ответа не дублируем в журнал, только факт наличия
+        return "set" if value else ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+def created_event(ticket, user=None):
+    return TicketEvent(
+        ticket_id=ticket.pk,
+        category_id=ticket.category_id,
+        priority=ticket.priority,
+        kind=TicketEvent.CREATED,
+        new_value=ticket.status,
+        actor=_actor(user),
+        created_at=ticket.created_at,
+    )
+
+
+def change_events(ticket, before, user=None):
+    """
+    Build (unsaved) events for every tracked field that differs from `before`.
+    """
+    events = []
+    for field, kind in TRACKED_FIELDS.items():
+        old, new = before.get(field), getattr(ticket, field)
+        if old == new:
+            continue
+        events.append(
+            TicketEvent(
+                ticket_id=ticket.pk,
+                category_id=ticket.category_id,
+                priority=ticket.priority,
+                kind=kind,
+                old_value=_as_value(field, old),
+                new_value=_as_value(field, new),
+                actor=_actor(user),
+                created_at=ticket.updated_at,
+            )
+        )
+    return events
+
+
+def rating_event(rating):
+    if TicketRating.ticket.is_cached(rating):
+        category_id, priority = rating.ticket.category_id, rating.ticket.priority
+    else:
+        category_id, priority = Ticket.objects.values_list("category_id", "priority").get(pk=rating.ticket_id)
+    return TicketEvent(
+        ticket_id=rating.ticket_id,
+        category_id=category_id,
+        priority=priority,
+        kind=TicketEvent.RATED,
+        new_value=str(rating.score),
+        created_at=rating.created_at,
+    )
+
+
+def record(events):
+    """
+    Insert events with multi-row INSERTs. Call inside the transaction that made
+    the change so the log (and the notification and webhook queues) never
+    disagrees with the ticket table.
+    """
+    events = list(events)
+    if events:
+        TicketEvent.objects.bulk_create(events, batch_size=INSERT_BATCH_SIZE)
+        rollups.apply(events)
+        notifications.enqueue(events)
+        webhooks.enqueue(events)
+    return events
+
+
+def record_created(ticket, user=None):
+    return record([created_event(ticket, user)])
+
+
+def record_changes(ticket, before, user=None):
+    return record(change_events(ticket, before, user))
+
+
+def _actor(user):
+    if user is not None and getattr(user, "is_authenticated", False):
+        return user
+    return None
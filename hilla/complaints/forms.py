@@ -3,7 +3,9 @@ from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.forms import UserCreationForm
 
+from . import similarity
 from .models import Ticket, TicketComment, TicketRating
+from users.models import users_with_email
 
 try:
     from django_recaptcha.fields import ReCaptchaField
@@ -20,6 +22,12 @@ class TicketForm(forms.ModelForm):
         help_text="Your name and email will not be shown.",
     )
 
+    confirm_duplicate = forms.BooleanField(
+        required=False,
+        widget=forms.HiddenInput,
+        label="Submit anyway and link it to the similar ticket",
+    )
+
     if getattr(settings, "ENABLE_RECAPTCHA", False) and ReCaptchaField:
         captcha = ReCaptchaField(widget=ReCaptchaV2Checkbox())
 
@@ -42,9 +50,11 @@ class TicketForm(forms.ModelForm):
     def __init__(self, *args, **kwargs):
         self.user = kwargs.pop("user", None)
         super().__init__(*args, **kwargs)
+        self.duplicates = []
 
     def clean(self):
         cleaned = super().clean()
+        self._check_duplicates(cleaned)
         if cleaned.get("is_anonymous"):
             cleaned["name"] = ""
             cleaned["email"] = ""
@@ -56,6 +66,24 @@ class TicketForm(forms.ModelForm):
                 self.add_error("email", "Email is required unless anonymous.")
         return cleaned
 
+    def _check_duplicates(self, cleaned):
+        subject, message = cleaned.get("subject"), cleaned.get("message")
+        if not subject or not message:
+            return
+        self.duplicates = similarity.find_similar(subject, message)
+        if not self.duplicates:
+            return
+        if cleaned.get("confirm_duplicate"):
+            self.instance.duplicate_of = self.duplicates[0][0]
+            return
+        self.fields["confirm_duplicate"].widget = forms.CheckboxInput()
+        best = self.duplicates[0][0]
+        self.add_error(
+            None,
+            f"A similar open ticket already exists: #{best.pk} {best.subject}. "
+            "Check it, or confirm below to submit yours linked to it.",
+        )
+
 
 class TicketCommentForm(forms.ModelForm):
     class Meta:
@@ -106,7 +134,6 @@ class SignUpForm(UserCreationForm):
 
     def clean_email(self):
         email = self.cleaned_data["email"].strip().lower()
-        User = get_user_model()
-        if User.objects.filter(email__iexact=email).exists():
+        if users_with_email(email).exists():
             raise forms.ValidationError("This email is already registered.")
         return email
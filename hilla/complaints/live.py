@@ -0,0 +1,216 @@
+"""
+Process-wide change feed for the live moderation queue.
+
+One poller per process reads tickets whose updated_at moved past its cursor
+and fans them out to every connected stream. On PostgreSQL the poller sleeps
+on LISTEN ticket_changes and wakes up on NOTIFY; elsewhere it polls the
+indexed updated_at column on a short interval. Either way the cost is one
+query per change batch, not one per open queue.
+
+The stream needs an ASGI server. Under WSGI the queue page polls
+fetch_changes() through a plain JSON view instead.
+
+updated_at is stamped before commit, so the cursor never moves closer than
+sync.SETTLE_SECONDS to now; otherwise rows committed late would be skipped.
+
+A changed ticket that matches a client's filters arrives as a "ticket"
+event. One that does not arrives as a "remove" event carrying only its id,
+so a row that left the filter (e.g. was closed) disappears from the page.
+"""
+import asyncio
+import logging
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, connection
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Ticket
+from .sync import SETTLE_SECONDS
+
+try:
+    import psycopg
+except Exception:
+    psycopg = None
+
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "ticket_changes"
+POLL_INTERVAL = getattr(settings, "LIVE_QUEUE_POLL_INTERVAL", 2.0)
+# With a working LISTEN the poll is only a safety net.
+LISTEN_POLL_INTERVAL = 30.0
+FETCH_LIMIT = 500
+QUEUE_SIZE = 200
+
+
+def notify_ticket_change(ticket_ids):
+    """
+    Wake up LISTENing feeds. pg_notify is delivered on commit, so calling it
+    inside the writing transaction is safe. No-op on other backends.
+    """
+    if connection.vendor != "postgresql" or not ticket_ids:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_notify(%s, %s)", [CHANNEL, ",".join(str(pk) for pk in ticket_ids)])
+
+
+def ticket_payload(ticket):
+    return {
+        "id": ticket.pk,
+        "subject": ticket.subject,
+        "status": ticket.status,
+        "status_display": ticket.get_status_display(),
+        "priority": ticket.priority,
+        "priority_display": ticket.get_priority_display(),
+        "category": ticket.category.slug,
+        "is_answered": ticket.is_answered,
+        "updated_at": ticket.updated_at.isoformat(),
+        "_text": f"{ticket.subject}\n{ticket.message}".lower(),
+    }
+
+
+def matches(filters, payload):
+    for field in ("status", "priority", "category"):
+        value = filters.get(field)
+        if value and payload[field] != value:
+            return False
+    q = filters.get("q")
+    return not q or q.lower() in payload["_text"]
+
+
+def public(payload):
+    return {k: v for k, v in payload.items() if not k.startswith("_")}
+
+
+def change_event(filters, payload):
+    """
+    (event, data) to send a client with these filters about a changed ticket.
+    """
+    if matches(filters, payload):
+        return "ticket", public(payload)
+    return "remove", {"id": payload["id"]}
+
+
+def initial_cursor():
+    return (timezone.now() - timedelta(seconds=SETTLE_SECONDS), 0)
+
+
+def fetch_changes(cursor, limit=FETCH_LIMIT):
+    """
+    Payloads of tickets changed after `cursor` ((updated_at, pk)) and older
+    than the settle window, plus the cursor to continue from.
+    """
+    since, last_id = cursor
+    horizon = timezone.now() - timedelta(seconds=SETTLE_SECONDS)
+    tickets = list(
+        Ticket.objects.select_related("category")
+        .filter(Q(updated_at__gt=since) | Q(updated_at=since, pk__gt=last_id), updated_at__lt=horizon)
+        .order_by("updated_at", "pk")[:limit]
+    )
+    if tickets:
+        cursor = (tickets[-1].updated_at, tickets[-1].pk)
+    return [ticket_payload(ticket) for ticket in tickets], cursor
+
+
+class Subscription:
+    def __init__(self, filters):
+        self.filters = filters
+        self.queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+
+    def push(self, payload):
+        try:
+            self.queue.put_nowait(change_event(self.filters, payload))
+        except asyncio.QueueFull:
+            # медленный клиент: пропускаем, он перезагрузит страницу
+            pass
+
+
+class ChangeFeed:
+    def __init__(self):
+        self.subscribers = set()
+        self.task = None
+        self.cursor = None
+        self.wakeup = None
+        self.listening = False
+
+    def subscribe(self, filters):
+        sub = Subscription(filters)
+        self.subscribers.add(sub)
+        if self.task is None or self.task.done():
+            self.wakeup = asyncio.Event()
+            self.task = asyncio.get_running_loop().create_task(self._run())
+        return sub
+
+    def unsubscribe(self, sub):
+        self.subscribers.discard(sub)
+        if not self.subscribers and self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    async def _run(self):
+        self.cursor = initial_cursor()
+        listener = None
+        if connection.vendor == "postgresql" and psycopg is not None:
+            listener = asyncio.get_running_loop().create_task(self._listen())
+        try:
+            while self.subscribers:
+                try:
+                    timeout = LISTEN_POLL_INTERVAL if self.listening else POLL_INTERVAL
+                    await asyncio.wait_for(self.wakeup.wait(), timeout=timeout)
+                    # NOTIFY приходит раньше, чем строка выйдет из окна ожидания
+                    await asyncio.sleep(SETTLE_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                self.wakeup.clear()
+                try:
+                    changes = await sync_to_async(self._fetch, thread_sensitive=True)()
+                except Exception:
+                    logger.exception("Live queue poll failed")
+                    continue
+                for payload in changes:
+                    for sub in list(self.subscribers):
+                        sub.push(payload)
+        finally:
+            self.listening = False
+            if listener is not None:
+                listener.cancel()
+
+    def _fetch(self):
+        # долгоживущий поток опроса: как в обработке запроса, закрываем
+        # соединения, отжившие CONN_MAX_AGE или сломанные после ошибки
+        close_old_connections()
+        try:
+            changes, self.cursor = fetch_changes(self.cursor)
+        finally:
+            close_old_connections()
+        return changes
+
+    async def _listen(self):
+        db = settings.DATABASES["default"]
+        params = {
+            "dbname": db.get("NAME"),
+            "user": db.get("USER"),
+            "password": db.get("PASSWORD"),
+            "host": db.get("HOST"),
+            "port": db.get("PORT"),
+            **{k: v for k, v in db.get("OPTIONS", {}).items() if isinstance(v, (str, int))},
+        }
+        params = {k: v for k, v in params.items() if v not in (None, "")}
+        try:
+            async with await psycopg.AsyncConnection.connect(autocommit=True, **params) as conn:
+                await conn.execute(f"LISTEN {CHANNEL}")
+                self.listening = True
+                async for _ in conn.notifies():
+                    self.wakeup.set()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.listening = False
+            # без LISTEN остаётся обычный опрос по интервалу
+            logger.exception("LISTEN %s failed, falling back to polling", CHANNEL)
+
+
+feed = ChangeFeed()
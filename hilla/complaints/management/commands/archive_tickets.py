@@ -0,0 +1,44 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from complaints.archive import archive_tickets
+from complaints.models import Ticket
+
+
+class Command(BaseCommand):
+    help = "Move closed tickets older than a threshold into the archive tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=90, help="Archive tickets closed this many days ago.")
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--limit", type=int, default=0, help="Stop after this many tickets (0 = no limit).")
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options["days"])
+        batch_size = options["batch_size"]
+        limit = options["limit"]
+
+        # closed_at пуст у тикетов, закрытых до его появления
+        candidates = Ticket.objects.filter(status=Ticket.CLOSED).filter(
+            Q(closed_at__lt=cutoff) | Q(closed_at__isnull=True, updated_at__lt=cutoff)
+        )
+        if options["dry_run"]:
+            self.stdout.write(f"{candidates.count()} tickets would be archived.")
+            return
+
+        total = 0
+        last_id = 0
+        while not limit or total < limit:
+            size = min(batch_size, limit - total) if limit else batch_size
+            ids = list(candidates.filter(pk__gt=last_id).order_by("pk").values_list("pk", flat=True)[:size])
+            if not ids:
+                break
+            total += archive_tickets(ids)
+            last_id = ids[-1]
+            self.stdout.write(f"Archived {total} tickets...")
+
+        self.stdout.write(self.style.SUCCESS(f"Archived {total} tickets closed before {cutoff:%Y-%m-%d}."))
@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from complaints.models import ArchivedTicket, Reporter, Ticket
+
+
+class Command(BaseCommand):
+    help = (
+        "Link tickets without a reporter to Reporter rows, then rebuild reporter "
+        "totals from hot and archived tickets."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=2000)
+        parser.add_argument("--skip-recompute", action="store_true", help="Only link tickets.")
+
+    def handle(self, *args, **options):
+        reporters = {}
+        linked = 0
+        for model in (Ticket, ArchivedTicket):
+            linked += self._link(model, reporters, options["batch_size"])
+
+        if not options["skip_recompute"]:
+            Reporter.recompute()
+        self.stdout.write(self.style.SUCCESS(f"Linked {linked} tickets to {len(reporters)} reporters."))
+
+    def _link(self, model, reporters, batch_size):
+        pending = (
+            model.objects.filter(reporter__isnull=True, is_anonymous=False)
+            .select_related("user")
+            .only("pk", "user", "name", "email", "is_anonymous")
+            .order_by("pk")
+        )
+        linked = 0
+        last_id = 0
+        while True:
+            batch = list(pending.filter(pk__gt=last_id)[:batch_size])
+            if not batch:
+                break
+            last_id = batch[-1].pk
+            changed = []
+            for ticket in batch:
+                lookup = Reporter.lookup_for(ticket)
+                if lookup is None:
+                    continue
+                if lookup not in reporters:
+                    reporters[lookup] = Reporter.for_ticket(ticket)
+                ticket.reporter = reporters[lookup]
+                changed.append(ticket)
+            with transaction.atomic():
+                model.objects.bulk_update(changed, ["reporter"])
+            linked += len(changed)
+            self.stdout.write(f"{model._meta.verbose_name_plural}: linked {linked} (up to #{last_id}).")
+        return linked
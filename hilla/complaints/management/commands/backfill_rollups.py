@@ -0,0 +1,62 @@
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from complaints.models import ArchivedTicket, Ticket, TicketEvent, TicketRollup
+from complaints.rollups import event_key, hour_bucket
+
+
+class Command(BaseCommand):
+    help = "Rebuild the hourly ticket rollups from tickets and the event log."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        counts = Counter()
+
+        # created: из самих тикетов (включая архив), чтобы покрыть тикеты старше журнала
+        for model in (Ticket, ArchivedTicket):
+            last_id = 0
+            while True:
+                rows = list(
+                    model.objects.filter(pk__gt=last_id)
+                    .order_by("pk")
+                    .values_list("pk", "created_at", "category_id", "priority")[:batch_size]
+                )
+                if not rows:
+                    break
+                for _, created_at, category_id, priority in rows:
+                    counts[(hour_bucket(created_at), TicketRollup.CREATED, category_id, priority, "")] += 1
+                last_id = rows[-1][0]
+
+        last_id = 0
+        while True:
+            batch = list(
+                TicketEvent.objects.filter(pk__gt=last_id, kind=TicketEvent.STATUS)
+                .order_by("pk")
+                .only("pk", "kind", "created_at", "category_id", "priority", "new_value")[:batch_size]
+            )
+            if not batch:
+                break
+            counts.update(event_key(event) for event in batch)
+            last_id = batch[-1].pk
+
+        rollups = [
+            TicketRollup(
+                bucket=bucket,
+                metric=metric,
+                category_id=category_id,
+                priority=priority,
+                status=status,
+                count=count,
+            )
+            for (bucket, metric, category_id, priority, status), count in counts.items()
+        ]
+        with transaction.atomic():
+            TicketRollup.objects.all().delete()
+            TicketRollup.objects.bulk_create(rollups, batch_size=batch_size)
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {len(rollups)} rollup rows."))
@@ -0,0 +1,52 @@
+import gzip
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from complaints import renderers
+from complaints.middleware import BROTLI_QUALITY, brotli
+from complaints.models import Ticket
+from complaints.serializers import TicketSerializer, ticket_rows
+
+
+class Command(BaseCommand):
+    help = "Compare API serialization paths: time per page and bytes on the wire raw, gzip and brotli."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--page-size", type=int, default=1000, help="Tickets per page.")
+        parser.add_argument("--repeat", type=int, default=10, help="Timed runs per path.")
+
+    def handle(self, *args, **options):
+        size = options["page_size"]
+        queryset = Ticket.objects.order_by("-created_at")[:size]
+        if queryset.count() < size:
+            raise CommandError(f"Fewer than {size} tickets; seed them with 'benchmark --seed --size {size}'.")
+
+        paths = [
+            ("ModelSerializer + json", lambda: TicketSerializer(queryset, many=True).data, JSONRenderer()),
+            ("values + json", lambda: ticket_rows(queryset), JSONRenderer()),
+        ]
+        if renderers.orjson is not None:
+            paths.append(("values + orjson", lambda: ticket_rows(queryset), renderers.ORJSONRenderer()))
+        if renderers.msgpack is not None:
+            paths.append(("values + msgpack", lambda: ticket_rows(queryset), renderers.MsgPackRenderer()))
+
+        self.stdout.write(f"{'path':<24} {'fetch ms':>9} {'render ms':>10} {'raw KB':>8} {'gzip KB':>8} {'br KB':>8}")
+        for name, build, renderer in paths:
+            build()  # прогрев
+            fetch = render = 0.0
+            for _ in range(options["repeat"]):
+                t0 = time.perf_counter()
+                data = build()
+                t1 = time.perf_counter()
+                body = renderer.render(data, renderer.media_type)
+                t2 = time.perf_counter()
+                fetch += t1 - t0
+                render += t2 - t1
+            gzipped = len(gzip.compress(body, compresslevel=6))
+            brotlied = f"{len(brotli.compress(body, quality=BROTLI_QUALITY)) / 1024:>8.1f}" if brotli else f"{'-':>8}"
+            self.stdout.write(
+                f"{name:<24} {fetch * 1000 / options['repeat']:>9.2f} {render * 1000 / options['repeat']:>10.2f} "
+                f"{len(body) / 1024:>8.1f} {gzipped / 1024:>8.1f} {brotlied}"
+            )
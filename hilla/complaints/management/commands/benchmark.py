@@ -0,0 +1,353 @@
+import asyncio
+import json
+import random
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import AsyncClient, Client
+from django.urls import URLPattern, reverse
+
+from complaints import events
+from complaints import urls as complaint_urls
+from complaints.models import Category, Ticket, TicketComment, TicketEvent, TicketRating
+
+
+# потоковые, разрушающие и только-POST маршруты не меряем
+SKIPPED_ROUTES = {
+    "admin_queue_stream",
+    "seed_demo",
+    "create_admin",
+    "rate_ticket",
+    "admin_ticket_batch",
+    "admin_ticket_status",
+    "upload_avatar",
+    "api_ai_generate",
+    "api_tickets_bulk",
+}
+
+ADMIN_ROUTES = [
+    ("admin_index", "admin:index", False),
+    ("admin_ticket_changelist", "admin:complaints_ticket_changelist", False),
+    ("admin_ticket_change", "admin:complaints_ticket_change", True),
+]
+
+SEED_BATCH = 5000
+BENCH_USERNAME = "benchmark"
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(q * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class QueryCounter:
+    """
+    connection.execute_wrapper that counts statements; unlike the debug
+    queries log it has no length cap.
+    """
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def summarize(latencies, elapsed):
+    latencies = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark every complaints route and the admin in-process (and optionally through the "
+        "ASGI handler or over HTTP), then compare against a stored JSON baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--size", type=int, default=10_000, help="Dataset size in tickets (10000, 100000, 1000000).")
+        parser.add_argument("--seed", action="store_true", help="Top the database up to --size tickets first.")
+        parser.add_argument(
+            "--allow-seed",
+            action="store_true",
+            help="Allow --seed with DEBUG off (it writes fake tickets into the configured database).",
+        )
+        parser.add_argument("--requests", type=int, default=30, help="Requests per route.")
+        parser.add_argument("--routes", default="", help="Comma separated route names to run (default: all).")
+        parser.add_argument("--http", default="", help="Base URL of a running server to load over HTTP.")
+        parser.add_argument(
+            "--asgi",
+            action="store_true",
+            help="Also run each route through the ASGI handler with --concurrency requests in flight.",
+        )
+        parser.add_argument("--concurrency", type=int, default=16, help="HTTP workers / ASGI requests in flight.")
+        parser.add_argument("--baseline", default="", help="Baseline JSON (default: benchmarks/baseline-<size>.json).")
+        parser.add_argument("--save-baseline", action="store_true", help="Write results as the new baseline.")
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.25,
+            help="Allowed relative p95/throughput regression before failing.",
+        )
+
+    def handle(self, *args, **options):
+        size = options["size"]
+        if options["seed"]:
+            if not settings.DEBUG and not options["allow_seed"]:
+                raise CommandError(
+                    "Refusing to seed fake tickets with DEBUG off; point DATABASE_URL at a scratch "
+                    "database and pass --allow-seed."
+                )
+            self.seed(size)
+        total = Ticket.objects.count()
+        if total < size:
+            raise CommandError(f"Database has {total} tickets, {size} needed; rerun with --seed.")
+
+        user, created = self.bench_user()
+        client = Client(HTTP_HOST=self.host())
+        client.force_login(user)
+        try:
+            self.run(client, size, total, options)
+        finally:
+            client.logout()
+            # суперпользователь без пароля не должен оставаться в базе после прогона
+            if created:
+                user.delete()
+
+    def run(self, client, size, total, options):
+        routes = self.routes()
+        wanted = {name.strip() for name in options["routes"].split(",") if name.strip()}
+        if wanted:
+            routes = [(name, path) for name, path in routes if name in wanted]
+
+        results = {}
+        for name, path in routes:
+            result = self.run_in_process(client, path, options["requests"])
+            if options["asgi"]:
+                result["asgi"] = self.run_asgi(client, path, options["requests"], options["concurrency"])
+            if options["http"]:
+                result["http"] = self.run_http(client, options["http"], path, options["requests"], options["concurrency"])
+            results[name] = result
+            self.report(name, path, result)
+
+        baseline_path = Path(options["baseline"] or settings.BASE_DIR / "benchmarks" / f"baseline-{size}.json")
+        payload = {"size": size, "tickets": total, "database": connection.vendor, "routes": results}
+        if options["save_baseline"]:
+            baseline_path.parent.mkdir(parents=True, exist_ok=True)
+            baseline_path.write_text(json.dumps(payload, indent=2, sort_keys=True) + "\n")
+            self.stdout.write(self.style.SUCCESS(f"Baseline written to {baseline_path}."))
+            return
+        if baseline_path.exists():
+            regressions = self.compare(json.loads(baseline_path.read_text()), results, options["threshold"])
+            if regressions:
+                raise CommandError("Regressions against baseline:\n  " + "\n  ".join(regressions))
+            self.stdout.write(self.style.SUCCESS(f"No regressions against {baseline_path}."))
+
+    def host(self):
+        for host in settings.ALLOWED_HOSTS:
+            if host != "*":
+                return host.lstrip(".")
+        return "localhost"
+
+    def bench_user(self):
+        user, created = get_user_model().objects.get_or_create(
+            username=BENCH_USERNAME,
+            defaults={"is_staff": True, "is_superuser": True},
+        )
+        if created:
+            user.set_unusable_password()
+            user.save(update_fields=["password"])
+        return user, created
+
+    def routes(self):
+        sample = Ticket.objects.order_by("-pk").values_list("pk", flat=True).first()
+        routes = []
+        for pattern in complaint_urls.urlpatterns:
+            if not isinstance(pattern, URLPattern) or pattern.name in SKIPPED_ROUTES:
+                continue
+            kwargs = {"pk": sample} if "pk" in pattern.pattern.converters else {}
+            routes.append((pattern.name, reverse(pattern.name, kwargs=kwargs)))
+        for name, url_name, needs_pk in ADMIN_ROUTES:
+            routes.append((name, reverse(url_name, args=[sample] if needs_pk else [])))
+        return routes
+
+    def run_in_process(self, client, path, count):
+        queries = QueryCounter()
+        with connection.execute_wrapper(queries):
+            status = client.get(path).status_code
+        latencies = []
+        started = time.perf_counter()
+        for _ in range(count):
+            t0 = time.perf_counter()
+            client.get(path)
+            latencies.append(time.perf_counter() - t0)
+        result = summarize(latencies, time.perf_counter() - started)
+        result.update(status=status, queries=queries.count)
+        return result
+
+    def run_asgi(self, client, path, count, concurrency):
+        """
+        Same requests through ASGIHandler, as under uvicorn/daphne: sync views
+        run via sync_to_async, so this shows the cost of the async stack.
+        """
+
+        async def load():
+            asgi_client = AsyncClient(HTTP_HOST=self.host())
+            asgi_client.cookies = client.cookies
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def fetch():
+                async with semaphore:
+                    t0 = time.perf_counter()
+                    status = (await asgi_client.get(path)).status_code
+                    return status < 400, time.perf_counter() - t0
+
+            return await asyncio.gather(*(fetch() for _ in range(count * concurrency)))
+
+        started = time.perf_counter()
+        # async_to_sync, не asyncio.run: синхронные вьюхи выполняются в этом
+        # потоке и работают с тем же соединением, что и остальной прогон
+        outcomes = async_to_sync(load)()
+        result = summarize([latency for _, latency in outcomes], time.perf_counter() - started)
+        result["errors"] = sum(1 for ok, _ in outcomes if not ok)
+        return result
+
+    def run_http(self, client, base_url, path, count, concurrency):
+        cookie = "; ".join(f"{key}={morsel.value}" for key, morsel in client.cookies.items())
+        url = base_url.rstrip("/") + path
+
+        def fetch(_):
+            request = urllib.request.Request(url, headers={"Cookie": cookie})
+            t0 = time.perf_counter()
+            try:
+                with urllib.request.urlopen(request, timeout=30) as response:
+                    response.read()
+                    ok = response.status < 400
+            except (urllib.error.URLError, OSError):
+                ok = False
+            return ok, time.perf_counter() - t0
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            outcomes = list(pool.map(fetch, range(count * concurrency)))
+        result = summarize([latency for _, latency in outcomes], time.perf_counter() - started)
+        result["errors"] = sum(1 for ok, _ in outcomes if not ok)
+        return result
+
+    def report(self, name, path, result):
+        line = (
+            f"{name:<26} {path:<38} {result['status']}  q={result['queries']:<4} "
+            f"p50={result['p50_ms']:>8.2f}ms p95={result['p95_ms']:>8.2f}ms p99={result['p99_ms']:>8.2f}ms "
+            f"{result['rps']:>8.1f} req/s"
+        )
+        for scope in ("asgi", "http"):
+            if scope in result:
+                other = result[scope]
+                line += (
+                    f" | {scope} p50={other['p50_ms']:.2f}ms p95={other['p95_ms']:.2f}ms p99={other['p99_ms']:.2f}ms "
+                    f"{other['rps']:.1f} req/s errors={other['errors']}"
+                )
+        self.stdout.write(line)
+
+    def compare(self, baseline, results, threshold):
+        regressions = []
+        for name, result in results.items():
+            before = baseline.get("routes", {}).get(name)
+            if not before:
+                continue
+            if result["queries"] > before["queries"]:
+                regressions.append(f"{name}: {before['queries']} -> {result['queries']} queries")
+            scopes = [("in-process", result, before)]
+            scopes += [(scope, result.get(scope), before.get(scope)) for scope in ("asgi", "http")]
+            for scope, now, then in scopes:
+                if not now or not then:
+                    continue
+                if then["p95_ms"] and now["p95_ms"] > then["p95_ms"] * (1 + threshold):
+                    regressions.append(f"{name} ({scope}): p95 {then['p95_ms']}ms -> {now['p95_ms']}ms")
+                if then["rps"] and now["rps"] < then["rps"] * (1 - threshold):
+                    regressions.append(f"{name} ({scope}): {then['rps']} -> {now['rps']} req/s")
+        return regressions
+
+    def seed(self, size):
+        existing = Ticket.objects.count()
+        if existing >= size:
+            return
+        rng = random.Random(size)
+        categories = [Category.objects.get_or_create(name=name)[0] for name in ["Dormitory", "IT", "Study", "Safety", "Cafeteria"]]
+        words = "light leak wifi noise heating water door printer projector laptop elevator window".split()
+        statuses = [Ticket.OPEN, Ticket.IN_PROGRESS, Ticket.CLOSED]
+        priorities = [Ticket.LOW, Ticket.MEDIUM, Ticket.HIGH]
+
+        # bulk_create обходит save() и сигналы: агрегаты оценок проставляются
+        # сразу, активность и журнал событий пишутся по батчу, а репортёры,
+        # сводки и отпечатки строятся после вставки. Очереди уведомлений и
+        # вебхуков не заполняются, SLA-отметки не моделируются
+        started = time.perf_counter()
+        remaining = size - existing
+        while remaining > 0:
+            batch = min(SEED_BATCH, remaining)
+            tickets, scores = [], []
+            for _ in range(batch):
+                ticket_scores = [rng.randint(1, 5) for _ in range(rng.choice([0, 0, 1, 2, 3]))]
+                subject = " ".join(rng.sample(words, 3)).capitalize()
+                priority = rng.choice(priorities)
+                reporter = rng.randint(1, size // 20 + 1)
+                tickets.append(
+                    Ticket(
+                        category=rng.choice(categories),
+                        type=rng.choice([Ticket.QUESTION, Ticket.COMPLAINT]),
+                        priority=priority,
+                        priority_rank=Ticket.PRIORITY_RANKS[priority],
+                        status=rng.choice(statuses),
+                        name=f"Reporter {reporter}",
+                        email=f"reporter{reporter}@bench.example.com",
+                        subject=subject,
+                        message=f"{subject}. " + " ".join(rng.choices(words, k=30)),
+                        rating_count=len(ticket_scores),
+                        rating_sum=sum(ticket_scores),
+                        rating_avg=sum(ticket_scores) / len(ticket_scores) if ticket_scores else None,
+                    )
+                )
+                scores.append(ticket_scores)
+            with transaction.atomic():
+                created = Ticket.objects.bulk_create(tickets)
+                ratings = TicketRating.objects.bulk_create(
+                    [
+                        TicketRating(ticket=ticket, score=score, rater_name="bench")
+                        for ticket, ticket_scores in zip(created, scores)
+                        for score in ticket_scores
+                    ],
+                    batch_size=SEED_BATCH,
+                )
+                TicketEvent.objects.bulk_create(
+                    [events.created_event(ticket) for ticket in created] + [events.rating_event(r) for r in ratings],
+                    batch_size=SEED_BATCH,
+                )
+                TicketComment.objects.bulk_create(
+                    [TicketComment(ticket=ticket, author_name="bench", text="Looking into it.") for ticket in created[::4]],
+                    batch_size=SEED_BATCH,
+                )
+                Ticket.recompute_activity([ticket.pk for ticket in created])
+            remaining -= batch
+            self.stdout.write(f"Seeded {size - remaining - existing}/{size - existing} tickets.")
+        for command in ("backfill_reporters", "backfill_rollups", "cluster_tickets"):
+            call_command(command, stdout=self.stdout)
+        self.stdout.write(f"Seeding took {time.perf_counter() - started:.1f}s.")
@@ -1,13 +1,28 @@
 from django.core.management.base import BaseCommand
+from django.db import transaction
 
-from complaints.models import Ticket, TicketComment, TicketRating
+from complaints.models import Reporter, Ticket, TicketTombstone
+
+
+TOMBSTONE_BATCH = 5000
 
 
 class Command(BaseCommand):
     help = "Delete all tickets, comments, and ratings."
 
     def handle(self, *args, **options):
-        TicketComment.objects.all().delete()
-        TicketRating.objects.all().delete()
-        Ticket.objects.all().delete()
+        with transaction.atomic():
+            # синхронизируемые клиенты должны узнать об удалении
+            batch = []
+            for pk in Ticket.objects.values_list("pk", flat=True).iterator(chunk_size=TOMBSTONE_BATCH):
+                batch.append(pk)
+                if len(batch) == TOMBSTONE_BATCH:
+                    TicketTombstone.record(batch)
+                    batch = []
+            TicketTombstone.record(batch)
+            # комментарии и оценки уходят каскадом с origin=Ticket, поэтому их
+            # сигналы не пересчитывают агрегаты удаляемых тикетов построчно
+            Ticket.objects.all().delete()
+            # у репортёров остаются только архивные тикеты
+            Reporter.recompute()
         self.stdout.write(self.style.SUCCESS("All tickets, comments, and ratings deleted."))
@@ -0,0 +1,107 @@
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+
+from complaints import minhash, similarity
+from complaints.models import Ticket, TicketLshKey
+
+
+class Command(BaseCommand):
+    help = "Fingerprint tickets in parallel and group open near-duplicates."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=4)
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--skip-index", action="store_true", help="Reuse existing fingerprints.")
+        parser.add_argument(
+            "--link",
+            action="store_true",
+            help="Set duplicate_of on open tickets to the oldest ticket of their cluster.",
+        )
+
+    def handle(self, *args, **options):
+        if not options["skip_index"]:
+            indexed = self._index(options["workers"], options["batch_size"])
+            self.stdout.write(f"Fingerprinted {indexed} tickets.")
+
+        clusters = self._clusters()
+        self.stdout.write(f"Found {len(clusters)} clusters of open near-duplicates.")
+        for members in clusters[:20]:
+            self.stdout.write("  " + ", ".join(f"#{pk}" for pk in members))
+
+        if options["link"]:
+            linked = 0
+            for members in clusters:
+                canonical, rest = members[0], members[1:]
+                linked += Ticket.objects.filter(pk__in=rest, duplicate_of__isnull=True).update(
+                    duplicate_of=canonical
+                )
+            self.stdout.write(f"Linked {linked} tickets.")
+
+        self.stdout.write(self.style.SUCCESS("Clustering finished."))
+
+    def _index(self, workers, batch_size):
+        total = 0
+        batches = self._batches(batch_size)
+        # воркеры импортируют только complaints.minhash, без Django и ORM
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for rows in pool.map(minhash.signatures, batches):
+                similarity.index_signatures(rows)
+                total += len(rows)
+        return total
+
+    def _batches(self, batch_size):
+        last_id = 0
+        while True:
+            rows = list(
+                Ticket.objects.filter(pk__gt=last_id)
+                .order_by("pk")
+                .values_list("pk", "subject", "message")[:batch_size]
+            )
+            if not rows:
+                return
+            yield rows
+            last_id = rows[-1][0]
+
+    def _clusters(self):
+        """
+        Union-find over open tickets sharing an LSH key, confirmed by the
+        signature estimate. Clusters are sorted by id (oldest first).
+        """
+        shared = (
+            TicketLshKey.objects.filter(ticket__status__in=similarity.OPEN_STATUSES)
+            .values("key")
+            .annotate(n=Count("id"))
+            .filter(n__gt=1)
+            .values("key")
+        )
+        buckets = {}
+        for key, ticket_id in TicketLshKey.objects.filter(
+            key__in=shared, ticket__status__in=similarity.OPEN_STATUSES
+        ).values_list("key", "ticket_id"):
+            buckets.setdefault(key, []).append(ticket_id)
+
+        ids = {pk for members in buckets.values() for pk in members}
+        signatures = {
+            pk: minhash.unpack(data)
+            for pk, data in Ticket.objects.filter(pk__in=ids).values_list("pk", "fingerprint__signature")
+        }
+        parent = {pk: pk for pk in ids}
+
+        def find(pk):
+            while parent[pk] != pk:
+                parent[pk] = parent[parent[pk]]
+                pk = parent[pk]
+            return pk
+
+        for members in buckets.values():
+            first = members[0]
+            for other in members[1:]:
+                if minhash.estimate(signatures[first], signatures[other]) >= minhash.THRESHOLD:
+                    parent[find(other)] = find(first)
+
+        groups = {}
+        for pk in ids:
+            groups.setdefault(find(pk), []).append(pk)
+        return sorted((sorted(g) for g in groups.values() if len(g) > 1), key=lambda g: g[0])
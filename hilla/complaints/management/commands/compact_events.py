@@ -0,0 +1,51 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from complaints.models import ArchivedTicket, Ticket, TicketEvent
+
+
+class Command(BaseCommand):
+    help = "Delete old ticket events in batches (retention) and drop events of deleted tickets."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=365, help="Keep events newer than this many days.")
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--keep-created",
+            action="store_true",
+            help="Keep 'created' events past the retention window.",
+        )
+        parser.add_argument(
+            "--prune-orphans",
+            action="store_true",
+            help="Also delete events whose ticket no longer exists (archived tickets are kept).",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        cutoff = timezone.now() - timedelta(days=options["days"])
+
+        expired = TicketEvent.objects.filter(created_at__lt=cutoff)
+        if options["keep_created"]:
+            expired = expired.exclude(kind=TicketEvent.CREATED)
+        deleted = self._delete_in_batches(expired, batch_size)
+        self.stdout.write(f"Deleted {deleted} events older than {cutoff:%Y-%m-%d}.")
+
+        if options["prune_orphans"]:
+            orphans = TicketEvent.objects.exclude(ticket_id__in=Ticket.objects.values("pk")).exclude(
+                ticket_id__in=ArchivedTicket.objects.values("pk")
+            )
+            deleted = self._delete_in_batches(orphans, batch_size)
+            self.stdout.write(f"Deleted {deleted} events of deleted tickets.")
+
+        self.stdout.write(self.style.SUCCESS("Event log compacted."))
+
+    def _delete_in_batches(self, queryset, batch_size):
+        total = 0
+        while True:
+            ids = list(queryset.order_by("pk").values_list("pk", flat=True)[:batch_size])
+            if not ids:
+                return total
+            total += TicketEvent.objects.filter(pk__in=ids).delete()[0]
@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from complaints import webhooks
+
+
+class Command(BaseCommand):
+    help = "Post queued ticket events to webhook endpoints."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=1000, help="Deliveries claimed per round.")
+        parser.add_argument("--batch-events", type=int, default=webhooks.BATCH_EVENTS, help="Events per POST.")
+        parser.add_argument("--loop", action="store_true", help="Keep polling instead of exiting when drained.")
+        parser.add_argument("--interval", type=float, default=5.0, help="Seconds between polls with --loop.")
+
+    def handle(self, *args, **options):
+        total = [0, 0, 0]
+        while True:
+            counts = webhooks.deliver(limit=options["limit"], batch_events=options["batch_events"])
+            total = [a + b for a, b in zip(total, counts)]
+            if any(counts):
+                continue
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
+        self.stdout.write(f"Delivered {total[0]} events, {total[1]} scheduled for retry, {total[2]} dead-lettered.")
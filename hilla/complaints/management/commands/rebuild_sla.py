@@ -0,0 +1,83 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Min, Q
+
+from complaints import sla
+from complaints.models import ArchivedTicket, SlaAggregate, Ticket, TicketEvent
+
+
+class Command(BaseCommand):
+    help = "Stamp missing first_answered_at/closed_at and rebuild SLA aggregates."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        stamped = self._stamp_missing(batch_size)
+        self.stdout.write(f"Stamped {stamped} tickets from the event log.")
+
+        with transaction.atomic():
+            SlaAggregate.objects.all().delete()
+            # архивные тикеты входят в статистику так же, как живые
+            for model in (Ticket, ArchivedTicket):
+                self._observe_all(model, batch_size)
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {SlaAggregate.objects.count()} SLA rows."))
+
+    def _observe_all(self, model, batch_size):
+        last_id = 0
+        while True:
+            tickets = list(
+                model.objects.filter(pk__gt=last_id)
+                .filter(Q(first_answered_at__isnull=False) | Q(closed_at__isnull=False))
+                .order_by("pk")
+                .only("pk", "category_id", "priority", "created_at", "first_answered_at", "closed_at")[:batch_size]
+            )
+            if not tickets:
+                return
+            observations = []
+            for ticket in tickets:
+                if ticket.first_answered_at:
+                    seconds = (ticket.first_answered_at - ticket.created_at).total_seconds()
+                    observations.append((ticket, SlaAggregate.RESPONSE, seconds))
+                if ticket.closed_at:
+                    seconds = (ticket.closed_at - ticket.created_at).total_seconds()
+                    observations.append((ticket, SlaAggregate.RESOLUTION, seconds))
+            sla.observe(observations)
+            last_id = tickets[-1].pk
+
+    def _stamp_missing(self, batch_size):
+        """
+        Tickets answered/closed before tracking existed get the time of the first
+        matching event, or updated_at when the log has nothing.
+        """
+        missing = Ticket.objects.filter(
+            Q(is_answered=True, first_answered_at__isnull=True)
+            | Q(status=Ticket.CLOSED, closed_at__isnull=True)
+        )
+        total = 0
+        while True:
+            tickets = list(missing.order_by("pk")[:batch_size])
+            if not tickets:
+                return total
+            ids = [t.pk for t in tickets]
+            first_answer = dict(
+                TicketEvent.objects.filter(ticket_id__in=ids, kind=TicketEvent.ANSWERED, new_value="true")
+                .values("ticket_id")
+                .annotate(at=Min("created_at"))
+                .values_list("ticket_id", "at")
+            )
+            first_close = dict(
+                TicketEvent.objects.filter(ticket_id__in=ids, kind=TicketEvent.STATUS, new_value=Ticket.CLOSED)
+                .values("ticket_id")
+                .annotate(at=Min("created_at"))
+                .values_list("ticket_id", "at")
+            )
+            for ticket in tickets:
+                if ticket.is_answered and ticket.first_answered_at is None:
+                    ticket.first_answered_at = first_answer.get(ticket.pk) or ticket.updated_at
+                if ticket.status == Ticket.CLOSED and ticket.closed_at is None:
+                    ticket.closed_at = first_close.get(ticket.pk) or ticket.updated_at
+            Ticket.objects.bulk_update(tickets, ["first_answered_at", "closed_at"])
+            total += len(tickets)
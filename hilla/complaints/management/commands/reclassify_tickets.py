@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from complaints import classifier
+from complaints.models import Ticket
+
+
+class Command(BaseCommand):
+    help = "Store classifier suggestions on existing tickets in vectorized batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=2000)
+        parser.add_argument("--only-missing", action="store_true", help="Skip tickets that already have suggestions.")
+
+    def handle(self, *args, **options):
+        model = classifier.get_classifier()
+        if model is None:
+            raise CommandError("No trained classifier; run train_classifier first.")
+
+        tickets = Ticket.objects.all()
+        if options["only_missing"]:
+            tickets = tickets.filter(suggested_priority="")
+
+        total = 0
+        last_id = 0
+        while True:
+            batch = list(
+                tickets.filter(pk__gt=last_id)
+                .order_by("pk")
+                .only("pk", "subject", "message")[: options["batch_size"]]
+            )
+            if not batch:
+                break
+            predictions = model.predict_many([(t.subject, t.message) for t in batch])
+            known = classifier.existing_categories(category_id for category_id, _ in predictions)
+            now = timezone.now()
+            for ticket, (category_id, priority) in zip(batch, predictions):
+                ticket.suggested_category_id = category_id if category_id in known else None
+                ticket.suggested_priority = priority or ""
+                ticket.updated_at = now
+            Ticket.objects.bulk_update(batch, ["suggested_category", "suggested_priority", "updated_at"])
+            total += len(batch)
+            last_id = batch[-1].pk
+
+        self.stdout.write(self.style.SUCCESS(f"Reclassified {total} tickets."))
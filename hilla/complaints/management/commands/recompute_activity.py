@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from complaints.models import Ticket
+
+
+class Command(BaseCommand):
+    help = "Rebuild Ticket.comment_count and last_activity_at from comments and ratings in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=2000)
+        parser.add_argument("--start-id", type=int, default=0, help="Resume after this ticket id.")
+
+    def handle(self, *args, **options):
+        last_id = options["start_id"]
+        total = 0
+        while True:
+            ids = list(
+                Ticket.objects.filter(pk__gt=last_id).order_by("pk").values_list("pk", flat=True)[: options["batch_size"]]
+            )
+            if not ids:
+                break
+            # каждый батч - отдельный UPDATE в своей транзакции
+            total += Ticket.recompute_activity(ids)
+            last_id = ids[-1]
+            self.stdout.write(f"Recomputed {total} tickets (up to #{last_id}).")
+        self.stdout.write(self.style.SUCCESS(f"Activity recomputed for {total} tickets."))
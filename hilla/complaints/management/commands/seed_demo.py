@@ -1,6 +1,7 @@
 import random
 from django.core.management.base import BaseCommand
 
+from complaints import events
 from complaints.models import Category, Ticket, TicketRating
 
 
@@ -39,6 +40,7 @@ class Command(BaseCommand):
                 subject=random.choice(subjects),
                 message="Demo ticket created for UI preview.",
             )
+            events.record_created(ticket)
             for _ in range(random.randint(0, 3)):
                 TicketRating.objects.create(
                     ticket=ticket,
@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from complaints import notifications
+
+
+class Command(BaseCommand):
+    help = "Send pending ticket notification emails from the outbox."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument("--loop", action="store_true", help="Keep polling instead of exiting when drained.")
+        parser.add_argument("--interval", type=float, default=10.0, help="Seconds between polls with --loop.")
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                sent, failed = notifications.dispatch(batch_size=options["batch_size"])
+            except Exception as exc:
+                if not options["loop"]:
+                    raise
+                # воркер с --loop не должен падать из-за временной ошибки
+                self.stderr.write(f"Dispatch failed: {exc}")
+                time.sleep(options["interval"])
+                continue
+            if sent or failed or not options["loop"]:
+                self.stdout.write(f"Sent {sent} notifications, {failed} failed attempts.")
+            if not options["loop"]:
+                return
+            time.sleep(options["interval"])
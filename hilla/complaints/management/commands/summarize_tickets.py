@@ -0,0 +1,116 @@
+import asyncio
+import json
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from complaints import ai
+from complaints.models import Ticket
+
+
+class Command(BaseCommand):
+    help = "Store a one-line AI summary on tickets that have none, with bounded concurrency."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--provider", default="", help="openai, gemini or stub (defaults to the AI_PROVIDER/AI_PROVIDERS router).")
+        parser.add_argument("--concurrency", type=int, default=8, help="Provider calls in flight.")
+        parser.add_argument("--chunk-size", type=int, default=100)
+        parser.add_argument("--limit", type=int, default=0, help="Stop after this many tickets.")
+        parser.add_argument(
+            "--record",
+            nargs="?",
+            const="",
+            default=None,
+            help="Append the run's throughput as a JSON line (default: benchmarks/summarize.jsonl) "
+            "and compare it with the previous run of the same provider and concurrency.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            provider = ai.get_provider(options["provider"] or None)
+        except ai.ProviderError as exc:
+            raise CommandError(str(exc))
+
+        # строки с пустым summary и есть точка продолжения после прерывания:
+        # каждый чанк сохраняется сразу, как только готов
+        pending = Ticket.objects.filter(summary="").order_by("pk")
+        limit = options["limit"]
+        done = failed = 0
+        last_id = 0
+        started = time.perf_counter()
+        while not limit or done + failed < limit:
+            size = options["chunk_size"]
+            if limit:
+                size = min(size, limit - done - failed)
+            chunk = list(pending.filter(pk__gt=last_id).only("pk", "subject", "message")[:size])
+            if not chunk:
+                break
+            last_id = chunk[-1].pk
+
+            chunk_started = time.perf_counter()
+            results = asyncio.run(self._summarize(provider, chunk, options["concurrency"]))
+            summarized = []
+            for ticket, result in zip(chunk, results):
+                if isinstance(result, Exception):
+                    failed += 1
+                    self.stderr.write(f"#{ticket.pk}: {result}")
+                    continue
+                ticket.summary = result
+                ticket.updated_at = timezone.now()
+                summarized.append(ticket)
+            Ticket.objects.bulk_update(summarized, ["summary", "updated_at"])
+            done += len(summarized)
+
+            elapsed = time.perf_counter() - chunk_started
+            self.stdout.write(
+                f"Up to #{last_id}: {len(summarized)}/{len(chunk)} summarized, {len(chunk) / elapsed:.1f} tickets/s"
+            )
+
+        elapsed = time.perf_counter() - started
+        rate = (done + failed) / elapsed if elapsed else 0.0
+        self.stdout.write(
+            self.style.SUCCESS(f"Summarized {done} tickets ({failed} failed) in {elapsed:.1f}s, {rate:.1f} tickets/s.")
+        )
+        if options["record"] is not None:
+            self.record(
+                Path(options["record"] or settings.BASE_DIR / "benchmarks" / "summarize.jsonl"),
+                {
+                    "at": timezone.now().isoformat(),
+                    "provider": options["provider"] or "router",
+                    "concurrency": options["concurrency"],
+                    "chunk_size": options["chunk_size"],
+                    "summarized": done,
+                    "failed": failed,
+                    "seconds": round(elapsed, 3),
+                    "tickets_per_s": round(rate, 2),
+                },
+            )
+
+    def record(self, path, run):
+        previous = None
+        if path.exists():
+            for line in path.read_text().splitlines():
+                row = json.loads(line)
+                if (row["provider"], row["concurrency"]) == (run["provider"], run["concurrency"]):
+                    previous = row
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("a") as f:
+            f.write(json.dumps(run, sort_keys=True) + "\n")
+        self.stdout.write(f"Recorded in {path}.")
+        if previous is not None:
+            self.stdout.write(
+                f"Previous run ({previous['at']}): {previous['tickets_per_s']} tickets/s, now {run['tickets_per_s']}."
+            )
+
+    async def _summarize(self, provider, chunk, concurrency):
+        semaphore = asyncio.Semaphore(max(concurrency, 1))
+
+        async def one(ticket):
+            prompt = ai.build_prompt("ticket_summary", f"{ticket.subject}\n{ticket.message}")
+            async with semaphore:
+                return ai.clean_summary(await provider.agenerate(prompt, max_tokens=80))
+
+        return await asyncio.gather(*(one(ticket) for ticket in chunk), return_exceptions=True)
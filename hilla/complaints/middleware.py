@@ -0,0 +1,81 @@
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+from django.utils.regex_helper import _lazy_re_compile
+
+try:
+    import brotli
+except Exception:
+    brotli = None
+
+
+re_accepts_brotli = _lazy_re_compile(r"\bbr\b")
+
+# Живые потоки не сжимаем: сжатие буферизует события
+UNCOMPRESSED_TYPES = ("text/event-stream",)
+# Ответ API собирается на каждый запрос, поэтому не максимальное качество
+BROTLI_QUALITY = 6
+MIN_LENGTH = 200
+
+
+def _brotli_sequence(sequence):
+    compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+    for chunk in sequence:
+        data = compressor.process(chunk) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    GZipMiddleware that prefers Brotli for non-HTML responses when the client
+    accepts it. Streamed bodies are flushed chunk by chunk. HTML stays on
+    gzip, which pads the output with random bytes against BREACH, because
+    pages carry CSRF tokens.
+    """
+
+    def process_response(self, request, response):
+        content_type = response.get("Content-Type", "")
+        if content_type.startswith(UNCOMPRESSED_TYPES):
+            return response
+        if (
+            brotli is None
+            or content_type.startswith("text/html")
+            or not re_accepts_brotli.search(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        ):
+            return super().process_response(request, response)
+
+        if not response.streaming and len(response.content) < MIN_LENGTH:
+            return response
+        if response.has_header("Content-Encoding"):
+            return response
+        patch_vary_headers(response, ("Accept-Encoding",))
+
+        if response.streaming:
+            if response.is_async:
+                original = response.streaming_content
+
+                async def brotli_wrapper():
+                    compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+                    async for chunk in original:
+                        data = compressor.process(chunk) + compressor.flush()
+                        if data:
+                            yield data
+                    yield compressor.finish()
+
+                response.streaming_content = brotli_wrapper()
+            else:
+                response.streaming_content = _brotli_sequence(response.streaming_content)
+            del response.headers["Content-Length"]
+        else:
+            compressed = brotli.compress(response.content, quality=BROTLI_QUALITY)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers["Content-Length"] = str(len(compressed))
+
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = "br"
+        return response
@@ -0,0 +1,91 @@
+# Generated by Django 6.0.1 on 2026-10-19 11:42
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+BATCH_SIZE = 2000
+
+
+def backfill_rating_aggregates(apps, schema_editor):
+    Ticket = apps.get_model("complaints", "Ticket")
+    TicketRating = apps.get_model("complaints", "TicketRating")
+    last_id = 0
+    while True:
+        ids = list(
+            Ticket.objects.filter(pk__gt=last_id).order_by("pk").values_list("pk", flat=True)[:BATCH_SIZE]
+        )
+        if not ids:
+            break
+        totals = (
+            TicketRating.objects.filter(ticket_id__in=ids)
+            .values("ticket_id")
+            .annotate(count=Count("id"), total=Sum("score"))
+            .order_by()
+        )
+        for row in totals:
+            Ticket.objects.filter(pk=row["ticket_id"]).update(
+                rating_count=row["count"],
+                rating_sum=row["total"],
+                rating_avg=row["total"] / row["count"],
+            )
+        last_id = ids[-1]
+
+
+def create_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS ticket_fulltext_idx ON complaints_ticket "
+        "USING gin (to_tsvector('simple', subject || ' ' || message))"
+    )
+
+
+def drop_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS ticket_fulltext_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaints', '0002_ticketrating_and_anonymous'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticket',
+            name='rating_avg',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='ticket',
+            name='email',
+            field=models.EmailField(blank=True, max_length=254),
+        ),
+        migrations.AlterField(
+            model_name='ticket',
+            name='name',
+            field=models.CharField(blank=True, max_length=120),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['-created_at'], name='ticket_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['rating_avg', 'created_at'], name='ticket_rating_idx'),
+        ),
+        migrations.RunPython(backfill_rating_aggregates, migrations.RunPython.noop),
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+    ]
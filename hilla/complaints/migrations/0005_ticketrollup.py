@@ -0,0 +1,35 @@
+# Generated by Django 6.0.1 on 2026-10-19 11:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaints', '0004_ticketevent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticketevent',
+            name='priority',
+            field=models.CharField(blank=True, max_length=20),
+        ),
+        migrations.CreateModel(
+            name='TicketRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.DateTimeField()),
+                ('metric', models.CharField(choices=[('created', 'Created'), ('status', 'Entered status')], max_length=20)),
+                ('priority', models.CharField(blank=True, max_length=20)),
+                ('status', models.CharField(blank=True, max_length=20)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('category', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='complaints.category')),
+            ],
+            options={
+                'ordering': ['bucket'],
+                'constraints': [models.UniqueConstraint(fields=('bucket', 'metric', 'category', 'priority', 'status'), name='rollup_bucket_key_uniq')],
+            },
+        ),
+    ]
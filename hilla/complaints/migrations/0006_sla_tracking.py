@@ -0,0 +1,40 @@
+# Generated by Django 6.0.1 on 2026-10-19 11:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaints', '0005_ticketrollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticket',
+            name='closed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='first_answered_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='SlaAggregate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('metric', models.CharField(choices=[('response', 'First response'), ('resolution', 'Resolution')], max_length=20)),
+                ('priority', models.CharField(blank=True, max_length=20)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('total_seconds', models.FloatField(default=0)),
+                ('histogram', models.JSONField(default=list)),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='complaints.category')),
+            ],
+            options={
+                'ordering': ['metric', 'category', 'priority'],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('category__isnull', False)), fields=('metric', 'category', 'priority'), name='sla_category_key_uniq'), models.UniqueConstraint(condition=models.Q(('category__isnull', True)), fields=('metric', 'priority'), name='sla_all_categories_key_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 6.0.1 on 2026-10-19 11:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaints', '0007_ticket_updated_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ticketcomment',
+            index=models.Index(fields=['ticket', 'id'], name='comment_ticket_page_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticketrating',
+            index=models.Index(fields=['ticket', '-id'], name='rating_ticket_page_idx'),
+        ),
+    ]
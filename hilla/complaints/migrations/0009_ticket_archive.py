@@ -0,0 +1,75 @@
+# Generated by Django 6.0.1 on 2026-10-19 11:50
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaints', '0008_detail_page_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedTicket',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('type', models.CharField(choices=[('question', 'Question'), ('complaint', 'Complaint')], max_length=20)),
+                ('priority', models.CharField(choices=[('low', 'Low'), ('medium', 'Medium'), ('high', 'High')], max_length=20)),
+                ('status', models.CharField(choices=[('open', 'Open'), ('in_progress', 'In progress'), ('closed', 'Closed')], max_length=20)),
+                ('name', models.CharField(blank=True, max_length=120)),
+                ('email', models.EmailField(blank=True, max_length=254)),
+                ('is_anonymous', models.BooleanField(default=False)),
+                ('subject', models.CharField(max_length=200)),
+                ('message', models.TextField()),
+                ('answer', models.TextField(blank=True)),
+                ('is_answered', models.BooleanField(default=False)),
+                ('first_answered_at', models.DateTimeField(blank=True, null=True)),
+                ('closed_at', models.DateTimeField(blank=True, null=True)),
+                ('rating_count', models.PositiveIntegerField(default=0)),
+                ('rating_sum', models.PositiveIntegerField(default=0)),
+                ('rating_avg', models.FloatField(blank=True, null=True)),
+                ('comments', models.JSONField(default=list)),
+                ('ratings', models.JSONField(default=list)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchiveTotal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimension', models.CharField(choices=[('all', 'All'), ('status', 'Status'), ('priority', 'Priority'), ('category', 'Category')], max_length=20)),
+                ('key', models.CharField(blank=True, max_length=80)),
+                ('tickets', models.PositiveIntegerField(default=0)),
+                ('rating_count', models.PositiveIntegerField(default=0)),
+                ('rating_sum', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['status', 'closed_at'], name='ticket_status_closed_idx'),
+        ),
+        migrations.AddField(
+            model_name='archivedticket',
+            name='category',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='archived_tickets', to='complaints.category'),
+        ),
+        migrations.AddField(
+            model_name='archivedticket',
+            name='user',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_tickets', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddConstraint(
+            model_name='archivetotal',
+            constraint=models.UniqueConstraint(fields=('dimension', 'key'), name='archive_total_key_uniq'),
+        ),
+    ]
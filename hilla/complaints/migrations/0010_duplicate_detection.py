@@ -0,0 +1,37 @@
+# Generated by Django 6.0.1 on 2026-10-19 11:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaints', '0009_ticket_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TicketFingerprint',
+            fields=[
+                ('ticket', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='fingerprint', serialize=False, to='complaints.ticket')),
+                ('signature', models.BinaryField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='duplicate_of',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='duplicates', to='complaints.ticket'),
+        ),
+        migrations.CreateModel(
+            name='TicketLshKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.BigIntegerField()),
+                ('ticket', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='complaints.ticket')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['key', 'ticket'], name='lsh_key_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 6.0.1 on 2026-10-19 11:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaints', '0010_duplicate_detection'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticket',
+            name='suggested_category',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='complaints.category'),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='suggested_priority',
+            field=models.CharField(blank=True, choices=[('low', 'Low'), ('medium', 'Medium'), ('high', 'High')], max_length=20),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-19 11:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaints', '0011_ticket_suggestions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticket',
+            name='summary',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 6.0.1 on 2026-10-19 12:04
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaints', '0012_ticket_summary'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Reporter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('email', models.EmailField(blank=True, max_length=254)),
+                ('name_key', models.CharField(blank=True, max_length=120)),
+                ('display_name', models.CharField(blank=True, max_length=120)),
+                ('ticket_count', models.PositiveIntegerField(default=0)),
+                ('rating_count', models.PositiveIntegerField(default=0)),
+                ('rating_sum', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reporter', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='archivedticket',
+            name='reporter',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_tickets', to='complaints.reporter'),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='reporter',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='tickets', to='complaints.reporter'),
+        ),
+        migrations.AddIndex(
+            model_name='reporter',
+            index=models.Index(fields=['-ticket_count', 'id'], name='reporter_leaderboard_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reporter',
+            index=models.Index(fields=['email'], name='reporter_email_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='reporter',
+            constraint=models.UniqueConstraint(condition=models.Q(('user__isnull', True), models.Q(('email', ''), _negated=True)), fields=('email',), name='reporter_email_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='reporter',
+            constraint=models.UniqueConstraint(condition=models.Q(('email', ''), ('user__isnull', True)), fields=('name_key',), name='reporter_name_uniq'),
+        ),
+    ]
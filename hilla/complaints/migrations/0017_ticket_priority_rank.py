@@ -0,0 +1,46 @@
+# Generated by Django 6.0.1 on 2026-10-19 12:15
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Max, Min
+
+BATCH_SIZE = 5000
+
+# новая колонка получает 2 (medium) по умолчанию, переписать нужно только low/high
+RANKS = {"low": 1, "high": 3}
+
+
+def backfill_priority_rank(apps, schema_editor):
+    Ticket = apps.get_model("complaints", "Ticket")
+    bounds = Ticket.objects.aggregate(first=Min("pk"), last=Max("pk"))
+    if bounds["first"] is None:
+        return
+    # миграция не атомарная: каждый диапазон pk коммитится сам и держит
+    # блокировки строк недолго
+    for start in range(bounds["first"], bounds["last"] + 1, BATCH_SIZE):
+        batch = Ticket.objects.filter(pk__gte=start, pk__lt=start + BATCH_SIZE)
+        for priority, rank in RANKS.items():
+            batch.filter(priority=priority).update(priority_rank=rank)
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('complaints', '0016_tickettombstone'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticket',
+            name='priority_rank',
+            field=models.PositiveSmallIntegerField(default=2, editable=False),
+        ),
+        migrations.RunPython(backfill_priority_rank, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['status', 'priority_rank', 'created_at'], name='ticket_triage_idx'),
+        ),
+    ]
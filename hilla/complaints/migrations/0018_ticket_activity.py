@@ -0,0 +1,70 @@
+# Generated by Django 6.0.1 on 2026-10-19 12:17
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+BATCH_SIZE = 2000
+
+
+def backfill_activity(apps, schema_editor):
+    # то же, что Ticket.recompute_activity, но на исторических моделях
+    Ticket = apps.get_model("complaints", "Ticket")
+    TicketComment = apps.get_model("complaints", "TicketComment")
+    TicketRating = apps.get_model("complaints", "TicketRating")
+    comments = (
+        TicketComment.objects.filter(ticket=OuterRef("pk"))
+        .order_by()
+        .values("ticket")
+        .annotate(count=Count("id"))
+        .values("count")
+    )
+    latest_comment = TicketComment.objects.filter(ticket=OuterRef("pk")).order_by("-id").values("created_at")[:1]
+    latest_rating = TicketRating.objects.filter(ticket=OuterRef("pk")).order_by("-id").values("created_at")[:1]
+    last_id = 0
+    while True:
+        ids = list(
+            Ticket.objects.filter(pk__gt=last_id).order_by("pk").values_list("pk", flat=True)[:BATCH_SIZE]
+        )
+        if not ids:
+            break
+        Ticket.objects.filter(pk__in=ids).update(
+            comment_count=Coalesce(Subquery(comments), 0),
+            last_activity_at=Greatest(
+                "created_at",
+                Coalesce(Subquery(latest_comment), "created_at"),
+                Coalesce(Subquery(latest_rating), "created_at"),
+            ),
+        )
+        last_id = ids[-1]
+
+
+class Migration(migrations.Migration):
+
+    # батчи коммитятся по отдельности, как в 0017
+    atomic = False
+
+    dependencies = [
+        ('complaints', '0017_ticket_priority_rank'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticket',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='last_activity_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.RunPython(backfill_activity, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['-last_activity_at', '-id'], name='ticket_activity_idx'),
+        ),
+    ]
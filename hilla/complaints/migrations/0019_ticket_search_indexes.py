@@ -0,0 +1,35 @@
+from django.db import migrations
+
+
+# TicketAdmin.get_search_results ищет имя по префиксу (name__istartswith ->
+# UPPER(name) LIKE 'X%') и почту точно (email__iexact -> UPPER(email) = 'X');
+# индексы повторяют эти выражения, иначе каждый поиск - полный проход таблицы.
+INDEXES = {
+    "ticket_name_upper_idx": "UPPER(name) text_pattern_ops",
+    "ticket_email_upper_idx": "UPPER(email)",
+}
+
+
+def create_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name, expression in INDEXES.items():
+        schema_editor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON complaints_ticket ({expression})")
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name in INDEXES:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaints', '0018_ticket_activity'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
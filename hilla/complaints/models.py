@@ -1,5 +1,8 @@
 from django.conf import settings
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import Case, Count, F, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Cast, Coalesce, Greatest
+from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils.text import slugify
 
@@ -31,6 +34,127 @@ class Category(models.Model):
         return self.name
 
 
+class Reporter(models.Model):
+    """
+    A person filing tickets, matched by account, then email, then name.
+    Keeps running totals so the dashboard leaderboard is a top-N read.
+    """
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="reporter",
+    )
+    email = models.EmailField(blank=True)
+    name_key = models.CharField(max_length=120, blank=True)
+    display_name = models.CharField(max_length=120, blank=True)
+    ticket_count = models.PositiveIntegerField(default=0)
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["-ticket_count", "id"], name="reporter_leaderboard_idx"),
+            models.Index(fields=["email"], name="reporter_email_idx"),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["email"],
+                condition=Q(user__isnull=True) & ~Q(email=""),
+                name="reporter_email_uniq",
+            ),
+            models.UniqueConstraint(
+                fields=["name_key"],
+                condition=Q(user__isnull=True, email=""),
+                name="reporter_name_uniq",
+            ),
+        ]
+
+    def __str__(self):
+        return self.display_name or self.email or f"Reporter #{self.pk}"
+
+    @property
+    def rating_avg(self):
+        return self.rating_sum / self.rating_count if self.rating_count else None
+
+    @staticmethod
+    def normalize_name(name):
+        return " ".join((name or "").split()).casefold()
+
+    @classmethod
+    def lookup_for(cls, ticket):
+        """
+        The (field, value) a ticket's reporter is matched on, or None for
+        anonymous tickets without any identity.
+        """
+        if ticket.is_anonymous:
+            return None
+        if ticket.user_id:
+            return ("user_id", ticket.user_id)
+        email = (ticket.email or "").strip().lower()
+        if email:
+            return ("email", email)
+        name_key = cls.normalize_name(ticket.name)
+        if name_key:
+            return ("name_key", name_key)
+        return None
+
+    @classmethod
+    def for_ticket(cls, ticket):
+        """
+        Find or create the reporter for an unsaved ticket.
+        """
+        lookup = cls.lookup_for(ticket)
+        if lookup is None:
+            return None
+        field, value = lookup
+        filters = {field: value}
+        if field == "name_key":
+            filters.update(user__isnull=True, email="")
+        reporter = cls.objects.filter(**filters).order_by("pk").first()
+        if reporter:
+            return reporter
+        reporter = cls(
+            display_name=" ".join((ticket.name or "").split())[:120],
+            email=(ticket.email or "").strip().lower() if field != "name_key" else "",
+            name_key=cls.normalize_name(ticket.name),
+        )
+        if field == "user_id":
+            reporter.user_id = value
+            reporter.display_name = reporter.display_name or ticket.user.get_full_name() or ticket.user.get_username()
+        try:
+            with transaction.atomic():
+                reporter.save()
+        except IntegrityError:
+            # параллельный запрос успел создать такого же репортёра
+            reporter = cls.objects.filter(**filters).order_by("pk").first()
+        return reporter
+
+    @classmethod
+    def recompute(cls, reporter_ids=None):
+        """
+        Rebuild running totals from hot and archived tickets.
+        """
+        reporters = cls.objects.all() if reporter_ids is None else cls.objects.filter(pk__in=reporter_ids)
+        totals = {}
+        for model in (Ticket, ArchivedTicket):
+            rows = (
+                model.objects.filter(reporter__in=reporters)
+                .values("reporter_id")
+                .annotate(tickets=Count("id"), count=Sum("rating_count"), total=Sum("rating_sum"))
+                .order_by()
+            )
+            for row in rows:
+                tickets, count, total = totals.get(row["reporter_id"], (0, 0, 0))
+                totals[row["reporter_id"]] = (tickets + row["tickets"], count + row["count"], total + row["total"])
+        batch = list(reporters.only("id"))
+        for reporter in batch:
+            reporter.ticket_count, reporter.rating_count, reporter.rating_sum = totals.get(reporter.pk, (0, 0, 0))
+        cls.objects.bulk_update(batch, ["ticket_count", "rating_count", "rating_sum"], batch_size=1000)
+
+
 class Ticket(models.Model):
     QUESTION = "question"
     COMPLAINT = "complaint"
@@ -56,6 +180,8 @@ class Ticket(models.Model):
         (MEDIUM, "Medium"),
         (HIGH, "High"),
     ]
+    # порядок для сортировки: строки сортируются по алфавиту
+    PRIORITY_RANKS = {LOW: 1, MEDIUM: 2, HIGH: 3}
 
     # связь с пользователем (может быть пусто, если не логинишься)
     user = models.ForeignKey(
@@ -74,27 +200,233 @@ class Ticket(models.Model):
 
     type = models.CharField(max_length=20, choices=TYPE_CHOICES, default=QUESTION)
     priority = models.CharField(max_length=20, choices=PRIORITY_CHOICES, default=MEDIUM)
+    # копия priority числом, ставится в save() и update_tickets
+    priority_rank = models.PositiveSmallIntegerField(default=PRIORITY_RANKS[MEDIUM], editable=False)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=OPEN)
 
     name = models.CharField(max_length=120, blank=True)
     email = models.EmailField(blank=True)
     is_anonymous = models.BooleanField(default=False)
+    reporter = models.ForeignKey(
+        Reporter,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="tickets",
+    )
     subject = models.CharField(max_length=200)
     message = models.TextField()
 
     # ответ админа
     answer = models.TextField(blank=True)
     is_answered = models.BooleanField(default=False)
+    first_answered_at = models.DateTimeField(null=True, blank=True)
+    closed_at = models.DateTimeField(null=True, blank=True)
+
+    # похожий открытый тикет, найденный при создании (см. complaints.similarity)
+    duplicate_of = models.ForeignKey(
+        "self",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="duplicates",
+    )
+
+    # подсказки локального классификатора (complaints.classifier)
+    suggested_category = models.ForeignKey(
+        Category,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+    suggested_priority = models.CharField(max_length=20, choices=PRIORITY_CHOICES, blank=True)
+
+    # краткое содержание для очереди модерации, заполняет summarize_tickets
+    summary = models.CharField(max_length=255, blank=True)
+
+    # агрегаты оценок, обновляются сигналами TicketRating
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_avg = models.FloatField(null=True, blank=True)
+
+    # активность: создание, комментарии, оценки; обновляется сигналами,
+    # чинится командой recompute_activity
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
+    last_activity_at = models.DateTimeField(default=timezone.now, editable=False)
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["-created_at"], name="ticket_created_idx"),
+            models.Index(fields=["rating_avg", "created_at"], name="ticket_rating_idx"),
+            models.Index(fields=["updated_at", "id"], name="ticket_updated_idx"),
+            models.Index(fields=["status", "closed_at"], name="ticket_status_closed_idx"),
+            models.Index(fields=["status", "priority_rank", "created_at"], name="ticket_triage_idx"),
+            models.Index(fields=["-last_activity_at", "-id"], name="ticket_activity_idx"),
+        ]
 
     def __str__(self):
         return f"#{self.id} {self.get_type_display()}: {self.subject}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # текст при загрузке: signals.index_ticket_text сравнивает с ним
+        instance._indexed_text = (instance.__dict__.get("subject"), instance.__dict__.get("message"))
+        return instance
+
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        if adding and self.reporter_id is None:
+            self.reporter = Reporter.for_ticket(self)
+        self.priority_rank = self.PRIORITY_RANKS.get(self.priority, self.priority_rank)
+        stamped = self.stamp_sla(timezone.now())
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            extra = set(stamped)
+            if "priority" in update_fields:
+                extra.add("priority_rank")
+            if extra:
+                kwargs["update_fields"] = set(update_fields) | extra
+        super().save(*args, **kwargs)
+        if adding and self.reporter_id:
+            Reporter.objects.filter(pk=self.reporter_id).update(ticket_count=F("ticket_count") + 1)
+        if stamped:
+            from .sla import observe
+
+            observe([(self, metric, seconds) for metric, seconds in stamped.values()])
+
+    def stamp_sla(self, now):
+        """
+        Set first_answered_at / closed_at the first time the ticket gets there.
+        Returns {field: (metric, seconds since creation)} for what was stamped.
+        """
+        stamped = {}
+        created = self.created_at or now
+        if self.is_answered and self.first_answered_at is None:
+            self.first_answered_at = now
+            stamped["first_answered_at"] = ("response", (now - created).total_seconds())
+        if self.status == self.CLOSED and self.closed_at is None:
+            self.closed_at = now
+            stamped["closed_at"] = ("resolution", (now - created).total_seconds())
+        return stamped
+
+    @classmethod
+    def release_reporters(cls, ticket_ids):
+        """
+        Take tickets that are about to be deleted out of their reporters'
+        running totals. Archiving keeps them counted and must not call this.
+        """
+        rows = (
+            cls.objects.filter(pk__in=list(ticket_ids), reporter__isnull=False)
+            .values("reporter_id")
+            .annotate(tickets=Count("id"), count=Sum("rating_count"), total=Sum("rating_sum"))
+            .order_by()
+        )
+        for row in rows:
+            Reporter.objects.filter(pk=row["reporter_id"]).update(
+                ticket_count=F("ticket_count") - row["tickets"],
+                rating_count=F("rating_count") - row["count"],
+                rating_sum=F("rating_sum") - row["total"],
+            )
+
+    @classmethod
+    def apply_rating(cls, ticket_id, score, delta=1, activity_at=None):
+        """
+        Add (delta=1) or remove (delta=-1) one rating from the stored aggregates
+        in a single UPDATE, without re-reading the ratings table.
+        """
+        count = F("rating_count") + delta
+        total = F("rating_sum") + delta * score
+        activity = {"last_activity_at": Greatest("last_activity_at", Value(activity_at))} if activity_at else {}
+        cls.objects.filter(pk=ticket_id).update(
+            rating_count=count,
+            rating_sum=total,
+            updated_at=timezone.now(),
+            rating_avg=Case(
+                When(rating_count__lte=-delta, then=Value(None)),
+                default=Cast(total, models.FloatField()) / count,
+                output_field=models.FloatField(),
+            ),
+            **activity,
+        )
+        Reporter.objects.filter(pk__in=cls.objects.filter(pk=ticket_id).values("reporter_id")).update(
+            rating_count=count,
+            rating_sum=total,
+        )
+
+    @classmethod
+    def apply_comment(cls, ticket_id, created_at):
+        cls.objects.filter(pk=ticket_id).update(
+            comment_count=F("comment_count") + 1,
+            last_activity_at=Greatest("last_activity_at", Value(created_at)),
+        )
+
+    @classmethod
+    def recompute_activity(cls, ticket_ids):
+        """
+        Rebuild comment_count and last_activity_at from the comments and
+        ratings tables in one UPDATE. Returns the number of tickets touched.
+        """
+        comments = (
+            TicketComment.objects.filter(ticket=OuterRef("pk"))
+            .order_by()
+            .values("ticket")
+            .annotate(count=Count("id"))
+            .values("count")
+        )
+        latest_comment = TicketComment.objects.filter(ticket=OuterRef("pk")).order_by("-id").values("created_at")[:1]
+        latest_rating = TicketRating.objects.filter(ticket=OuterRef("pk")).order_by("-id").values("created_at")[:1]
+        return cls.objects.filter(pk__in=list(ticket_ids)).update(
+            comment_count=Coalesce(Subquery(comments), 0),
+            last_activity_at=Greatest(
+                "created_at",
+                Coalesce(Subquery(latest_comment), "created_at"),
+                Coalesce(Subquery(latest_rating), "created_at"),
+            ),
+        )
+
+    @classmethod
+    def recompute_ratings(cls, ticket_ids):
+        """
+        Rebuild the stored rating aggregates for the given tickets from TicketRating.
+        """
+        ticket_ids = list(ticket_ids)
+        totals = {
+            row["ticket_id"]: row
+            for row in TicketRating.objects.filter(ticket_id__in=ticket_ids)
+            .values("ticket_id")
+            .annotate(count=Count("id"), total=Sum("score"))
+            .order_by()
+        }
+        tickets = list(cls.objects.filter(pk__in=ticket_ids).only("id", "reporter_id", "rating_count", "rating_sum"))
+        reporter_deltas = {}
+        now = timezone.now()
+        for ticket in tickets:
+            row = totals.get(ticket.id)
+            before = (ticket.rating_count, ticket.rating_sum)
+            ticket.rating_count = row["count"] if row else 0
+            ticket.rating_sum = row["total"] if row else 0
+            ticket.rating_avg = ticket.rating_sum / ticket.rating_count if row else None
+            ticket.updated_at = now
+            if ticket.reporter_id:
+                count, total = reporter_deltas.get(ticket.reporter_id, (0, 0))
+                reporter_deltas[ticket.reporter_id] = (
+                    count + ticket.rating_count - before[0],
+                    total + ticket.rating_sum - before[1],
+                )
+        cls.objects.bulk_update(tickets, ["rating_count", "rating_sum", "rating_avg", "updated_at"])
+        for reporter_id, (count, total) in reporter_deltas.items():
+            if count or total:
+                Reporter.objects.filter(pk=reporter_id).update(
+                    rating_count=F("rating_count") + count,
+                    rating_sum=F("rating_sum") + total,
+                )
+
 
 class TicketComment(models.Model):
     ticket = models.ForeignKey(Ticket, on_delete=models.CASCADE, related_name="comments")
@@ -104,10 +436,18 @@ class TicketComment(models.Model):
 
     class Meta:
         ordering = ["created_at"]
+        indexes = [
+            models.Index(fields=["ticket", "id"], name="comment_ticket_page_idx"),
+        ]
 
     def __str__(self):
         return f"Comment #{self.id} for Ticket #{self.ticket_id}"
 
+    def save(self, *args, **kwargs):
+        # счётчики тикета (signals) пишутся в той же транзакции, что и комментарий
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
 
 class TicketRating(models.Model):
     ticket = models.ForeignKey(Ticket, on_delete=models.CASCADE, related_name="ratings")
@@ -120,6 +460,425 @@ class TicketRating(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["ticket", "-id"], name="rating_ticket_page_idx"),
+        ]
 
     def __str__(self):
         return f"Rating {self.score} for Ticket #{self.ticket_id}"
+
+    def save(self, *args, **kwargs):
+        # агрегаты тикета и событие (signals) пишутся вместе с оценкой
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+
+class TicketEvent(models.Model):
+    """
+    Append-only history of ticket changes. Rows are never updated; old rows are
+    removed by the compact_events command.
+    """
+    CREATED = "created"
+    STATUS = "status"
+    PRIORITY = "priority"
+    ANSWERED = "answered"
+    ANSWER = "answer"
+    RATED = "rated"
+    KIND_CHOICES = [
+        (CREATED, "Created"),
+        (STATUS, "Status changed"),
+        (PRIORITY, "Priority changed"),
+        (ANSWERED, "Answered flag changed"),
+        (ANSWER, "Answer updated"),
+        (RATED, "Rated"),
+    ]
+
+    # без FK-ограничения: история переживает удаление и архивацию тикета
+    ticket = models.ForeignKey(
+        Ticket,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        db_index=False,
+        related_name="events",
+    )
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        db_index=False,
+        related_name="+",
+    )
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    priority = models.CharField(max_length=20, blank=True)
+    old_value = models.CharField(max_length=40, blank=True)
+    new_value = models.CharField(max_length=40, blank=True)
+    actor = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ["created_at"]
+        indexes = [
+            models.Index(fields=["created_at"], name="event_created_idx"),
+            models.Index(fields=["kind", "created_at"], name="event_kind_created_idx"),
+            models.Index(fields=["ticket", "created_at"], name="event_ticket_created_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} for Ticket #{self.ticket_id}"
+
+
+class TicketRollup(models.Model):
+    """
+    Hourly counters for the analytics API, incremented as events are recorded.
+    Day and week series are summed from the hourly rows.
+    """
+    CREATED = "created"
+    STATUS = "status"
+    METRIC_CHOICES = [
+        (CREATED, "Created"),
+        (STATUS, "Entered status"),
+    ]
+
+    bucket = models.DateTimeField()
+    metric = models.CharField(max_length=20, choices=METRIC_CHOICES)
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.CASCADE,
+        db_constraint=False,
+        related_name="+",
+    )
+    priority = models.CharField(max_length=20, blank=True)
+    # для metric=status - в какой статус перешли, для created пусто
+    status = models.CharField(max_length=20, blank=True)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["bucket"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["bucket", "metric", "category", "priority", "status"],
+                name="rollup_bucket_key_uniq",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.metric} {self.bucket:%Y-%m-%d %H}:00 = {self.count}"
+
+
+class SlaAggregate(models.Model):
+    """
+    Running response/resolution time aggregates per category and priority.
+    Empty category or priority means "all", so each observation updates
+    four rows: (category, priority), (category, all), (all, priority), (all, all).
+
+    `histogram` is a fixed log-scale sketch (see complaints.sla) so percentiles
+    are read without touching tickets.
+    """
+    RESPONSE = "response"
+    RESOLUTION = "resolution"
+    METRIC_CHOICES = [
+        (RESPONSE, "First response"),
+        (RESOLUTION, "Resolution"),
+    ]
+
+    metric = models.CharField(max_length=20, choices=METRIC_CHOICES)
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+    priority = models.CharField(max_length=20, blank=True)
+    count = models.PositiveIntegerField(default=0)
+    total_seconds = models.FloatField(default=0)
+    histogram = models.JSONField(default=list)
+
+    class Meta:
+        ordering = ["metric", "category", "priority"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["metric", "category", "priority"],
+                condition=models.Q(category__isnull=False),
+                name="sla_category_key_uniq",
+            ),
+            models.UniqueConstraint(
+                fields=["metric", "priority"],
+                condition=models.Q(category__isnull=True),
+                name="sla_all_categories_key_uniq",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.metric} {self.category_id or 'all'}/{self.priority or 'all'}: {self.count}"
+
+
+class ArchivedTicket(models.Model):
+    """
+    Closed ticket moved out of the hot table by the archive_tickets command.
+    Keeps the original id; comments and ratings are stored inline as JSON
+    because archived tickets are read-only.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="archived_tickets",
+    )
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.PROTECT,
+        related_name="archived_tickets",
+    )
+
+    type = models.CharField(max_length=20, choices=Ticket.TYPE_CHOICES)
+    priority = models.CharField(max_length=20, choices=Ticket.PRIORITY_CHOICES)
+    status = models.CharField(max_length=20, choices=Ticket.STATUS_CHOICES)
+
+    name = models.CharField(max_length=120, blank=True)
+    email = models.EmailField(blank=True)
+    is_anonymous = models.BooleanField(default=False)
+    reporter = models.ForeignKey(
+        Reporter,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="archived_tickets",
+    )
+    subject = models.CharField(max_length=200)
+    message = models.TextField()
+    answer = models.TextField(blank=True)
+    is_answered = models.BooleanField(default=False)
+    first_answered_at = models.DateTimeField(null=True, blank=True)
+    closed_at = models.DateTimeField(null=True, blank=True)
+
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_avg = models.FloatField(null=True, blank=True)
+    comments = models.JSONField(default=list)
+    ratings = models.JSONField(default=list)
+
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"#{self.id} (archived) {self.subject}"
+
+
+class ArchiveTotal(models.Model):
+    """
+    Snapshot of archived ticket totals for the dashboard, updated by each
+    archive batch so the dashboard never scans the archive table.
+    """
+    ALL = "all"
+    STATUS = "status"
+    PRIORITY = "priority"
+    CATEGORY = "category"
+    DIMENSION_CHOICES = [
+        (ALL, "All"),
+        (STATUS, "Status"),
+        (PRIORITY, "Priority"),
+        (CATEGORY, "Category"),
+    ]
+
+    dimension = models.CharField(max_length=20, choices=DIMENSION_CHOICES)
+    key = models.CharField(max_length=80, blank=True)
+    tickets = models.PositiveIntegerField(default=0)
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["dimension", "key"], name="archive_total_key_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.dimension}={self.key or '*'}: {self.tickets}"
+
+
+class TicketFingerprint(models.Model):
+    """
+    Packed MinHash signature of a ticket's subject and message.
+    """
+    ticket = models.OneToOneField(
+        Ticket,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="fingerprint",
+    )
+    signature = models.BinaryField()
+
+    def __str__(self):
+        return f"Fingerprint for Ticket #{self.ticket_id}"
+
+
+class TicketLshKey(models.Model):
+    """
+    One LSH band key per row; tickets sharing a key are duplicate candidates.
+    """
+    ticket = models.ForeignKey(Ticket, on_delete=models.CASCADE, related_name="+")
+    key = models.BigIntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["key", "ticket"], name="lsh_key_idx"),
+        ]
+
+    def __str__(self):
+        return f"LSH key {self.key} for Ticket #{self.ticket_id}"
+
+
+class OutboxMessage(models.Model):
+    """
+    Email notification written in the same transaction as the ticket change
+    and sent later by the send_notifications command. While a message is
+    pending, another one with the same dedupe_key is not enqueued.
+    """
+    PENDING = "pending"
+    SENT = "sent"
+    FAILED = "failed"
+    STATE_CHOICES = [
+        (PENDING, "Pending"),
+        (SENT, "Sent"),
+        (FAILED, "Failed"),
+    ]
+
+    ticket = models.ForeignKey(
+        Ticket,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        db_index=False,
+        related_name="+",
+    )
+    kind = models.CharField(max_length=20)
+    dedupe_key = models.CharField(max_length=120)
+    recipient = models.EmailField()
+    subject = models.CharField(max_length=200)
+    body = models.TextField()
+    state = models.CharField(max_length=10, choices=STATE_CHOICES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    available_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(default=timezone.now)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["available_at", "id"],
+                condition=Q(state="pending"),
+                name="outbox_pending_idx",
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["dedupe_key"],
+                condition=Q(state="pending"),
+                name="outbox_pending_dedupe_uniq",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} for Ticket #{self.ticket_id} to {self.recipient} ({self.state})"
+
+
+class WebhookEndpoint(models.Model):
+    """
+    External URL subscribed to ticket events. Payloads are signed with
+    ``secret`` (see complaints.webhooks.sign).
+    """
+    url = models.URLField(max_length=500)
+    secret = models.CharField(max_length=128)
+    # пустой список — все виды событий
+    event_kinds = models.JSONField(default=list, blank=True)
+    is_active = models.BooleanField(default=True)
+    max_concurrency = models.PositiveSmallIntegerField(default=4)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.url
+
+    def wants(self, kind):
+        return not self.event_kinds or kind in self.event_kinds
+
+
+class WebhookDelivery(models.Model):
+    """
+    One event waiting to be posted to one endpoint; rows are deleted once
+    delivered or moved to WebhookDeadLetter after the last retry.
+    """
+    endpoint = models.ForeignKey(WebhookEndpoint, on_delete=models.CASCADE, related_name="deliveries")
+    payload = models.JSONField()
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    available_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["available_at", "id"], name="webhook_due_idx"),
+        ]
+
+    def __str__(self):
+        return f"Delivery #{self.pk} to {self.endpoint_id}"
+
+
+class WebhookDeadLetter(models.Model):
+    """
+    Event that could not be delivered after all retries, kept for inspection
+    and manual replay.
+    """
+    endpoint = models.ForeignKey(WebhookEndpoint, on_delete=models.CASCADE, related_name="dead_letters")
+    payload = models.JSONField()
+    attempts = models.PositiveSmallIntegerField()
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField()
+    failed_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Dead letter #{self.pk} for {self.endpoint_id}"
+
+
+class TicketTombstone(models.Model):
+    """
+    Ticket that left the hot table, kept so sync clients can drop their copy.
+    """
+    DELETED = "deleted"
+    ARCHIVED = "archived"
+    REASON_CHOICES = [
+        (DELETED, "Deleted"),
+        (ARCHIVED, "Archived"),
+    ]
+
+    # без внешнего ключа: строки тикета уже нет
+    ticket_id = models.BigIntegerField()
+    reason = models.CharField(max_length=10, choices=REASON_CHOICES, default=DELETED)
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["deleted_at", "id"], name="tombstone_sync_idx"),
+        ]
+
+    def __str__(self):
+        return f"Tombstone for Ticket #{self.ticket_id} ({self.reason})"
+
+    @classmethod
+    def record(cls, ticket_ids, reason=DELETED):
+        now = timezone.now()
+        return cls.objects.bulk_create(
+            [cls(ticket_id=pk, reason=reason, deleted_at=now) for pk in ticket_ids],
+            batch_size=1000,
+        )
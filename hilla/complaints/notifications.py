@@ -0,0 +1,187 @@
+"""
+Transactional outbox for ticket notification emails.
+
+events.record() calls enqueue() inside the transaction that changed the
+ticket, so a notification exists exactly when the change was committed.
+dispatch() drains pending rows in batches over one SMTP connection, retrying
+failures with exponential backoff. Rows are leased while being sent instead of
+locked, so no transaction stays open while talking to the mail server.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import F
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import OutboxMessage, Ticket, TicketEvent
+
+
+MAX_ATTEMPTS = 5
+RETRY_BASE_SECONDS = 60
+RETRY_MAX_SECONDS = 3600
+# Claimed rows are hidden from other workers this long; a worker that dies
+# mid-batch leaves them to be retried once the lease runs out.
+CLAIM_SECONDS = 600
+
+
+def _recipient(ticket):
+    if ticket.is_anonymous:
+        return ""
+    return ticket.email or (ticket.user.email if ticket.user_id else "")
+
+
+def _link(ticket):
+    base = getattr(settings, "SITE_URL", "")
+    return f"{base}{reverse('ticket_detail', args=[ticket.pk])}" if base else ""
+
+
+def _message(ticket, event):
+    if event.kind == TicketEvent.STATUS:
+        status = dict(Ticket.STATUS_CHOICES).get(event.new_value, event.new_value)
+        return (
+            "status",
+            f"status:{ticket.pk}:{event.new_value}",
+            f"Ticket #{ticket.pk}: status changed to {status}",
+            f"The status of your ticket \"{ticket.subject}\" is now {status}.",
+        )
+    if (event.kind, event.new_value) in {(TicketEvent.ANSWERED, "true"), (TicketEvent.ANSWER, "set")}:
+        # флаг и текст ответа обычно меняются вместе — одно письмо на оба события
+        return (
+            "answer",
+            f"answer:{ticket.pk}",
+            f"Ticket #{ticket.pk} has been answered",
+            f"Your ticket \"{ticket.subject}\" has an answer:\n\n{ticket.answer}",
+        )
+    return None
+
+
+def enqueue(events):
+    """
+    Add outbox rows for status changes and answers among `events`.
+    """
+    events = [e for e in events if e.kind in (TicketEvent.STATUS, TicketEvent.ANSWERED, TicketEvent.ANSWER)]
+    if not events:
+        return []
+    tickets = Ticket.objects.select_related("user").in_bulk({e.ticket_id for e in events})
+    messages = {}
+    for event in events:
+        ticket = tickets.get(event.ticket_id)
+        recipient = _recipient(ticket) if ticket else ""
+        built = _message(ticket, event) if recipient else None
+        if built is None:
+            continue
+        kind, dedupe_key, subject, body = built
+        link = _link(ticket)
+        messages[dedupe_key] = OutboxMessage(
+            ticket_id=ticket.pk,
+            kind=kind,
+            dedupe_key=dedupe_key,
+            recipient=recipient,
+            subject=subject,
+            body=f"{body}\n\n{link}" if link else body,
+        )
+    # уже ожидающее отправки письмо с тем же ключом не дублируется
+    return OutboxMessage.objects.bulk_create(messages.values(), ignore_conflicts=True)
+
+
+def retry_delay(attempts):
+    return timedelta(seconds=min(RETRY_BASE_SECONDS * 2 ** (attempts - 1), RETRY_MAX_SECONDS))
+
+
+def dispatch(batch_size=100, connection=None):
+    """
+    Send pending messages until none are due. Returns (sent, failed) counts
+    for this run, where failed counts attempts that errored.
+
+    Each batch is claimed in a short transaction, sent with no transaction
+    or row lock held, and every message is settled right after its send, so
+    a crash re-sends at most the message that was in flight.
+    """
+    connection = connection or get_connection(fail_silently=False)
+    sent = failed = 0
+    opened = False
+    try:
+        while True:
+            batch = _claim(batch_size)
+            if not batch:
+                break
+            if not opened:
+                # одно SMTP-соединение на весь прогон, и только если есть что слать
+                try:
+                    connection.open()
+                except Exception as exc:
+                    # сервер недоступен: вся пачка уходит на повтор с backoff
+                    now = timezone.now()
+                    for message in batch:
+                        _fail(message, exc, now)
+                        _settle(message)
+                    failed += len(batch)
+                    break
+                opened = True
+            for message in batch:
+                _send(connection, message)
+                _settle(message)
+                if message.state == OutboxMessage.SENT:
+                    sent += 1
+                else:
+                    failed += 1
+    finally:
+        if opened:
+            connection.close()
+    return sent, failed
+
+
+def _claim(batch_size):
+    """
+    Lock due rows, count the attempt and lease them for CLAIM_SECONDS so
+    other workers skip them, then commit before anything is sent.
+    """
+    with transaction.atomic():
+        now = timezone.now()
+        batch = list(
+            OutboxMessage.objects.select_for_update(skip_locked=True)
+            .filter(state=OutboxMessage.PENDING, available_at__lte=now)
+            .order_by("available_at", "id")[:batch_size]
+        )
+        if batch:
+            OutboxMessage.objects.filter(pk__in=[m.pk for m in batch]).update(
+                attempts=F("attempts") + 1,
+                available_at=now + timedelta(seconds=CLAIM_SECONDS),
+            )
+        for message in batch:
+            message.attempts += 1
+    return batch
+
+
+def _settle(message):
+    OutboxMessage.objects.filter(pk=message.pk).update(
+        state=message.state,
+        last_error=message.last_error,
+        available_at=message.available_at,
+        sent_at=message.sent_at,
+    )
+
+
+def _send(connection, message):
+    now = timezone.now()
+    try:
+        connection.send_messages(
+            [EmailMessage(message.subject, message.body, settings.DEFAULT_FROM_EMAIL, [message.recipient])]
+        )
+    except Exception as exc:
+        _fail(message, exc, now)
+        return
+    message.state = OutboxMessage.SENT
+    message.sent_at = now
+    message.last_error = ""
+
+
+def _fail(message, exc, now):
+    message.last_error = str(exc)[:1000]
+    if message.attempts >= MAX_ATTEMPTS:
+        message.state = OutboxMessage.FAILED
+    else:
+        message.available_at = now + retry_delay(message.attempts)
@@ -0,0 +1,47 @@
+"""
+API renderers picked by content negotiation (Accept header or ?format=).
+
+JSON is encoded with orjson when it is installed and with DRF's encoder
+otherwise; both write datetimes as ISO 8601 with a "Z" suffix. MessagePack
+(application/msgpack) is offered only when the msgpack package is present.
+"""
+from rest_framework.renderers import BaseRenderer, BrowsableAPIRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except Exception:
+    orjson = None
+
+try:
+    import msgpack
+except Exception:
+    msgpack = None
+
+
+# Decimal, lazy строки, даты для msgpack и т.п. — как у DRF
+_default = JSONEncoder().default
+
+
+class ORJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        return orjson.dumps(data, default=_default, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS)
+
+
+class MsgPackRenderer(BaseRenderer):
+    media_type = "application/msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return msgpack.packb(data, default=_default, datetime=False)
+
+
+API_RENDERERS = [ORJSONRenderer, BrowsableAPIRenderer]
+if msgpack is not None:
+    API_RENDERERS.append(MsgPackRenderer)
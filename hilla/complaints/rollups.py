@@ -0,0 +1,91 @@
+from collections import Counter
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.db.models.functions import TruncDay, TruncHour, TruncWeek
+
+from .models import TicketEvent, TicketRollup
+
+
+RESOLUTIONS = {
+    "hour": TruncHour,
+    "day": TruncDay,
+    "week": TruncWeek,
+}
+GROUP_FIELDS = {
+    "category": "category__name",
+    "priority": "priority",
+    "status": "status",
+}
+# Longest range one request may ask for, per resolution.
+MAX_RANGE = {
+    "hour": timedelta(days=31),
+    "day": timedelta(days=366),
+    "week": timedelta(days=366 * 5),
+}
+
+
+def hour_bucket(moment):
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def event_key(event):
+    if event.kind == TicketEvent.CREATED:
+        return (hour_bucket(event.created_at), TicketRollup.CREATED, event.category_id, event.priority, "")
+    if event.kind == TicketEvent.STATUS:
+        return (hour_bucket(event.created_at), TicketRollup.STATUS, event.category_id, event.priority, event.new_value)
+    return None
+
+
+def apply(events):
+    """
+    Increment hourly counters for creation and status events.
+    """
+    counts = Counter(key for key in map(event_key, events) if key is not None)
+    for key, amount in counts.items():
+        increment(key, amount)
+
+
+def increment(key, amount):
+    bucket, metric, category_id, priority, status = key
+    lookup = {
+        "bucket": bucket,
+        "metric": metric,
+        "category_id": category_id,
+        "priority": priority,
+        "status": status,
+    }
+    if TicketRollup.objects.filter(**lookup).update(count=F("count") + amount):
+        return
+    try:
+        with transaction.atomic():
+            TicketRollup.objects.create(count=amount, **lookup)
+    except IntegrityError:
+        # строку успел создать параллельный запрос
+        TicketRollup.objects.filter(**lookup).update(count=F("count") + amount)
+
+
+def series(metric, start, end, resolution="hour", group_by=None):
+    """
+    Summed counters between start (inclusive) and end (exclusive).
+    Reads only the rollup table.
+    """
+    rows = TicketRollup.objects.filter(metric=metric, bucket__gte=start, bucket__lt=end)
+    fields = ["period"]
+    if group_by:
+        fields.append(GROUP_FIELDS[group_by])
+    rows = (
+        rows.annotate(period=RESOLUTIONS[resolution]("bucket"))
+        .values(*fields)
+        .annotate(total=Sum("count"))
+        .order_by("period")
+    )
+    return [
+        {
+            "bucket": row["period"].isoformat(),
+            "key": row[GROUP_FIELDS[group_by]] if group_by else None,
+            "count": row["total"],
+        }
+        for row in rows
+    ]
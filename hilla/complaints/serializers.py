@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Ticket
+from .models import ArchivedTicket, Ticket
 
 
 class TicketSerializer(serializers.ModelSerializer):
@@ -21,14 +21,78 @@ class TicketSerializer(serializers.ModelSerializer):
             "message",
             "answer",
             "is_answered",
+            "first_answered_at",
+            "closed_at",
+            "duplicate_of",
+            "suggested_category",
+            "suggested_priority",
+            "summary",
             "average_rating",
             "created_at",
             "updated_at",
         ]
-        read_only_fields = ["id", "created_at", "updated_at"]
+        read_only_fields = [
+            "id",
+            "first_answered_at",
+            "closed_at",
+            "duplicate_of",
+            "suggested_category",
+            "suggested_priority",
+            "summary",
+            "created_at",
+            "updated_at",
+        ]
 
     def get_average_rating(self, obj):
-        ratings = obj.ratings.all()
-        if not ratings:
+        if obj.rating_avg is None:
             return None
-        return round(sum(r.score for r in ratings) / ratings.count(), 2)
+        return round(obj.rating_avg, 2)
+
+
+# поле ответа -> колонка для values_list
+ROW_LOOKUPS = {
+    "user": "user_id",
+    "category": "category_id",
+    "duplicate_of": "duplicate_of_id",
+    "suggested_category": "suggested_category_id",
+    "average_rating": "rating_avg",
+}
+
+
+def ticket_rows(queryset):
+    """
+    Read-only fast path for TicketSerializer: the same fields, built from
+    values_list() tuples instead of model instances and serializer fields.
+    Datetimes are left to the renderer.
+    """
+    names = TicketSerializer.Meta.fields
+    rating = names.index("average_rating")
+    rows = []
+    for values in queryset.values_list(*[ROW_LOOKUPS.get(name, name) for name in names]):
+        row = dict(zip(names, values))
+        if values[rating] is not None:
+            row["average_rating"] = round(values[rating], 2)
+        rows.append(row)
+    return rows
+
+
+# поля живого тикета, которых нет в архиве
+LIVE_ONLY_FIELDS = {"duplicate_of", "suggested_category", "suggested_priority", "summary"}
+
+
+class ArchivedTicketSerializer(serializers.ModelSerializer):
+    average_rating = serializers.SerializerMethodField()
+    archived = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ArchivedTicket
+        fields = [f for f in TicketSerializer.Meta.fields if f not in LIVE_ONLY_FIELDS] + ["archived", "archived_at"]
+        read_only_fields = fields
+
+    def get_average_rating(self, obj):
+        if obj.rating_avg is None:
+            return None
+        return round(obj.rating_avg, 2)
+
+    def get_archived(self, obj):
+        return True
@@ -0,0 +1,92 @@
+from django.contrib.admin.models import CHANGE, LogEntry
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from . import events, sla
+from .live import notify_ticket_change
+from .models import Ticket
+
+
+STATUS_VALUES = {Ticket.OPEN, Ticket.IN_PROGRESS, Ticket.CLOSED}
+PRIORITY_VALUES = {Ticket.LOW, Ticket.MEDIUM, Ticket.HIGH}
+
+# Upper bound for one batch request from the moderation queue.
+MAX_BATCH_SIZE = 500
+
+
+def clean_changes(fields):
+    """
+    Validate a {field: value} mapping sent to the bulk API. Raises ValueError.
+    """
+    if not isinstance(fields, dict) or not fields:
+        raise ValueError("fields must be a non-empty object")
+    changes = {}
+    for field, value in fields.items():
+        if field == "status":
+            if value not in STATUS_VALUES:
+                raise ValueError("Invalid status")
+        elif field == "priority":
+            if value not in PRIORITY_VALUES:
+                raise ValueError("Invalid priority")
+        elif field == "is_answered":
+            if not isinstance(value, bool):
+                raise ValueError("is_answered must be true or false")
+        elif field == "answer":
+            if not isinstance(value, str):
+                raise ValueError("answer must be a string")
+            value = value.strip()
+        else:
+            raise ValueError(f"{field} cannot be changed in bulk")
+        changes[field] = value
+    return changes
+
+
+def update_tickets(ticket_ids, changes, user=None, expected=None):
+    """
+    Apply the same field changes to many tickets in one transaction.
+
+    Unlike a bare queryset.update() this bumps updated_at and writes an admin
+    LogEntry and TicketEvent rows per ticket. With `expected` ({pk: updated_at})
+    tickets modified since the caller read them are left untouched. Returns
+    the updated tickets.
+    """
+    ticket_ids = list(ticket_ids)
+    with transaction.atomic():
+        tickets = list(Ticket.objects.select_for_update().filter(pk__in=ticket_ids).order_by("pk"))
+        if expected is not None:
+            # проверка под блокировкой строк: оптимистичная конкуренция
+            tickets = [t for t in tickets if expected.get(t.pk) in (None, t.updated_at)]
+        if not tickets:
+            return []
+        now = timezone.now()
+        new_events = []
+        observations = []
+        stamped_fields = set()
+        ranks = {"priority_rank": Ticket.PRIORITY_RANKS[changes["priority"]]} if "priority" in changes else {}
+        for ticket in tickets:
+            before = events.snapshot(ticket)
+            for field, value in {**changes, **ranks}.items():
+                setattr(ticket, field, value)
+            ticket.updated_at = now
+            for field, (metric, seconds) in ticket.stamp_sla(now).items():
+                stamped_fields.add(field)
+                observations.append((ticket, metric, seconds))
+            new_events.extend(events.change_events(ticket, before, user))
+
+        # first_answered_at/closed_at ставятся только там, где ещё пусто
+        stamps = {field: Coalesce(F(field), Value(now)) for field in stamped_fields}
+        Ticket.objects.filter(pk__in=[t.pk for t in tickets]).update(updated_at=now, **changes, **ranks, **stamps)
+        events.record(new_events)
+        notify_ticket_change([t.pk for t in tickets])
+        if observations:
+            sla.observe(observations)
+        if user is not None and user.is_authenticated:
+            LogEntry.objects.log_actions(
+                user_id=user.pk,
+                queryset=tickets,
+                action_flag=CHANGE,
+                change_message=[{"changed": {"fields": sorted(changes)}}],
+            )
+    return tickets
@@ -0,0 +1,55 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import events, similarity
+from .live import notify_ticket_change
+from .models import Ticket, TicketComment, TicketRating
+
+
+@receiver(post_save, sender=Ticket)
+def notify_live_queue(sender, instance, **kwargs):
+    notify_ticket_change([instance.pk])
+
+
+@receiver(post_save, sender=Ticket)
+def index_ticket_text(sender, instance, created, update_fields=None, **kwargs):
+    # частичные сохранения (статус и т.п.) текст не меняют
+    if not created and update_fields is not None and not {"subject", "message"} & set(update_fields):
+        return
+    text = (instance.subject, instance.message)
+    if created or text != getattr(instance, "_indexed_text", None):
+        similarity.index_ticket(instance)
+        instance._indexed_text = text
+
+
+@receiver(post_save, sender=TicketRating)
+def add_rating_to_ticket(sender, instance, created, **kwargs):
+    if created:
+        Ticket.apply_rating(instance.ticket_id, instance.score, activity_at=instance.created_at)
+        events.record([events.rating_event(instance)])
+    else:
+        # редактирование оценки в админке - пересчитываем целиком
+        Ticket.recompute_ratings([instance.ticket_id])
+
+
+@receiver(post_delete, sender=TicketRating)
+def remove_rating_from_ticket(sender, instance, origin=None, **kwargs):
+    if isinstance(origin, Ticket) or getattr(origin, "model", None) is Ticket:
+        # тикет удаляется (или архивируется) вместе с оценками
+        return
+    Ticket.apply_rating(instance.ticket_id, instance.score, delta=-1)
+    Ticket.recompute_activity([instance.ticket_id])
+
+
+@receiver(post_save, sender=TicketComment)
+def add_comment_to_ticket(sender, instance, created, **kwargs):
+    if created:
+        Ticket.apply_comment(instance.ticket_id, instance.created_at)
+
+
+@receiver(post_delete, sender=TicketComment)
+def remove_comment_from_ticket(sender, instance, origin=None, **kwargs):
+    if isinstance(origin, Ticket) or getattr(origin, "model", None) is Ticket:
+        return
+    # последнюю активность после удаления не вычислить по дельте
+    Ticket.recompute_activity([instance.ticket_id])
@@ -0,0 +1,67 @@
+"""
+Near-duplicate index over ticket subject + message, built on the MinHash
+signatures and LSH keys from complaints.minhash.
+"""
+from django.db import transaction
+from django.db.models import Count
+
+from .minhash import THRESHOLD, estimate, lsh_keys, pack, signature, unpack
+from .models import Ticket, TicketFingerprint, TicketLshKey
+
+
+MAX_CANDIDATES = 20
+
+OPEN_STATUSES = [Ticket.OPEN, Ticket.IN_PROGRESS]
+
+
+def index_signatures(rows):
+    """
+    Store fingerprints for [(ticket_id, signature)], replacing older ones.
+    """
+    rows = list(rows)
+    ids = [ticket_id for ticket_id, _ in rows]
+    with transaction.atomic():
+        TicketLshKey.objects.filter(ticket_id__in=ids).delete()
+        TicketFingerprint.objects.filter(ticket_id__in=ids).delete()
+        TicketFingerprint.objects.bulk_create(
+            [TicketFingerprint(ticket_id=ticket_id, signature=pack(sig)) for ticket_id, sig in rows]
+        )
+        TicketLshKey.objects.bulk_create(
+            [TicketLshKey(ticket_id=ticket_id, key=key) for ticket_id, sig in rows for key in lsh_keys(sig)],
+            batch_size=1000,
+        )
+
+
+def index_ticket(ticket):
+    index_signatures([(ticket.pk, signature(ticket.subject, ticket.message))])
+
+
+def find_similar(subject, message, exclude=None, open_only=True):
+    """
+    [(ticket, similarity)] for indexed tickets that look like this text,
+    best match first.
+    """
+    sig = signature(subject, message)
+    candidates = TicketLshKey.objects.filter(key__in=lsh_keys(sig))
+    if open_only:
+        candidates = candidates.filter(ticket__status__in=OPEN_STATUSES)
+    if exclude:
+        candidates = candidates.exclude(ticket_id=exclude)
+    ids = list(
+        candidates.values("ticket_id")
+        .annotate(hits=Count("id"))
+        .order_by("-hits", "ticket_id")
+        .values_list("ticket_id", flat=True)[:MAX_CANDIDATES]
+    )
+    if not ids:
+        return []
+    scored = []
+    for ticket_id, data in TicketFingerprint.objects.filter(ticket_id__in=ids).values_list("ticket_id", "signature"):
+        score = estimate(sig, unpack(data))
+        if score >= THRESHOLD:
+            scored.append((ticket_id, score))
+    tickets = Ticket.objects.in_bulk([ticket_id for ticket_id, _ in scored])
+    return sorted(
+        ((tickets[ticket_id], score) for ticket_id, score in scored if ticket_id in tickets),
+        key=lambda item: (-item[1], item[0].pk),
+    )
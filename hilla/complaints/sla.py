@@ -0,0 +1,144 @@
+import math
+from collections import defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .models import SlaAggregate
+
+
+# Log-scale histogram: bucket 0 is under a minute, bucket i covers
+# [60 * GROWTH**(i-1), 60 * GROWTH**i) seconds. 64 buckets reach past a year,
+# and a percentile read from them is within ~12% of the true value.
+BUCKETS = 64
+GROWTH = 1.25
+BASE_SECONDS = 60.0
+
+
+def bucket_for(seconds):
+    if seconds < BASE_SECONDS:
+        return 0
+    return min(BUCKETS - 1, int(math.log(seconds / BASE_SECONDS, GROWTH)) + 1)
+
+
+def bucket_value(index):
+    """
+    Representative value of a bucket (geometric middle).
+    """
+    if index == 0:
+        return BASE_SECONDS / 2
+    return BASE_SECONDS * GROWTH ** (index - 0.5)
+
+
+def percentile(histogram, q):
+    total = sum(histogram)
+    if not total:
+        return None
+    rank = q * total
+    seen = 0
+    for index, count in enumerate(histogram):
+        seen += count
+        if seen >= rank:
+            return bucket_value(index)
+    return bucket_value(len(histogram) - 1)
+
+
+def _keys(ticket, metric):
+    return [
+        (metric, ticket.category_id, ticket.priority),
+        (metric, ticket.category_id, ""),
+        (metric, None, ticket.priority),
+        (metric, None, ""),
+    ]
+
+
+def observe(observations):
+    """
+    Fold (ticket, metric, seconds) observations into the running aggregates.
+    Rows are locked, so concurrent writers do not lose increments. The global
+    row every observation touches is only bumped with F() and keeps no
+    histogram (see summaries), so it never serializes writers.
+    """
+    grouped = defaultdict(list)
+    for ticket, metric, seconds in observations:
+        for key in _keys(ticket, metric):
+            grouped[key].append(max(seconds, 0.0))
+
+    with transaction.atomic():
+        for (metric, category_id, priority), values in sorted(grouped.items(), key=lambda item: str(item[0])):
+            if category_id is None and not priority:
+                _add_to_totals(metric, values)
+                continue
+            row = _locked_row(metric, category_id, priority)
+            histogram = row.histogram or [0] * BUCKETS
+            for seconds in values:
+                histogram[bucket_for(seconds)] += 1
+            row.histogram = histogram
+            row.count += len(values)
+            row.total_seconds += sum(values)
+            row.save(update_fields=["histogram", "count", "total_seconds"])
+
+
+def _locked_row(metric, category_id, priority):
+    lookup = {"metric": metric, "category_id": category_id, "priority": priority}
+    row = SlaAggregate.objects.select_for_update().filter(**lookup).first()
+    if row is not None:
+        return row
+    try:
+        with transaction.atomic():
+            return SlaAggregate.objects.create(histogram=[0] * BUCKETS, **lookup)
+    except IntegrityError:
+        return SlaAggregate.objects.select_for_update().get(**lookup)
+
+
+def _add_to_totals(metric, values):
+    lookup = {"metric": metric, "category_id": None, "priority": ""}
+    changes = {"count": F("count") + len(values), "total_seconds": F("total_seconds") + sum(values)}
+    if SlaAggregate.objects.filter(**lookup).update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            SlaAggregate.objects.create(count=len(values), total_seconds=sum(values), **lookup)
+    except IntegrityError:
+        # строку успел создать параллельный запрос
+        SlaAggregate.objects.filter(**lookup).update(**changes)
+
+
+def summaries(rows):
+    """
+    summary() for each row. The histogram of a global row is the sum of the
+    per-category rows of its metric, so read those rows alongside it.
+    """
+    rows = list(rows)
+    merged = defaultdict(lambda: [0] * BUCKETS)
+    for row in rows:
+        if row.category_id is not None and not row.priority:
+            histogram = merged[row.metric]
+            for index, count in enumerate(row.histogram):
+                histogram[index] += count
+    for row in rows:
+        if row.category_id is None and not row.priority:
+            row.histogram = merged.get(row.metric, [])
+    return [summary(row) for row in rows]
+
+
+def summary(row):
+    return {
+        "metric": row.metric,
+        "category": row.category.name if row.category_id else None,
+        "priority": row.priority or None,
+        "count": row.count,
+        "avg_seconds": row.total_seconds / row.count if row.count else None,
+        "p50_seconds": percentile(row.histogram, 0.5),
+        "p95_seconds": percentile(row.histogram, 0.95),
+    }
+
+
+def format_duration(seconds):
+    if seconds is None:
+        return "-"
+    if seconds < 3600:
+        return f"{seconds / 60:.0f} min"
+    if seconds < 86400 * 2:
+        return f"{seconds / 3600:.1f} h"
+    return f"{seconds / 86400:.1f} d"
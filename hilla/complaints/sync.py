@@ -0,0 +1,104 @@
+"""
+Delta sync for clients that mirror the ticket list.
+
+A cursor is a position in two streams: tickets ordered by (updated_at, id)
+and tombstones ordered by (deleted_at, id), each read through its index, so
+a sync costs as much as the changes since the cursor. Pages stop
+SETTLE_SECONDS short of now: a transaction that stamped its rows a moment
+before committing is still picked up instead of being skipped past.
+
+Without a cursor the first pages list every ticket and only deletes from
+then on are reported.
+"""
+import base64
+import binascii
+import json
+from datetime import timedelta
+
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Ticket, TicketTombstone
+from .serializers import ticket_rows
+
+
+SETTLE_SECONDS = 5
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 2000
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(tickets_after, deleted_after):
+    positions = [
+        [at.isoformat(), pk] if at is not None else None
+        for at, pk in (tickets_after or (None, 0), deleted_after)
+    ]
+    return base64.urlsafe_b64encode(json.dumps(positions, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        positions = []
+        for position in json.loads(raw):
+            if position is None:
+                positions.append(None)
+                continue
+            at, pk = position
+            at = parse_datetime(at)
+            if at is None or not isinstance(pk, int):
+                raise ValueError
+            positions.append((at, pk))
+        tickets_after, deleted_after = positions
+    except (binascii.Error, TypeError, ValueError):
+        raise InvalidCursor("Malformed sync cursor") from None
+    if deleted_after is None:
+        raise InvalidCursor("Malformed sync cursor")
+    return tickets_after, deleted_after
+
+
+def _after(queryset, field, position):
+    if position is None:
+        return queryset
+    at, pk = position
+    return queryset.filter(Q(**{f"{field}__gt": at}) | Q(**{field: at, "pk__gt": pk}))
+
+
+def changes(cursor=None, limit=DEFAULT_LIMIT):
+    """
+    One sync page: tickets changed and tickets removed after `cursor`, plus
+    the cursor to continue from.
+    """
+    horizon = timezone.now() - timedelta(seconds=SETTLE_SECONDS)
+    if cursor:
+        tickets_after, deleted_after = decode_cursor(cursor)
+    else:
+        tickets_after, deleted_after = None, (horizon, 0)
+
+    tickets = ticket_rows(
+        _after(Ticket.objects.filter(updated_at__lt=horizon), "updated_at", tickets_after).order_by("updated_at", "id")[
+            : limit + 1
+        ]
+    )
+    deleted = list(
+        _after(TicketTombstone.objects.filter(deleted_at__lt=horizon), "deleted_at", deleted_after)
+        .order_by("deleted_at", "id")
+        .values("id", "ticket_id", "reason", "deleted_at")[: limit + 1]
+    )
+    has_more = len(tickets) > limit or len(deleted) > limit
+    tickets, deleted = tickets[:limit], deleted[:limit]
+    if tickets:
+        tickets_after = (tickets[-1]["updated_at"], tickets[-1]["id"])
+    if deleted:
+        deleted_after = (deleted[-1]["deleted_at"], deleted[-1]["id"])
+
+    return {
+        "tickets": tickets,
+        "deleted": [{"id": row["ticket_id"], "reason": row["reason"], "deleted_at": row["deleted_at"]} for row in deleted],
+        "cursor": encode_cursor(tickets_after, deleted_after),
+        "has_more": has_more,
+    }
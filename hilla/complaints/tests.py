@@ -1,3 +1,1651 @@
-from django.test import TestCase
+import asyncio
+import base64
+import json
+import os
+import re
+import tempfile
+from collections import Counter
+from datetime import timedelta
+from io import StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib.admin.models import LogEntry
+from django.contrib.auth import get_user_model
+from django.core import checks, mail
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models import QuerySet, Sum
+from django.test import AsyncClient, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+import httpx
+from rest_framework.renderers import JSONRenderer
+
+from . import admin as complaints_admin
+from . import (
+    ai,
+    archive,
+    classifier,
+    events,
+    live,
+    middleware,
+    notifications,
+    renderers,
+    rollups,
+    similarity,
+    sla,
+    sync,
+    webhooks,
+)
+from .models import (
+    Category,
+    OutboxMessage,
+    Reporter,
+    SlaAggregate,
+    Ticket,
+    TicketComment,
+    TicketEvent,
+    TicketFingerprint,
+    TicketRating,
+    TicketRollup,
+    TicketTombstone,
+    WebhookDeadLetter,
+    WebhookDelivery,
+    WebhookEndpoint,
+)
+from .forms import TicketForm
+from .serializers import TicketSerializer, ticket_rows
+from .services import update_tickets
+
+
+class CountingStubProvider(ai.StubProvider):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def agenerate(self, prompt, max_tokens=180):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0)
+            return await super().agenerate(prompt, max_tokens)
+        finally:
+            self.in_flight -= 1
+
+
+class SummarizeTicketsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name="Wi-Fi", slug="wifi")
+        Ticket.objects.bulk_create(
+            Ticket(category=category, subject=f"Ticket {i}", message=f"Router {i} is down") for i in range(12)
+        )
+
+    def summarize(self, provider, **options):
+        with mock.patch.dict(ai.PROVIDERS, {"stub": lambda: provider}):
+            call_command("summarize_tickets", provider="stub", stdout=StringIO(), stderr=StringIO(), **options)
+
+    def test_summarizes_with_bounded_concurrency(self):
+        provider = CountingStubProvider()
+        self.summarize(provider, concurrency=3, chunk_size=5)
+
+        self.assertFalse(Ticket.objects.filter(summary="").exists())
+        self.assertEqual(provider.calls, 12)
+        self.assertLessEqual(provider.max_in_flight, 3)
+        self.assertEqual(Ticket.objects.get(subject="Ticket 0").summary, "Ticket 0 Router 0 is down")
+
+    def test_resumes_where_it_stopped(self):
+        self.summarize(ai.StubProvider(), limit=5)
+        self.assertEqual(Ticket.objects.exclude(summary="").count(), 5)
+
+        provider = ai.StubProvider()
+        self.summarize(provider)
+        self.assertEqual(provider.calls, 7)
+        self.assertFalse(Ticket.objects.filter(summary="").exists())
+
+    def test_failed_tickets_stay_pending(self):
+        self.summarize(ai.StubProvider(fail_marker="Router 3 "))
+        self.assertEqual(list(Ticket.objects.filter(summary="").values_list("subject", flat=True)), ["Ticket 3"])
+
+    def test_records_throughput_for_comparison(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "summarize.jsonl")
+            self.summarize(ai.StubProvider(fail_marker="Router 3 "), limit=6, concurrency=2, record=path)
+            stdout = StringIO()
+            with mock.patch.dict(ai.PROVIDERS, {"stub": ai.StubProvider}):
+                call_command("summarize_tickets", provider="stub", concurrency=2, record=path, stdout=stdout)
+            with open(path) as f:
+                first, second = [json.loads(line) for line in f]
+
+        self.assertEqual((first["provider"], first["concurrency"]), ("stub", 2))
+        self.assertEqual((first["summarized"], first["failed"]), (5, 1))
+        self.assertEqual(second["summarized"], 7)
+        self.assertGreater(first["tickets_per_s"], 0)
+        self.assertIn(f"Previous run ({first['at']}): {first['tickets_per_s']} tickets/s", stdout.getvalue())
+
+
+class FakeProvider(ai.Provider):
+    """
+    Scripted provider: ``outcomes`` is consumed one per call; an exception
+    instance is raised, anything else is returned. ``delay`` is awaited first.
+    """
+
+    def __init__(self, name, outcomes=(), delay=0.0, default="ok"):
+        self.name = name
+        self.outcomes = list(outcomes)
+        self.delay = delay
+        self.default = default
+        self.calls = 0
+
+    async def agenerate(self, prompt, max_tokens=180):
+        self.calls += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        outcome = self.outcomes.pop(0) if self.outcomes else self.default
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class RouterTests(SimpleTestCase):
+    def router(self, *providers, **options):
+        self.clock = FakeClock()
+        return ai.Router(providers, clock=self.clock, **options)
+
+    def test_fails_over_to_next_provider(self):
+        primary = FakeProvider("primary", [ai.ProviderError("boom")])
+        backup = FakeProvider("backup", default="from backup")
+        router = self.router(primary, backup)
+
+        self.assertEqual(router.generate("hi"), "from backup")
+        metrics = {p["name"]: p for p in router.metrics()["providers"]}
+        self.assertEqual(metrics["primary"]["failures"], 1)
+        self.assertEqual(metrics["backup"]["calls"], 1)
+
+    def test_raises_when_every_provider_fails(self):
+        router = self.router(
+            FakeProvider("a", [ai.ProviderError("a down")]),
+            FakeProvider("b", [RuntimeError("rate limit reached")]),
+        )
+        with self.assertRaises(ai.ProviderError) as ctx:
+            router.generate("hi")
+        self.assertEqual(ctx.exception.user_message, "Слишком много запросов. Подожди немного.")
+
+    def test_circuit_opens_and_recovers(self):
+        primary = FakeProvider("primary", [ai.ProviderError("down")] * 3)
+        router = self.router(primary, failure_threshold=3, reset_timeout=30)
+
+        for _ in range(3):
+            with self.assertRaises(ai.ProviderError):
+                router.generate("hi")
+        self.assertEqual(router.health["primary"].state, ai.OPEN)
+
+        with self.assertRaises(ai.ProviderError):
+            router.generate("hi")
+        self.assertEqual(primary.calls, 3)
+
+        self.clock.now += 31
+        self.assertEqual(router.generate("hi"), "ok")
+        self.assertEqual(primary.calls, 4)
+        self.assertEqual(router.health["primary"].state, ai.CLOSED)
+
+    def test_failing_provider_is_tried_after_healthy_one(self):
+        primary = FakeProvider("primary", [ai.ProviderError("down")])
+        backup = FakeProvider("backup")
+        router = self.router(primary, backup)
+
+        router.generate("hi")
+        router.generate("hi")
+        self.assertEqual((primary.calls, backup.calls), (1, 2))
+
+    def test_failed_trial_reopens_circuit(self):
+        primary = FakeProvider("primary", [ai.ProviderError("down")] * 2)
+        router = self.router(primary, FakeProvider("backup"), failure_threshold=1, reset_timeout=30)
+
+        router.generate("hi")
+        self.clock.now += 31
+        router.generate("hi")
+        self.assertEqual(router.health["primary"].state, ai.OPEN)
+        self.assertEqual(router.health["primary"].opened_at, self.clock.now)
+
+    def test_all_circuits_open_is_unavailable(self):
+        router = self.router(FakeProvider("only", [ai.ProviderError("down")]), failure_threshold=1)
+        with self.assertRaises(ai.ProviderError):
+            router.generate("hi")
+        with self.assertRaises(ai.ProviderError) as ctx:
+            router.generate("hi")
+        self.assertEqual(ctx.exception.status, 503)
+
+    def test_prefers_lower_latency(self):
+        slow = FakeProvider("slow", default="slow")
+        fast = FakeProvider("fast", default="fast")
+        router = self.router(slow, fast)
+        router.health["slow"].record(True, 2.0)
+        router.health["fast"].record(True, 0.1)
+
+        self.assertEqual(router.generate("hi"), "fast")
+
+    def test_timeout_counts_as_failure(self):
+        hanging = FakeProvider("hanging", delay=0.2)
+        router = self.router(hanging, FakeProvider("backup", default="backup"), timeout=0.01)
+
+        self.assertEqual(router.generate("hi"), "backup")
+        self.assertEqual(router.health["hanging"].failures, 1)
+
+    def test_hedged_request_takes_first_answer(self):
+        slow = FakeProvider("slow", delay=0.5, default="slow")
+        fast = FakeProvider("fast", default="fast")
+        router = self.router(slow, fast, hedge_after=0.01)
+
+        self.assertEqual(router.generate("hi"), "fast")
+        self.assertEqual(slow.calls, 1)
+        self.assertEqual(router.health["slow"].calls, 0)
+
+    def test_no_hedge_without_setting(self):
+        slow = FakeProvider("slow", delay=0.02, default="slow")
+        fast = FakeProvider("fast", default="fast")
+        router = self.router(slow, fast)
+
+        self.assertEqual(router.generate("hi"), "slow")
+        self.assertEqual(fast.calls, 0)
+
+
+class GetProviderTests(SimpleTestCase):
+    def setUp(self):
+        patcher = mock.patch.object(ai, "_router", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_ai_provider_leads_the_router(self):
+        with mock.patch.dict(os.environ, {"AI_PROVIDER": "stub", "AI_PROVIDERS": ""}):
+            provider = ai.get_provider()
+        self.assertIsInstance(provider, ai.Router)
+        self.assertEqual([p.name for p in provider.providers], ["stub"])
+
+    def test_named_provider_is_wrapped_in_a_router(self):
+        with mock.patch.dict(os.environ, {"AI_TIMEOUT": "5"}):
+            provider = ai.get_provider("stub")
+        self.assertIsInstance(provider, ai.Router)
+        self.assertEqual(provider.timeout, 5.0)
+        self.assertTrue(provider.generate("hello"))
+
+    def test_unknown_provider(self):
+        with self.assertRaises(ai.ProviderNotConfigured):
+            ai.get_provider("nope")
+
+
+class AiMetricsViewTests(TestCase):
+    def test_staff_only(self):
+        staff = get_user_model().objects.create_user("staff", password="x", is_staff=True)
+        router = ai.Router([FakeProvider("fake")])
+        router.generate("hi")
+
+        self.assertEqual(self.client.get("/api/ai/metrics/").status_code, 302)
+        self.client.force_login(staff)
+        with mock.patch.object(ai, "_router", router):
+            data = self.client.get("/api/ai/metrics/").json()
+        self.assertEqual(data["providers"][0]["name"], "fake")
+        self.assertEqual(data["providers"][0]["calls"], 1)
+
+
+# Максимум запросов на один GET для каждого маршрута. Число не должно
+# зависеть от объёма данных: QueryBudgetTests проверяет это на двух размерах.
+QUERY_BUDGETS = {
+    "index": 7,
+    "dashboard": 10,
+    "create": 3,
+    "ticket_detail": 5,
+    "ticket_comments": 2,
+    "ticket_ratings": 2,
+    "admin_queue": 4,
+    "account": 4,
+    "api_tickets": 3,
+    "api_ticket_detail": 3,
+    "api_tickets_sync": 4,
+    "api_analytics_tickets": 1,
+    "api_sla": 1,
+    "admin:index": 3,
+    "admin:complaints_ticket_changelist": 7,
+    "admin:complaints_ticket_change": 6,
+}
+
+_LITERALS = re.compile(r"'[^']*'|\b\d+\b")
+
+
+# страницы рендерятся без collectstatic
+PLAIN_STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}
+
+
+def duplicated_sql(queries):
+    """
+    Statements that ran more than once once literals are masked, most repeated first.
+    """
+    shapes = Counter(_LITERALS.sub("?", query["sql"]) for query in queries)
+    return [(count, sql) for sql, count in shapes.most_common() if count > 1]
+
+
+# бюджеты считаются для продовой конфигурации с общим кэшем (REDIS_URL):
+# сессия и пользователь читаются из кэша, а не из БД
+@override_settings(
+    STORAGES=PLAIN_STORAGES,
+    SESSION_ENGINE="django.contrib.sessions.backends.cached_db",
+    AUTH_USER_CACHE_TIMEOUT=300,
+)
+class QueryBudgetTests(TestCase):
+    SIZES = (3, 15)
+    TICKET_ROUTES = {
+        "ticket_detail",
+        "ticket_comments",
+        "ticket_ratings",
+        "api_ticket_detail",
+        "admin:complaints_ticket_change",
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = get_user_model().objects.create_user("moderator", password="x", is_staff=True, is_superuser=True)
+        cls.category = Category.objects.create(name="Dormitory")
+
+    def grow_to(self, size):
+        for i in range(Ticket.objects.count(), size):
+            ticket = Ticket.objects.create(
+                category=self.category,
+                user=self.staff if i % 2 else None,
+                name=f"Reporter {i % 4}",
+                subject=f"Broken heater {i}",
+                message="The heater in room 12 does not work.",
+                status=[Ticket.OPEN, Ticket.IN_PROGRESS, Ticket.CLOSED][i % 3],
+            )
+            TicketRating.objects.create(ticket=ticket, score=1 + i % 5, rater_name="rater")
+            TicketComment.objects.create(ticket=ticket, author_name="staff", text="On it.")
+
+    def capture(self, path):
+        # первый запрос прогревает кэши процесса (ContentType и т.п.)
+        self.client.get(path)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(path)
+        self.assertLess(response.status_code, 400, path)
+        return queries.captured_queries
+
+    def test_query_budgets(self):
+        self.client.force_login(self.staff)
+        counts = {}
+        for size in self.SIZES:
+            self.grow_to(size)
+            pk = Ticket.objects.order_by("pk").values_list("pk", flat=True).first()
+            for name in QUERY_BUDGETS:
+                path = reverse(name, args=[pk] if name in self.TICKET_ROUTES else [])
+                counts.setdefault(name, []).append((size, self.capture(path)))
+
+        for name, runs in counts.items():
+            with self.subTest(name=name):
+                (small, small_queries), (large, large_queries) = runs
+                report = "\n".join(f"  {count}x {sql}" for count, sql in duplicated_sql(large_queries))
+                self.assertEqual(
+                    len(small_queries),
+                    len(large_queries),
+                    f"{name}: {len(small_queries)} queries at {small} tickets, "
+                    f"{len(large_queries)} at {large}. Repeated SQL:\n{report}",
+                )
+                self.assertLessEqual(
+                    len(large_queries),
+                    QUERY_BUDGETS[name],
+                    f"{name}: {len(large_queries)} queries, budget {QUERY_BUDGETS[name]}. Repeated SQL:\n{report}",
+                )
+
+
+@override_settings(EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend")
+class NotificationOutboxTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name="IT")
+        cls.ticket = Ticket.objects.create(
+            category=category, subject="Printer jam", message="Jammed again", email="reporter@example.com"
+        )
+        cls.anonymous = Ticket.objects.create(
+            category=category, subject="Noise", message="Loud", is_anonymous=True
+        )
+
+    def test_status_change_and_answer_are_enqueued_once(self):
+        update_tickets([self.ticket.pk], {"status": Ticket.CLOSED})
+        update_tickets([self.ticket.pk], {"status": Ticket.CLOSED})
+        ticket = Ticket.objects.get(pk=self.ticket.pk)
+        before = events.snapshot(ticket)
+        ticket.answer, ticket.is_answered = "Cleared the tray.", True
+        ticket.save()
+        events.record_changes(ticket, before)
+
+        self.assertEqual(
+            sorted(OutboxMessage.objects.values_list("kind", "recipient")),
+            [("answer", "reporter@example.com"), ("status", "reporter@example.com")],
+        )
+
+    def test_pending_duplicates_are_dropped(self):
+        for status in (Ticket.CLOSED, Ticket.OPEN, Ticket.CLOSED):
+            update_tickets([self.ticket.pk], {"status": status})
+        self.assertEqual(OutboxMessage.objects.filter(dedupe_key=f"status:{self.ticket.pk}:closed").count(), 1)
+        self.assertEqual(OutboxMessage.objects.count(), 2)
+
+    def test_anonymous_tickets_are_not_notified(self):
+        update_tickets([self.anonymous.pk], {"status": Ticket.CLOSED})
+        self.assertFalse(OutboxMessage.objects.exists())
+
+    def test_rolled_back_change_leaves_no_message(self):
+        with mock.patch("complaints.services.notify_ticket_change", side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                update_tickets([self.ticket.pk], {"status": Ticket.CLOSED})
+        self.assertFalse(OutboxMessage.objects.exists())
+
+    def test_dispatch_sends_over_one_connection(self):
+        other = Ticket.objects.create(category=self.ticket.category, subject="Wi-Fi", message="Down", email="b@example.com")
+        update_tickets([self.ticket.pk, other.pk], {"status": Ticket.IN_PROGRESS})
+
+        with mock.patch.object(notifications, "get_connection", wraps=notifications.get_connection) as factory:
+            call_command("send_notifications", batch_size=1, stdout=StringIO())
+
+        factory.assert_called_once()
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox), ["b@example.com", "reporter@example.com"])
+        self.assertEqual(OutboxMessage.objects.filter(state=OutboxMessage.SENT).count(), 2)
+
+        call_command("send_notifications", stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 2)
+
+    def test_failures_back_off_then_give_up(self):
+        update_tickets([self.ticket.pk], {"status": Ticket.CLOSED})
+        message = OutboxMessage.objects.get()
+        broken = mock.Mock(send_messages=mock.Mock(side_effect=OSError("connection refused")))
+
+        self.assertEqual(notifications.dispatch(connection=broken), (0, 1))
+        message.refresh_from_db()
+        self.assertEqual((message.state, message.attempts), (OutboxMessage.PENDING, 1))
+        self.assertGreater(message.available_at, timezone.now())
+        self.assertEqual(notifications.dispatch(connection=broken), (0, 0))
+
+        for _ in range(notifications.MAX_ATTEMPTS - 1):
+            OutboxMessage.objects.update(available_at=timezone.now() - timedelta(seconds=1))
+            notifications.dispatch(connection=broken)
+        message.refresh_from_db()
+        self.assertEqual((message.state, message.attempts), (OutboxMessage.FAILED, notifications.MAX_ATTEMPTS))
+        self.assertIn("connection refused", message.last_error)
+
+    def test_unreachable_server_backs_off_the_batch(self):
+        other = Ticket.objects.create(category=self.ticket.category, subject="Wi-Fi", message="Down", email="b@example.com")
+        update_tickets([self.ticket.pk, other.pk], {"status": Ticket.CLOSED})
+        down = mock.Mock(open=mock.Mock(side_effect=OSError("connection refused")))
+
+        self.assertEqual(notifications.dispatch(connection=down), (0, 2))
+        down.close.assert_not_called()
+        rows = OutboxMessage.objects.values_list("state", "attempts", "last_error")
+        self.assertEqual(set(rows), {(OutboxMessage.PENDING, 1, "connection refused")})
+        self.assertFalse(OutboxMessage.objects.filter(available_at__lte=timezone.now()).exists())
+
+    def test_sends_outside_the_claim_transaction(self):
+        other = Ticket.objects.create(category=self.ticket.category, subject="Wi-Fi", message="Down", email="b@example.com")
+        update_tickets([self.ticket.pk, other.pk], {"status": Ticket.CLOSED})
+        depth = len(connection.savepoint_ids)
+        seen = []
+
+        def send_messages(messages):
+            seen.append(len(connection.savepoint_ids))
+            if len(seen) == 2:
+                raise KeyboardInterrupt
+            return 1
+
+        with self.assertRaises(KeyboardInterrupt):
+            notifications.dispatch(connection=mock.Mock(send_messages=send_messages))
+
+        self.assertEqual(seen, [depth, depth])
+        # первое письмо уже отмечено отправленным, второе ждёт конца аренды
+        states = sorted(OutboxMessage.objects.values_list("state", flat=True))
+        self.assertEqual(states, [OutboxMessage.PENDING, OutboxMessage.SENT])
+        self.assertEqual(notifications.dispatch(connection=mock.Mock()), (0, 0))
+
+    def test_loop_survives_dispatch_errors(self):
+        stderr = StringIO()
+        outcomes = [OSError("database restarting"), (1, 0), KeyboardInterrupt]
+        with mock.patch.object(notifications, "dispatch", side_effect=outcomes), mock.patch("time.sleep"):
+            with self.assertRaises(KeyboardInterrupt):
+                call_command("send_notifications", loop=True, stdout=StringIO(), stderr=stderr)
+        self.assertIn("database restarting", stderr.getvalue())
+
+
+class WebhookTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name="IT")
+        cls.endpoint = WebhookEndpoint.objects.create(url="https://hooks.example.com/in", secret="s3cret", max_concurrency=2)
+
+    def make_tickets(self, count):
+        tickets = []
+        for i in range(count):
+            ticket = Ticket.objects.create(category=self.category, subject=f"Issue {i}", message="Broken")
+            events.record_created(ticket)
+            tickets.append(ticket)
+        return tickets
+
+    def recorder(self, status=200, delay=0.0):
+        calls = {"requests": [], "in_flight": 0, "max_in_flight": 0}
+
+        async def handler(request):
+            calls["in_flight"] += 1
+            calls["max_in_flight"] = max(calls["max_in_flight"], calls["in_flight"])
+            try:
+                await asyncio.sleep(delay)
+                calls["requests"].append(request)
+                return httpx.Response(status)
+            finally:
+                calls["in_flight"] -= 1
+
+        return calls, httpx.MockTransport(handler)
+
+    def test_events_are_batched_and_signed(self):
+        self.make_tickets(3)
+        calls, transport = self.recorder()
+
+        self.assertEqual(webhooks.deliver(transport=transport), (3, 0, 0))
+
+        [request] = calls["requests"]
+        body = request.content
+        timestamp = request.headers["X-Hilla-Timestamp"]
+        self.assertEqual(request.headers["X-Hilla-Signature"], webhooks.sign("s3cret", timestamp, body))
+        self.assertEqual([e["kind"] for e in json.loads(body)["events"]], [TicketEvent.CREATED] * 3)
+        self.assertFalse(WebhookDelivery.objects.exists())
+
+    def test_concurrency_is_capped_per_endpoint(self):
+        self.make_tickets(6)
+        calls, transport = self.recorder(delay=0.01)
+
+        self.assertEqual(webhooks.deliver(batch_events=1, transport=transport), (6, 0, 0))
+        self.assertEqual(len(calls["requests"]), 6)
+        self.assertEqual(calls["max_in_flight"], 2)
+
+    def test_event_kinds_filter(self):
+        self.endpoint.event_kinds = [TicketEvent.STATUS]
+        self.endpoint.save()
+        ticket, = self.make_tickets(1)
+        self.assertFalse(WebhookDelivery.objects.exists())
+
+        update_tickets([ticket.pk], {"status": Ticket.CLOSED, "priority": Ticket.HIGH})
+        self.assertEqual([d.payload["kind"] for d in WebhookDelivery.objects.all()], [TicketEvent.STATUS])
+
+    def test_failures_back_off_then_dead_letter(self):
+        self.make_tickets(1)
+        calls, transport = self.recorder(status=500)
+
+        self.assertEqual(webhooks.deliver(transport=transport), (0, 1, 0))
+        delivery = WebhookDelivery.objects.get()
+        self.assertEqual((delivery.attempts, delivery.last_error), (1, "HTTP 500"))
+        self.assertGreater(delivery.available_at, timezone.now())
+        self.assertEqual(webhooks.deliver(transport=transport), (0, 0, 0))
+
+        for _ in range(webhooks.MAX_ATTEMPTS - 1):
+            WebhookDelivery.objects.update(available_at=timezone.now() - timedelta(seconds=1))
+            webhooks.deliver(transport=transport)
+        self.assertFalse(WebhookDelivery.objects.exists())
+        dead = WebhookDeadLetter.objects.get()
+        self.assertEqual((dead.attempts, dead.payload["kind"]), (webhooks.MAX_ATTEMPTS, TicketEvent.CREATED))
+
+    def test_posts_outside_the_claim_transaction(self):
+        self.make_tickets(2)
+        calls, transport = self.recorder()
+        depth = len(connection.savepoint_ids)
+        post_all = webhooks._post_all
+        seen = {}
+
+        def spy(jobs, transport):
+            seen["depth"] = len(connection.savepoint_ids)
+            seen["leased"] = not WebhookDelivery.objects.filter(available_at__lte=timezone.now()).exists()
+            return post_all(jobs, transport)
+
+        with mock.patch.object(webhooks, "_post_all", spy):
+            self.assertEqual(webhooks.deliver(transport=transport), (2, 0, 0))
+        self.assertEqual(seen, {"depth": depth, "leased": True})
+
+    def test_crashed_run_leaves_rows_leased_then_retries(self):
+        self.make_tickets(1)
+        with mock.patch.object(webhooks, "_post_all", side_effect=RuntimeError("worker killed")):
+            with self.assertRaises(RuntimeError):
+                webhooks.deliver(transport=self.recorder()[1])
+        delivery = WebhookDelivery.objects.get()
+        self.assertEqual(delivery.attempts, 1)
+        self.assertEqual(webhooks.deliver(transport=self.recorder()[1]), (0, 0, 0))
+
+        WebhookDelivery.objects.update(available_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(webhooks.deliver(transport=self.recorder()[1]), (1, 0, 0))
+
+
+@override_settings(STORAGES=PLAIN_STORAGES)
+class ApiRenderingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name="IT")
+        cls.ticket = Ticket.objects.create(category=category, subject="Printer jam", message="Jammed " * 40)
+        Ticket.objects.create(category=category, subject="Wi-Fi", message="Down " * 40, email="a@example.com")
+        TicketRating.objects.create(ticket=cls.ticket, score=4)
+        TicketRating.objects.create(ticket=cls.ticket, score=5)
+
+    def test_rows_match_model_serializer(self):
+        queryset = Ticket.objects.order_by("-created_at")
+        expected = JSONRenderer().render(TicketSerializer(queryset, many=True).data)
+        self.assertEqual(json.loads(renderers.ORJSONRenderer().render(ticket_rows(queryset))), json.loads(expected))
+
+        response = self.client.get(reverse("api_ticket_detail", args=[self.ticket.pk]))
+        self.assertEqual(response.json()["average_rating"], 4.5)
+
+    @skipUnless(renderers.msgpack, "msgpack is not installed")
+    def test_msgpack_is_negotiated(self):
+        url = reverse("api_tickets")
+        response = self.client.get(url, HTTP_ACCEPT="application/msgpack")
+        self.assertEqual(response["Content-Type"], "application/msgpack")
+        self.assertEqual(renderers.msgpack.unpackb(response.content), self.client.get(url).json())
+
+    def test_gzip_response(self):
+        response = self.client.get(reverse("api_tickets"), HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+
+    @skipUnless(middleware.brotli, "brotli is not installed")
+    def test_brotli_for_api_but_not_html(self):
+        response = self.client.get(reverse("api_tickets"), HTTP_ACCEPT_ENCODING="gzip, br")
+        self.assertEqual(response["Content-Encoding"], "br")
+        self.assertEqual(json.loads(middleware.brotli.decompress(response.content)), self.client.get(reverse("api_tickets")).json())
+
+        response = self.client.get(reverse("index"), HTTP_ACCEPT_ENCODING="gzip, br")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+
+
+@mock.patch.object(sync, "SETTLE_SECONDS", 0)
+class TicketSyncTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name="IT")
+        cls.tickets = [
+            Ticket.objects.create(category=cls.category, subject=f"Issue {i}", message="Broken") for i in range(5)
+        ]
+
+    def pull(self, cursor=None, limit=2):
+        params = {"limit": limit}
+        if cursor:
+            params["cursor"] = cursor
+        response = self.client.get(reverse("api_tickets_sync"), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def pull_all(self, cursor=None):
+        tickets, deleted = [], []
+        while True:
+            page = self.pull(cursor)
+            tickets += [row["id"] for row in page["tickets"]]
+            deleted += [(row["id"], row["reason"]) for row in page["deleted"]]
+            cursor = page["cursor"]
+            if not page["has_more"]:
+                return tickets, deleted, cursor
+
+    def test_initial_sync_then_only_changes(self):
+        tickets, deleted, cursor = self.pull_all()
+        self.assertEqual(tickets, [t.pk for t in self.tickets])
+        self.assertEqual(deleted, [])
+
+        first, second, third = self.tickets[:3]
+        update_tickets([second.pk], {"status": Ticket.CLOSED})
+        TicketRating.objects.create(ticket=third, score=5)
+        self.client.delete(reverse("api_ticket_detail", args=[first.pk]))
+        archive.archive_tickets([second.pk])
+
+        tickets, deleted, cursor = self.pull_all(cursor)
+        self.assertEqual(tickets, [third.pk])
+        self.assertEqual(deleted, [(first.pk, TicketTombstone.DELETED), (second.pk, TicketTombstone.ARCHIVED)])
+        self.assertEqual(self.pull_all(cursor)[:2], ([], []))
+
+    def test_clear_tickets_leaves_tombstones(self):
+        call_command("clear_tickets", stdout=StringIO())
+        self.assertEqual(
+            sorted(TicketTombstone.objects.values_list("ticket_id", flat=True)), [t.pk for t in self.tickets]
+        )
+
+    def test_recent_writes_wait_for_settle_window(self):
+        with mock.patch.object(sync, "SETTLE_SECONDS", 60):
+            tickets, _, cursor = self.pull_all()
+        self.assertEqual(tickets, [])
+        # курсор не ушёл дальше горизонта: после окна строки приходят
+        self.assertEqual(self.pull_all(cursor)[0], [t.pk for t in self.tickets])
+
+    def test_tombstones_wait_for_settle_window(self):
+        _, _, cursor = self.pull_all()
+        self.client.delete(reverse("api_ticket_detail", args=[self.tickets[0].pk]))
+        with mock.patch.object(sync, "SETTLE_SECONDS", 60):
+            _, deleted, held = self.pull_all(cursor)
+        self.assertEqual(deleted, [])
+        self.assertEqual(self.pull_all(held)[1], [(self.tickets[0].pk, TicketTombstone.DELETED)])
+
+    def test_cursor_round_trip(self):
+        at = timezone.now().replace(microsecond=123456)
+        for tickets_after in (None, (at, 7)):
+            token = sync.encode_cursor(tickets_after, (at, 3))
+            self.assertNotIn("=", token)
+            self.assertEqual(sync.decode_cursor(token), (tickets_after, (at, 3)))
+
+    def test_malformed_cursor(self):
+        def token(value):
+            return base64.urlsafe_b64encode(json.dumps(value).encode()).decode()
+
+        at = timezone.now().isoformat()
+        for cursor in (
+            "not-a-cursor",
+            base64.urlsafe_b64encode(b"\xff\xfe").decode(),
+            token({"a": 1}),
+            token(5),
+            token([[at, 1]]),
+            token([None, None]),
+            token([None, [at, "1"]]),
+            token([None, ["yesterday", 1]]),
+            token([None, ["2026-13-45T00:00:00", 1]]),
+        ):
+            with self.subTest(cursor=cursor):
+                with self.assertRaises(sync.InvalidCursor):
+                    sync.decode_cursor(cursor)
+                response = self.client.get(reverse("api_tickets_sync"), {"cursor": cursor})
+                self.assertEqual(response.status_code, 400)
+
+        self.assertEqual(self.client.get(reverse("api_tickets_sync"), {"limit": "many"}).status_code, 400)
+
+
+class TicketBulkApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = get_user_model().objects.create_user("moderator", password="x", is_staff=True)
+        category = Category.objects.create(name="IT")
+        cls.tickets = [
+            Ticket.objects.create(category=category, subject=f"Issue {i}", message="Broken", priority=priority)
+            for i, priority in enumerate([Ticket.HIGH, Ticket.HIGH, Ticket.LOW, Ticket.HIGH])
+        ]
+
+    def setUp(self):
+        self.client.force_login(self.staff)
+
+    def patch(self, payload):
+        return self.client.patch(reverse("api_tickets_bulk"), payload, content_type="application/json")
+
+    def test_items_report_per_id_outcomes(self):
+        first, second, third, fourth = self.tickets
+        stale = second.updated_at
+        update_tickets([second.pk], {"priority": Ticket.LOW})
+
+        response = self.patch(
+            {
+                "items": [
+                    {"id": first.pk, "fields": {"status": Ticket.CLOSED}, "updated_at": first.updated_at.isoformat()},
+                    {"id": second.pk, "fields": {"status": Ticket.CLOSED}, "updated_at": stale.isoformat()},
+                    {"id": third.pk, "fields": {"status": Ticket.CLOSED}},
+                    {"id": fourth.pk, "fields": {"status": "done"}},
+                    {"id": 999999, "fields": {"priority": Ticket.LOW}},
+                ]
+            }
+        )
+
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body["updated"], 2)
+        self.assertEqual(
+            [row["status"] for row in body["results"]], ["updated", "conflict", "updated", "invalid", "missing"]
+        )
+        self.assertEqual(
+            dict(Ticket.objects.values_list("pk", "status")),
+            {first.pk: Ticket.CLOSED, second.pk: Ticket.OPEN, third.pk: Ticket.CLOSED, fourth.pk: Ticket.OPEN},
+        )
+        self.assertEqual(TicketEvent.objects.filter(kind=TicketEvent.STATUS).count(), 2)
+
+    def test_filter_applies_in_chunks(self):
+        with mock.patch("complaints.views.MAX_BATCH_SIZE", 2), CaptureQueriesContext(connection) as queries:
+            response = self.patch({"filter": {"priority": Ticket.HIGH}, "fields": {"status": Ticket.IN_PROGRESS}})
+
+        self.assertEqual(response.json()["updated"], 3)
+        self.assertEqual(Ticket.objects.filter(status=Ticket.IN_PROGRESS).count(), 3)
+        updates = [q for q in queries.captured_queries if q["sql"].startswith('UPDATE "complaints_ticket"')]
+        self.assertEqual(len(updates), 2)
+
+    def test_rejects_bad_requests_and_non_staff(self):
+        self.assertEqual(self.patch({"filter": {"owner": 1}, "fields": {"status": Ticket.CLOSED}}).status_code, 400)
+        self.assertEqual(self.patch({"items": [{"fields": {}}]}).status_code, 400)
+
+        self.client.logout()
+        self.assertEqual(self.patch({"filter": {"priority": Ticket.HIGH}, "fields": {"status": Ticket.CLOSED}}).status_code, 403)
+        self.assertFalse(Ticket.objects.filter(status=Ticket.CLOSED).exists())
+
+
+@override_settings(STORAGES=PLAIN_STORAGES)
+class PriorityRankTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = get_user_model().objects.create_user("moderator", password="x", is_staff=True)
+        cls.category = Category.objects.create(name="IT")
+
+    def make(self, priority):
+        return Ticket.objects.create(category=self.category, subject=priority, message="Broken", priority=priority)
+
+    def test_rank_follows_priority(self):
+        ticket = self.make(Ticket.LOW)
+        self.assertEqual(Ticket.objects.get(pk=ticket.pk).priority_rank, 1)
+
+        ticket.priority = Ticket.HIGH
+        ticket.save(update_fields=["priority"])
+        self.assertEqual(Ticket.objects.get(pk=ticket.pk).priority_rank, 3)
+
+        update_tickets([ticket.pk], {"priority": Ticket.MEDIUM})
+        self.assertEqual(Ticket.objects.get(pk=ticket.pk).priority_rank, 2)
+
+    def test_admin_queue_sorts_by_rank(self):
+        for priority in (Ticket.MEDIUM, Ticket.HIGH, Ticket.LOW):
+            self.make(priority)
+        self.client.force_login(self.staff)
+
+        response = self.client.get(reverse("admin_queue"), {"sort": "priority_desc"})
+        self.assertEqual([t.priority for t in response.context["tickets"]], [Ticket.HIGH, Ticket.MEDIUM, Ticket.LOW])
+
+
+@override_settings(STORAGES=PLAIN_STORAGES)
+class TicketActivityTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name="IT")
+        cls.quiet, cls.busy = [
+            Ticket.objects.create(category=category, subject=subject, message="Broken") for subject in ("Quiet", "Busy")
+        ]
+        Ticket.objects.update(created_at=timezone.now() - timedelta(days=1), last_activity_at=timezone.now() - timedelta(days=1))
+
+    def activity(self, ticket):
+        return Ticket.objects.values_list("comment_count", "last_activity_at").get(pk=ticket.pk)
+
+    def test_comments_and_ratings_move_activity(self):
+        first = TicketComment.objects.create(ticket=self.quiet, author_name="staff", text="On it")
+        second = TicketComment.objects.create(ticket=self.quiet, author_name="staff", text="Fixed")
+        self.assertEqual(self.activity(self.quiet), (2, second.created_at))
+
+        second.delete()
+        self.assertEqual(self.activity(self.quiet), (1, first.created_at))
+
+        rating = TicketRating.objects.create(ticket=self.busy, score=3)
+        self.assertEqual(self.activity(self.busy)[1], rating.created_at)
+        rating.delete()
+        self.assertEqual(self.activity(self.busy)[1], Ticket.objects.get(pk=self.busy.pk).created_at)
+
+    def test_recompute_command_repairs_drift(self):
+        comment = TicketComment.objects.create(ticket=self.busy, author_name="staff", text="Looking")
+        Ticket.objects.update(comment_count=7, last_activity_at=timezone.now() - timedelta(days=30))
+
+        call_command("recompute_activity", batch_size=1, stdout=StringIO())
+
+        self.assertEqual(self.activity(self.busy), (1, comment.created_at))
+        self.assertEqual(self.activity(self.quiet)[0], 0)
+
+    def test_admin_queue_activity_sort(self):
+        TicketComment.objects.create(ticket=self.quiet, author_name="staff", text="Bump")
+        self.client.force_login(get_user_model().objects.create_user("moderator", password="x", is_staff=True))
+
+        response = self.client.get(reverse("admin_queue"), {"sort": "activity"})
+        self.assertEqual([t.pk for t in response.context["tickets"]][:2], [self.quiet.pk, self.busy.pk])
+
+
+@override_settings(STORAGES=PLAIN_STORAGES)
+class LiveQueueTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = get_user_model().objects.create_user("moderator", password="x", is_staff=True)
+        cls.category = Category.objects.create(name="IT")
+
+    def setUp(self):
+        self.client.force_login(self.staff)
+
+    def make(self, subject, priority=Ticket.MEDIUM):
+        return Ticket.objects.create(category=self.category, subject=subject, message="Broken", priority=priority)
+
+    def test_fetch_waits_for_settle_window(self):
+        cursor = (timezone.now() - timedelta(minutes=1), 0)
+        ticket = self.make("Fresh")
+        self.assertEqual(live.fetch_changes(cursor), ([], cursor))
+
+        with mock.patch.object(live, "SETTLE_SECONDS", 0):
+            payloads, cursor = live.fetch_changes(cursor)
+        self.assertEqual([p["id"] for p in payloads], [ticket.pk])
+        self.assertEqual(cursor, (ticket.updated_at, ticket.pk))
+
+    def test_polling_fallback_filters_and_advances(self):
+        url = reverse("admin_queue_changes")
+        start = self.client.get(url, {"priority": Ticket.HIGH}).json()
+        self.assertEqual(start["tickets"], [])
+
+        Ticket.objects.update(updated_at=timezone.now() - timedelta(minutes=1))
+        urgent = self.make("Urgent", Ticket.HIGH)
+        later = self.make("Later", Ticket.LOW)
+        with mock.patch.object(live, "SETTLE_SECONDS", 0):
+            page = self.client.get(url, {"priority": Ticket.HIGH, "since": start["since"], "after": start["after"]}).json()
+            again = self.client.get(url, {"since": page["since"], "after": page["after"]}).json()
+        self.assertEqual([t["id"] for t in page["tickets"]], [urgent.pk])
+        self.assertNotIn("_text", page["tickets"][0])
+        self.assertEqual(page["removed"], [later.pk])
+        self.assertEqual(again["tickets"], [])
+
+    def test_rows_leaving_the_filter_are_removed(self):
+        ticket = self.make("Urgent", Ticket.HIGH)
+        sub = live.Subscription({"priority": Ticket.HIGH})
+        sub.push(live.ticket_payload(ticket))
+        ticket.priority = Ticket.LOW
+        sub.push(live.ticket_payload(ticket))
+
+        self.assertEqual(sub.queue.get_nowait()[0], "ticket")
+        self.assertEqual(sub.queue.get_nowait(), ("remove", {"id": ticket.pk}))
+
+    def test_feed_fetch_closes_stale_connections(self):
+        feed = live.ChangeFeed()
+        feed.cursor = live.initial_cursor()
+        with mock.patch.object(live, "close_old_connections") as close:
+            feed._fetch()
+        self.assertEqual(close.call_count, 2)
+
+    def test_wsgi_page_polls_instead_of_streaming(self):
+        response = self.client.get(reverse("admin_queue"))
+        self.assertNotContains(response, reverse("admin_queue_stream"))
+        self.assertContains(response, reverse("admin_queue_changes"))
+        self.assertEqual(self.client.get(reverse("admin_queue_stream")).status_code, 501)
+
+        self.client.logout()
+        self.assertEqual(self.client.get(reverse("admin_queue_changes")).status_code, 302)
+
+    async def test_asgi_stream_opens_for_staff(self):
+        client = AsyncClient()
+        self.assertEqual((await client.get(reverse("admin_queue_stream"))).status_code, 403)
+
+        await client.aforce_login(self.staff)
+        response = await client.get(reverse("admin_queue_stream"))
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        chunks = aiter(response.streaming_content)
+        self.assertEqual(await anext(chunks), b"retry: 5000\n\n")
+        await chunks.aclose()
+
+
+class TicketRatingAggregateTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.ticket = Ticket.objects.create(category=Category.objects.create(name="IT"), subject="Printer", message="Jammed")
+
+    def aggregates(self):
+        return Ticket.objects.values_list("rating_count", "rating_sum", "rating_avg").get(pk=self.ticket.pk)
+
+    def test_create_edit_and_delete_keep_aggregates(self):
+        low = TicketRating.objects.create(ticket=self.ticket, score=2)
+        TicketRating.objects.create(ticket=self.ticket, score=5)
+        self.assertEqual(self.aggregates(), (2, 7, 3.5))
+
+        low.score = 4
+        low.save()
+        self.assertEqual(self.aggregates(), (2, 9, 4.5))
+
+        low.delete()
+        self.assertEqual(self.aggregates(), (1, 5, 5.0))
+
+        TicketRating.objects.filter(ticket=self.ticket).delete()
+        self.assertEqual(self.aggregates(), (0, 0, None))
+
+    def test_failed_event_rolls_back_the_rating(self):
+        with mock.patch.object(events, "record", side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                TicketRating.objects.create(ticket=self.ticket, score=3)
+        self.assertFalse(TicketRating.objects.filter(ticket=self.ticket).exists())
+        self.assertEqual(self.aggregates(), (0, 0, None))
+
+    def test_failed_counter_rolls_back_the_comment(self):
+        with mock.patch.object(Ticket, "apply_comment", side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                TicketComment.objects.create(ticket=self.ticket, author_name="staff", text="On it")
+        self.assertFalse(TicketComment.objects.filter(ticket=self.ticket).exists())
+
+
+class TicketAdminSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name="IT")
+        cls.printer = Ticket.objects.create(
+            category=category, subject="Printer", message="Paper jam on floor 3", name="Ann", email="ann@example.com"
+        )
+        cls.wifi = Ticket.objects.create(
+            category=category, subject="Wi-Fi", message="No signal", name="Bob", email="bob@example.com"
+        )
+
+    def search(self, term):
+        model_admin = complaints_admin.TicketAdmin(Ticket, complaints_admin.admin.site)
+        queryset, _ = model_admin.get_search_results(None, Ticket.objects.all(), term)
+        return queryset
+
+    def test_other_backends_search_message_and_contact(self):
+        self.assertEqual(list(self.search("jam")), [self.printer])
+        self.assertEqual(list(self.search("bob@")), [self.wifi])
+        self.assertEqual(list(self.search(str(self.wifi.pk))), [self.wifi])
+
+    def test_postgresql_combines_full_text_with_contact_lookups(self):
+        with mock.patch.object(complaints_admin, "connection", mock.Mock(vendor="postgresql")):
+            sql = str(self.search("ann").query)
+            by_id = list(self.search(str(self.printer.pk)))
+        self.assertIn("plainto_tsquery", sql)
+        self.assertIn('"name"', sql)
+        self.assertIn('"email"', sql)
+        self.assertEqual(by_id, [self.printer])
+
+    @override_settings(STORAGES=PLAIN_STORAGES)
+    def test_changelist_filters_by_category_id_without_listing_categories(self):
+        other = Category.objects.create(name="Facilities")
+        Ticket.objects.filter(pk=self.wifi.pk).update(category=other)
+        self.client.force_login(get_user_model().objects.create_superuser("root", password="x"))
+        url = reverse("admin:complaints_ticket_changelist")
+        response = self.client.get(url, {"category__id__exact": other.pk})
+        self.assertEqual(list(response.context["cl"].result_list), [self.wifi])
+        self.assertNotContains(self.client.get(url), "By category")
+
+
+class EstimatedCountPaginatorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name="IT")
+        Ticket.objects.bulk_create(
+            Ticket(category=category, subject=f"T{i}", message="x", status=Ticket.OPEN if i % 2 else Ticket.CLOSED)
+            for i in range(4)
+        )
+
+    def fake_postgresql(self, estimate):
+        fake = mock.MagicMock(vendor="postgresql")
+        fake.cursor.return_value.__enter__.return_value.fetchone.return_value = (estimate,)
+        return mock.patch.object(complaints_admin, "connection", fake)
+
+    def test_exact_count_on_other_backends(self):
+        self.assertEqual(complaints_admin.EstimatedCountPaginator(Ticket.objects.all(), 2).count, 4)
+
+    def test_unfiltered_list_uses_planner_estimate(self):
+        with self.fake_postgresql(250_000):
+            self.assertEqual(complaints_admin.EstimatedCountPaginator(Ticket.objects.all(), 2).count, 250_000)
+
+    def test_small_tables_and_filtered_lists_count_exactly(self):
+        with self.fake_postgresql(3):
+            self.assertEqual(complaints_admin.EstimatedCountPaginator(Ticket.objects.all(), 2).count, 4)
+        with self.fake_postgresql(250_000):
+            paginator = complaints_admin.EstimatedCountPaginator(Ticket.objects.filter(status=Ticket.OPEN), 2)
+            self.assertEqual(paginator.count, 2)
+
+
+@override_settings(STORAGES=PLAIN_STORAGES)
+class ArchiveTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name="IT")
+        cls.open, cls.closed = [
+            Ticket.objects.create(category=category, subject=subject, message="Broken", status=status)
+            for subject, status in (("Printer", Ticket.OPEN), ("Heater", Ticket.CLOSED))
+        ]
+        created = timezone.now() - timedelta(days=2)
+        Ticket.objects.update(created_at=created, first_answered_at=created + timedelta(hours=1))
+        Ticket.objects.filter(pk=cls.closed.pk).update(closed_at=created + timedelta(hours=5))
+        TicketComment.objects.create(ticket=cls.closed, author_name="staff", text="Replaced")
+        TicketRating.objects.create(ticket=cls.closed, score=4)
+
+    def rebuild(self):
+        call_command("backfill_rollups", stdout=StringIO())
+        call_command("rebuild_sla", stdout=StringIO())
+        created = sum(TicketRollup.objects.filter(metric=TicketRollup.CREATED).values_list("count", flat=True))
+        observed = dict(
+            SlaAggregate.objects.filter(category=None, priority="").values_list("metric", "count")
+        )
+        return created, observed
+
+    def test_rebuild_keeps_archived_tickets(self):
+        before = self.rebuild()
+        self.assertEqual(archive.archive_tickets([self.open.pk, self.closed.pk]), 1)
+        self.assertEqual(self.rebuild(), before)
+        self.assertEqual(before, (2, {SlaAggregate.RESPONSE: 2, SlaAggregate.RESOLUTION: 1}))
+
+    def test_detail_falls_back_to_archive(self):
+        archive.archive_tickets([self.closed.pk])
+        self.client.force_login(get_user_model().objects.create_user("moderator", password="x", is_staff=True))
+
+        page = self.client.get(reverse("ticket_detail", args=[self.closed.pk]))
+        self.assertTrue(page.context["archived"])
+        self.assertEqual([c["text"] for c in page.context["comments"]], ["Replaced"])
+
+        api = self.client.get(reverse("api_ticket_detail", args=[self.closed.pk]), HTTP_ACCEPT="application/json")
+        self.assertEqual(api.status_code, 200)
+        self.assertEqual((api.json()["subject"], api.json()["average_rating"]), ("Heater", 4.0))
+        self.assertEqual(self.client.get(reverse("ticket_detail", args=[10**6])).status_code, 404)
+
+
+@override_settings(STORAGES=PLAIN_STORAGES)
+class BenchmarkCommandTests(TestCase):
+    def bench(self, **options):
+        out = StringIO()
+        call_command("benchmark", size=5, requests=1, routes="index", stdout=out, **options)
+        return out.getvalue()
+
+    def test_seed_needs_debug_or_explicit_flag(self):
+        with self.assertRaisesMessage(CommandError, "--allow-seed"):
+            self.bench(seed=True)
+        self.assertFalse(Ticket.objects.exists())
+
+    def test_seeds_and_removes_its_superuser(self):
+        output = self.bench(seed=True, allow_seed=True)
+
+        self.assertEqual(Ticket.objects.count(), 5)
+        self.assertIn("index", output)
+        self.assertFalse(get_user_model().objects.filter(username="benchmark").exists())
+
+    def test_seed_fills_derived_tables(self):
+        self.bench(seed=True, allow_seed=True)
+
+        self.assertFalse(Ticket.objects.filter(reporter__isnull=True).exists())
+        self.assertEqual(Reporter.objects.aggregate(n=Sum("ticket_count"))["n"], 5)
+        self.assertEqual(TicketEvent.objects.filter(kind=TicketEvent.CREATED).count(), 5)
+        self.assertEqual(TicketEvent.objects.filter(kind=TicketEvent.RATED).count(), TicketRating.objects.count())
+        self.assertEqual(TicketRollup.objects.filter(metric=TicketRollup.CREATED).aggregate(n=Sum("count"))["n"], 5)
+        self.assertEqual(TicketFingerprint.objects.count(), 5)
+
+    def test_asgi_scope_is_measured_and_compared(self):
+        Ticket.objects.create(category=Category.objects.create(name="IT"), subject="Printer", message="Jammed")
+        with tempfile.TemporaryDirectory() as tmp:
+            baseline = os.path.join(tmp, "baseline.json")
+            call_command(
+                "benchmark",
+                size=1,
+                requests=1,
+                routes="index",
+                asgi=True,
+                concurrency=2,
+                baseline=baseline,
+                save_baseline=True,
+                stdout=StringIO(),
+            )
+            with open(baseline) as f:
+                asgi = json.load(f)["routes"]["index"]["asgi"]
+        self.assertEqual((asgi["requests"], asgi["errors"]), (2, 0))
+
+    def test_keeps_an_existing_benchmark_user(self):
+        user = get_user_model().objects.create_user("benchmark", is_staff=True)
+        with override_settings(DEBUG=True):
+            self.bench(seed=True)
+        self.assertTrue(get_user_model().objects.filter(pk=user.pk).exists())
+
+
+class ReporterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name="IT")
+        cls.user = get_user_model().objects.create_user("ann", password="x", first_name="Ann")
+
+    def file(self, **fields):
+        return Ticket.objects.create(category=self.category, subject="Printer", message="Jammed", **fields)
+
+    def totals(self, reporter):
+        return Reporter.objects.values_list("ticket_count", "rating_count", "rating_sum").get(pk=reporter.pk)
+
+    def test_matches_by_account_then_email_then_name(self):
+        by_user = self.file(user=self.user, email="other@example.com")
+        by_email = [self.file(email=email) for email in ("Bob@Example.com", " bob@example.com ")]
+        by_name = [self.file(name=name) for name in ("Carol  Smith", "carol smith")]
+        anonymous = self.file(name="Dan", is_anonymous=True)
+
+        self.assertEqual(by_user.reporter.user, self.user)
+        self.assertEqual(by_email[0].reporter_id, by_email[1].reporter_id)
+        self.assertEqual(by_name[0].reporter_id, by_name[1].reporter_id)
+        self.assertNotEqual(by_email[0].reporter_id, by_name[0].reporter_id)
+        self.assertIsNone(anonymous.reporter)
+        self.assertEqual(self.totals(by_email[0].reporter), (2, 0, 0))
+
+    def test_for_ticket_reuses_reporter_created_concurrently(self):
+        existing = Reporter.objects.create(email="bob@example.com", display_name="Bob")
+        real_first = QuerySet.first
+        misses = [None]
+
+        def first(queryset):
+            # первый поиск "не видит" строку, созданную параллельным запросом
+            return misses.pop() if misses else real_first(queryset)
+
+        with mock.patch.object(QuerySet, "first", first):
+            reporter = Reporter.for_ticket(Ticket(email="Bob@example.com", name="Bob"))
+
+        self.assertEqual(reporter, existing)
+        self.assertEqual(Reporter.objects.count(), 1)
+
+    def test_deleting_tickets_updates_totals(self):
+        tickets = [self.file(email="bob@example.com") for _ in range(4)]
+        for ticket in tickets:
+            TicketRating.objects.create(ticket=ticket, score=4)
+        reporter = tickets[0].reporter
+        model_admin = complaints_admin.TicketAdmin(Ticket, complaints_admin.admin.site)
+
+        self.client.delete(reverse("api_ticket_detail", args=[tickets[0].pk]))
+        self.assertEqual(self.totals(reporter), (3, 3, 12))
+        model_admin.delete_model(None, tickets[1])
+        self.assertEqual(self.totals(reporter), (2, 2, 8))
+        model_admin.delete_queryset(None, Ticket.objects.filter(pk=tickets[2].pk))
+        self.assertEqual(self.totals(reporter), (1, 1, 4))
+
+        Ticket.objects.filter(pk=tickets[3].pk).update(status=Ticket.CLOSED)
+        archive.archive_tickets([tickets[3].pk])
+        self.file(email="bob@example.com")
+        call_command("clear_tickets", stdout=StringIO())
+        # архивный тикет остаётся в статистике
+        self.assertEqual(self.totals(reporter), (1, 1, 4))
+
+
+class AdminTicketBatchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name="IT")
+        cls.tickets = [Ticket.objects.create(category=category, subject=f"T{i}", message="Broken") for i in range(3)]
+        cls.staff = get_user_model().objects.create_user("moderator", password="x", is_staff=True)
+
+    def batch(self, **data):
+        data.setdefault("ids", [t.pk for t in self.tickets])
+        return self.client.post(reverse("admin_ticket_batch"), data)
+
+    def test_staff_only(self):
+        self.assertEqual(self.batch(status=Ticket.CLOSED).status_code, 302)
+        self.client.force_login(get_user_model().objects.create_user("student", password="x"))
+        self.assertEqual(self.batch(status=Ticket.CLOSED).status_code, 302)
+        self.assertFalse(Ticket.objects.filter(status=Ticket.CLOSED).exists())
+
+    def test_rejects_invalid_input(self):
+        self.client.force_login(self.staff)
+        cases = [
+            ({"status": "done"}, "Invalid status"),
+            ({"priority": "urgent"}, "Invalid priority"),
+            ({"is_answered": "maybe"}, "Invalid answered flag"),
+            ({"ids": ["x"], "status": Ticket.CLOSED}, "Invalid ticket id"),
+            ({}, "Nothing to change"),
+        ]
+        for data, error in cases:
+            with self.subTest(data=data):
+                response = self.batch(**data)
+                self.assertEqual((response.status_code, response.json()["error"]), (400, error))
+        with mock.patch("complaints.views.MAX_BATCH_SIZE", 2):
+            self.assertIn("At most 2", self.batch(status=Ticket.CLOSED).json()["error"])
+        self.assertEqual(self.client.get(reverse("admin_ticket_batch")).status_code, 405)
+        self.assertFalse(LogEntry.objects.exists())
+
+    def test_updates_tickets_and_writes_log_entries(self):
+        self.client.force_login(self.staff)
+        before = Ticket.objects.get(pk=self.tickets[0].pk).updated_at
+
+        response = self.batch(ids=[t.pk for t in self.tickets[:2]] + [10**6], status=Ticket.CLOSED, priority=Ticket.HIGH)
+
+        self.assertEqual((response.json()["updated"], response.json()["missing"]), (2, [10**6]))
+        changed = Ticket.objects.filter(status=Ticket.CLOSED, priority=Ticket.HIGH, updated_at__gt=before)
+        self.assertEqual(changed.count(), 2)
+        self.assertEqual(
+            sorted(LogEntry.objects.filter(user=self.staff).values_list("object_id", flat=True)),
+            sorted(str(t.pk) for t in self.tickets[:2]),
+        )
+        self.assertEqual(Ticket.objects.get(pk=self.tickets[2].pk).status, Ticket.OPEN)
+
+
+class TicketEventLogTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name="IT")
+        cls.staff = get_user_model().objects.create_user("moderator", password="x", is_staff=True)
+
+    def log(self, ticket_id):
+        return list(
+            TicketEvent.objects.filter(ticket_id=ticket_id)
+            .order_by("pk")
+            .values_list("kind", "old_value", "new_value", "actor_id")
+        )
+
+    def test_create_change_rate_and_delete(self):
+        self.client.force_login(self.staff)
+        response = self.client.post(
+            reverse("api_tickets"),
+            {"category": self.category.pk, "type": Ticket.COMPLAINT, "subject": "Heater", "message": "Cold room"},
+        )
+        pk = response.json()["id"]
+        self.client.patch(
+            reverse("api_ticket_detail", args=[pk]),
+            {"status": Ticket.CLOSED, "answer": "Fixed the valve", "priority": Ticket.MEDIUM},
+            content_type="application/json",
+        )
+        TicketRating.objects.create(ticket_id=pk, score=5)
+
+        self.assertEqual(
+            self.log(pk),
+            [
+                (TicketEvent.CREATED, "", Ticket.OPEN, self.staff.pk),
+                (TicketEvent.STATUS, Ticket.OPEN, Ticket.CLOSED, self.staff.pk),
+                (TicketEvent.ANSWER, "", "set", self.staff.pk),
+                (TicketEvent.RATED, "", "5", None),
+            ],
+        )
+        # журнал не привязан FK и переживает удаление тикета
+        self.client.delete(reverse("api_ticket_detail", args=[pk]))
+        self.assertEqual(len(self.log(pk)), 4)
+
+    def test_compact_events(self):
+        live, archived = [
+            Ticket.objects.create(category=self.category, subject=s, message="x", status=Ticket.CLOSED)
+            for s in ("Live", "Archived")
+        ]
+        events.record([events.created_event(t) for t in (live, archived)])
+        archive.archive_tickets([archived.pk])
+        old = timezone.now() - timedelta(days=400)
+        events.record(
+            [
+                TicketEvent(ticket_id=live.pk, category_id=self.category.pk, kind=kind, new_value="x", created_at=old)
+                for kind in (TicketEvent.CREATED, TicketEvent.STATUS)
+            ]
+            + [TicketEvent(ticket_id=10**6, category_id=self.category.pk, kind=TicketEvent.STATUS, new_value="x")]
+        )
+
+        call_command("compact_events", keep_created=True, batch_size=1, stdout=StringIO())
+        self.assertEqual(TicketEvent.objects.filter(created_at=old).get().kind, TicketEvent.CREATED)
+
+        call_command("compact_events", prune_orphans=True, stdout=StringIO())
+        self.assertEqual(sorted(TicketEvent.objects.values_list("ticket_id", flat=True)), [live.pk, archived.pk])
+
+
+class TicketRollupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.it, cls.dorm = Category.objects.create(name="IT"), Category.objects.create(name="Dormitory")
+        cls.hour = timezone.now().replace(minute=0, second=0, microsecond=0) - timedelta(hours=3)
+
+    def event(self, category, kind=TicketEvent.CREATED, value=Ticket.OPEN, minutes=5, priority=Ticket.MEDIUM):
+        return TicketEvent(
+            ticket_id=1,
+            category_id=category.pk,
+            priority=priority,
+            kind=kind,
+            new_value=value,
+            created_at=self.hour + timedelta(minutes=minutes),
+        )
+
+    def test_apply_counts_created_and_status_events(self):
+        rollups.apply(
+            [
+                self.event(self.it),
+                self.event(self.it, minutes=50),
+                self.event(self.dorm, priority=Ticket.HIGH),
+                self.event(self.it, TicketEvent.STATUS, Ticket.CLOSED),
+                self.event(self.it, TicketEvent.RATED, "5"),
+            ]
+        )
+        rows = TicketRollup.objects.order_by("metric", "category__name").values_list(
+            "bucket", "metric", "category__name", "status", "count"
+        )
+        self.assertEqual(
+            list(rows),
+            [
+                (self.hour, TicketRollup.CREATED, "Dormitory", "", 1),
+                (self.hour, TicketRollup.CREATED, "IT", "", 2),
+                (self.hour, TicketRollup.STATUS, "IT", Ticket.CLOSED, 1),
+            ],
+        )
+
+    def test_increment_retries_after_concurrent_insert(self):
+        key = (self.hour, TicketRollup.CREATED, self.it.pk, Ticket.MEDIUM, "")
+        rollups.increment(key, 2)
+        real_update = QuerySet.update
+        misses = [0]
+
+        def update(queryset, **kwargs):
+            # первый UPDATE не видит строку, вставленную параллельно
+            return misses.pop() if misses else real_update(queryset, **kwargs)
+
+        with mock.patch.object(QuerySet, "update", update):
+            rollups.increment(key, 3)
+
+        self.assertEqual(TicketRollup.objects.get().count, 5)
+
+    def test_analytics_endpoint(self):
+        rollups.apply([self.event(self.it), self.event(self.dorm), self.event(self.it, minutes=90)])
+        url = reverse("api_analytics_tickets")
+        window = {"start": (self.hour - timedelta(hours=1)).isoformat(), "end": timezone.now().isoformat()}
+
+        hourly = self.client.get(url, {**window, "resolution": "hour"}).json()
+        self.assertEqual([point["count"] for point in hourly["series"]], [2, 1])
+        by_category = self.client.get(url, {**window, "group_by": "category"}).json()
+        self.assertEqual(sorted((p["key"], p["count"]) for p in by_category["series"]), [("Dormitory", 1), ("IT", 2)])
+
+        for params in (
+            {"metric": "rated"},
+            {"resolution": "minute"},
+            {"group_by": "email"},
+            {"start": "yesterday"},
+            {"start": window["end"], "end": window["start"]},
+            {"resolution": "hour", "start": (timezone.now() - timedelta(days=40)).isoformat()},
+        ):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get(url, params).status_code, 400)
+
+
+class SlaTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.it, cls.dorm = Category.objects.create(name="IT"), Category.objects.create(name="Dormitory")
+
+    def test_percentile_within_bucket_error(self):
+        self.assertIsNone(sla.percentile([0] * sla.BUCKETS, 0.5))
+        self.assertEqual(sla.bucket_for(30), 0)
+        self.assertEqual(sla.bucket_for(10**9), sla.BUCKETS - 1)
+        values = [60 * 1.1**i for i in range(100)]
+        histogram = [0] * sla.BUCKETS
+        for seconds in values:
+            histogram[sla.bucket_for(seconds)] += 1
+        for q in (0.5, 0.95):
+            exact = values[round(q * len(values)) - 1]
+            self.assertLess(abs(sla.percentile(histogram, q) - exact) / exact, 0.13)
+
+    def test_observe_and_api(self):
+        tickets = [
+            Ticket(category=category, priority=Ticket.HIGH, created_at=timezone.now())
+            for category in (self.it, self.it, self.dorm)
+        ]
+        sla.observe([(t, SlaAggregate.RESPONSE, seconds) for t, seconds in zip(tickets, (600, 1200, 3600))])
+        sla.observe([(tickets[0], SlaAggregate.RESPONSE, -5)])
+
+        overall = SlaAggregate.objects.get(category=None, priority="")
+        self.assertEqual((overall.count, overall.total_seconds, overall.histogram), (4, 5400, []))
+        self.assertEqual(SlaAggregate.objects.get(category=self.it, priority=Ticket.HIGH).count, 3)
+
+        results = self.client.get(reverse("api_sla"), {"metric": SlaAggregate.RESPONSE}).json()["results"]
+        summary = next(row for row in results if row["category"] is None and row["priority"] is None)
+        self.assertEqual((summary["count"], summary["avg_seconds"]), (4, 1350))
+        # гистограмма общей строки собирается из строк по категориям
+        self.assertEqual(summary["p95_seconds"], sla.bucket_value(sla.bucket_for(3600)))
+        self.assertEqual(self.client.get(reverse("api_sla"), {"metric": "resolution"}).json(), {"results": []})
+
+
+class DuplicateTicketTests(TestCase):
+    TEXT = {"subject": "Printer on floor 3 is jammed", "message": "The printer on floor 3 jams on every page."}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name="IT")
+        cls.original = Ticket.objects.create(category=cls.category, **cls.TEXT)
+
+    def form(self, **extra):
+        data = {
+            "category": self.category.pk,
+            "type": Ticket.COMPLAINT,
+            "priority": Ticket.MEDIUM,
+            "name": "Ann",
+            "email": "ann@example.com",
+            **self.TEXT,
+            **extra,
+        }
+        return TicketForm(data=data)
+
+    def test_form_asks_to_confirm_a_duplicate(self):
+        form = self.form()
+        self.assertFalse(form.is_valid())
+        self.assertIn(f"#{self.original.pk}", form.non_field_errors()[0])
+        self.assertEqual([t for t, _ in form.duplicates], [self.original])
+
+        form = self.form(confirm_duplicate="on")
+        self.assertTrue(form.is_valid(), form.errors)
+        self.assertEqual(form.save().duplicate_of, self.original)
+
+    def test_closed_tickets_are_not_duplicates(self):
+        Ticket.objects.filter(pk=self.original.pk).update(status=Ticket.CLOSED)
+        self.assertTrue(self.form().is_valid())
+
+    def test_api_links_duplicates(self):
+        def create(**text):
+            data = {"category": self.category.pk, "type": Ticket.COMPLAINT, **text}
+            return self.client.post(reverse("api_tickets"), data).json()["id"]
+
+        linked = create(**self.TEXT)
+        unrelated = create(subject="Cafeteria", message="Soup was cold today")
+
+        self.assertEqual(Ticket.objects.get(pk=linked).duplicate_of, self.original)
+        self.assertIsNone(Ticket.objects.get(pk=unrelated).duplicate_of)
+
+    def test_reindexes_only_when_the_text_changes(self):
+        ticket = Ticket.objects.get(pk=self.original.pk)
+        with mock.patch.object(similarity, "index_ticket") as index:
+            ticket.status = Ticket.IN_PROGRESS
+            ticket.save()
+            index.assert_not_called()
+
+            ticket.message = "The printer on floor 4 jams too."
+            ticket.save()
+            ticket.save()
+        index.assert_called_once_with(ticket)
+
+    def test_cluster_command_links_to_oldest(self):
+        copy = Ticket.objects.create(category=self.category, **self.TEXT)
+        call_command("cluster_tickets", workers=1, link=True, stdout=StringIO())
+        self.assertEqual(Ticket.objects.get(pk=copy.pk).duplicate_of, self.original)
+
+
+@skipUnless(classifier.np is not None, "NumPy is not installed")
+class ClassifierTests(TestCase):
+    EXAMPLES = [
+        ("IT", Ticket.HIGH, "Wi-Fi is down", "No wifi signal in the library, the router is offline"),
+        ("IT", Ticket.HIGH, "Printer offline", "The printer and the wifi router in the lab are offline"),
+        ("Dormitory", Ticket.LOW, "Heater broken", "The heater in my dormitory room is cold at night"),
+        ("Dormitory", Ticket.LOW, "Window draft", "Cold air from the dormitory window, the heater is weak"),
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.categories = {name: Category.objects.create(name=name) for name in ("IT", "Dormitory")}
+        for name, priority, subject, message in cls.EXAMPLES:
+            Ticket.objects.create(category=cls.categories[name], priority=priority, subject=subject, message=message)
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, "model.npz")
+        settings = override_settings(TICKET_CLASSIFIER_PATH=self.path)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.addCleanup(classifier._cache.update, {"mtime": None, "model": None})
+
+    def train(self):
+        call_command("train_classifier", stdout=StringIO())
+
+    def suggestion(self, subject, message):
+        ticket = Ticket(subject=subject, message=message)
+        classifier.suggest(ticket)
+        return ticket.suggested_category_id, ticket.suggested_priority
+
+    def test_train_and_predict(self):
+        self.assertEqual(self.suggestion("Router", "wifi offline again"), (None, ""))
+        self.train()
+        self.assertEqual(self.suggestion("Router", "wifi offline again"), (self.categories["IT"].pk, Ticket.HIGH))
+        self.assertEqual(
+            self.suggestion("Cold", "heater in the dormitory"), (self.categories["Dormitory"].pk, Ticket.LOW)
+        )
+        predictions = classifier.get_classifier().predict_many([("wifi", "router offline"), ("", "")])
+        self.assertEqual(predictions, [(self.categories["IT"].pk, Ticket.HIGH), (None, None)])
+
+    def test_reloads_when_the_file_changes(self):
+        self.train()
+        first = classifier.get_classifier()
+        self.assertIs(classifier.get_classifier(), first)
+
+        self.train()
+        stat = os.stat(self.path)
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self.assertIsNot(classifier.get_classifier(), first)
+
+    def test_skips_deleted_categories(self):
+        self.train()
+        Ticket.objects.filter(category=self.categories["IT"]).delete()
+        self.categories["IT"].delete()
+
+        self.assertEqual(self.suggestion("Router", "wifi offline again"), (None, Ticket.HIGH))
+        misfiled = Ticket.objects.create(category=self.categories["Dormitory"], subject="Router", message="wifi offline")
+        call_command("reclassify_tickets", stdout=StringIO())
+        misfiled.refresh_from_db()
+        self.assertEqual((misfiled.suggested_category_id, misfiled.suggested_priority), (None, Ticket.HIGH))
+
+
+@override_settings(DEBUG=False)
+class StaticManifestCheckTests(SimpleTestCase):
+    MANIFEST_STORAGES = {
+        **PLAIN_STORAGES,
+        "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.ManifestStaticFilesStorage"},
+    }
+
+    def test_deploy_only(self):
+        self.assertEqual(checks.run_checks(tags=["staticfiles"]), [])
+
+    def test_missing_manifest(self):
+        with tempfile.TemporaryDirectory() as root, override_settings(STATIC_ROOT=root, STORAGES=self.MANIFEST_STORAGES):
+            found = checks.run_checks(tags=["staticfiles"], include_deployment_checks=True)
+        self.assertIn("complaints.W001", [message.id for message in found])
+
+    def test_skipped_without_manifest_storage(self):
+        with tempfile.TemporaryDirectory() as root, override_settings(STATIC_ROOT=root, STORAGES=PLAIN_STORAGES):
+            found = checks.run_checks(tags=["staticfiles"], include_deployment_checks=True)
+        self.assertNotIn("complaints.W001", [message.id for message in found])
+
+
+class ClearTicketsTests(TestCase):
+    def test_cascade_skips_per_row_aggregate_updates(self):
+        category = Category.objects.create(name="IT")
+        for i in range(3):
+            ticket = Ticket.objects.create(category=category, subject=f"T{i}", message="x", email="a@example.com")
+            TicketComment.objects.create(ticket=ticket, author_name="staff", text="On it")
+            TicketRating.objects.create(ticket=ticket, score=3)
+
+        with mock.patch.object(Ticket, "recompute_activity") as recompute, mock.patch.object(Ticket, "apply_rating") as rating:
+            call_command("clear_tickets", stdout=StringIO())
+
+        recompute.assert_not_called()
+        rating.assert_not_called()
+        self.assertFalse(TicketComment.objects.exists() or TicketRating.objects.exists() or Ticket.objects.exists())
+        self.assertEqual(TicketTombstone.objects.count(), 3)
+        self.assertEqual(Reporter.objects.get().ticket_count, 0)
+
+
+@override_settings(STORAGES=PLAIN_STORAGES)
+class DashboardLeaderboardTests(TestCase):
+    def test_email_only_reporters_are_masked(self):
+        category = Category.objects.create(name="IT")
+        ticket = Ticket.objects.create(category=category, subject="Printer", message="Jammed", email="secret@example.com")
+        Ticket.objects.create(category=category, subject="Wi-Fi", message="Down", name="Ann Lee")
+
+        response = self.client.get(reverse("dashboard"))
+
+        self.assertNotContains(response, "secret@example.com")
+        names = [row["name"] for row in response.context["leaderboard"]]
+        self.assertEqual(sorted(names), sorted(["Ann Lee", f"Reporter #{ticket.reporter_id}"]))
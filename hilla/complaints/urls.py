@@ -6,10 +6,15 @@ urlpatterns = [
     path("dashboard/", views.dashboard, name="dashboard"),
     path("create/", views.create, name="create"),
     path("ticket/<int:pk>/", views.ticket_detail, name="ticket_detail"),
+    path("ticket/<int:pk>/comments/", views.ticket_comments, name="ticket_comments"),
+    path("ticket/<int:pk>/ratings/", views.ticket_ratings, name="ticket_ratings"),
     path("ticket/<int:pk>/rate/", views.rate_ticket, name="rate_ticket"),
     path("create-admin/", views.create_admin, name="create_admin"),
     path("seed-demo/", views.seed_demo_view, name="seed_demo"),
     path("admin-queue/", views.admin_queue, name="admin_queue"),
+    path("admin-queue/stream/", views.admin_queue_stream, name="admin_queue_stream"),
+    path("admin-queue/changes/", views.admin_queue_changes, name="admin_queue_changes"),
+    path("admin-queue/batch/", views.admin_ticket_batch, name="admin_ticket_batch"),
     path("admin-queue/<int:pk>/status/", views.admin_ticket_status, name="admin_ticket_status"),
     path("signup/", views.signup, name="signup"),
     path("account/", views.account, name="account"),
@@ -18,5 +23,10 @@ urlpatterns = [
     # REST API
     path("api/tickets/", views.TicketListCreateAPI.as_view(), name="api_tickets"),
     path("api/tickets/<int:pk>/", views.TicketDetailAPI.as_view(), name="api_ticket_detail"),
+    path("api/tickets/sync/", views.TicketSyncAPI.as_view(), name="api_tickets_sync"),
+    path("api/tickets/bulk/", views.TicketBulkAPI.as_view(), name="api_tickets_bulk"),
+    path("api/analytics/tickets/", views.analytics_tickets, name="api_analytics_tickets"),
+    path("api/sla/", views.sla_metrics, name="api_sla"),
     path("api/ai/generate/", views.ai_generate, name="api_ai_generate"),
+    path("api/ai/metrics/", views.ai_metrics, name="api_ai_metrics"),
 ]
@@ -1,23 +1,48 @@
+import asyncio
 import json
-import os
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from types import SimpleNamespace
 
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth import get_user_model, login
 from django.contrib.auth.decorators import login_required, user_passes_test
-from django.db.models import Count, Avg, Q
+from django.db import transaction
+from django.db.models import Count, Avg, Q, Sum
 from django.db.models.functions import Coalesce
-from django.http import JsonResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, HttpResponseForbidden, JsonResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.shortcuts import render, redirect, get_object_or_404
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from django.core.management import call_command
 
-from .models import Ticket, Category
+from . import ai, archive, classifier, events, renderers, rollups, similarity, sla, sync
+from . import live
+from .live import feed
+from .models import (
+    ArchivedTicket,
+    ArchiveTotal,
+    Category,
+    Reporter,
+    SlaAggregate,
+    Ticket,
+    TicketComment,
+    TicketRating,
+    TicketRollup,
+    TicketTombstone,
+)
 from .forms import TicketForm, TicketRatingForm, AdminCreateForm, AvatarForm, SignUpForm
+from .services import MAX_BATCH_SIZE, PRIORITY_VALUES, STATUS_VALUES, clean_changes, update_tickets
 from users.models import Profile
 
 # DRF
 from rest_framework import generics
-from .serializers import TicketSerializer
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from .serializers import ArchivedTicketSerializer, TicketSerializer, ticket_rows
 
 
 def _is_staff_user(user):
@@ -53,12 +78,16 @@ def index(request):
 
     categories = Category.objects.order_by("name")
 
-    stats = {
-        "total": Ticket.objects.count(),
-        "open": Ticket.objects.filter(status=Ticket.OPEN).count(),
-        "in_progress": Ticket.objects.filter(status=Ticket.IN_PROGRESS).count(),
-        "closed": Ticket.objects.filter(status=Ticket.CLOSED).count(),
-    }
+    archived = archive.totals_by(ArchiveTotal.STATUS)
+    archived_closed = archived[Ticket.CLOSED].tickets if Ticket.CLOSED in archived else 0
+    stats = Ticket.objects.aggregate(
+        total=Count("id"),
+        open=Count("id", filter=Q(status=Ticket.OPEN)),
+        in_progress=Count("id", filter=Q(status=Ticket.IN_PROGRESS)),
+        closed=Count("id", filter=Q(status=Ticket.CLOSED)),
+    )
+    stats["total"] += sum(row.tickets for row in archived.values())
+    stats["closed"] += archived_closed
     recent = Ticket.objects.select_related("category").order_by("-created_at")[:3]
     return render(
         request,
@@ -93,7 +122,10 @@ def create(request):
             if ticket.is_anonymous:
                 ticket.name = ""
                 ticket.email = ""
-            ticket.save()
+            classifier.suggest(ticket)
+            with transaction.atomic():
+                ticket.save()
+                events.record_created(ticket, request.user)
             messages.success(request, "Ticket created successfully!")
             return redirect("ticket_detail", pk=ticket.pk)
         first_error = ""
@@ -114,25 +146,140 @@ def create(request):
     return render(request, "complaints/support_form.html", {"form": form})
 
 
+# How many comments/ratings ticket_detail renders; the rest load by cursor.
+DETAIL_PAGE_SIZE = 10
+DETAIL_MAX_PAGE_SIZE = 100
+
+
+def _comment_page(ticket_id, after=0, limit=DETAIL_PAGE_SIZE):
+    rows = list(
+        TicketComment.objects.filter(ticket_id=ticket_id, pk__gt=after).order_by("pk")[: limit + 1]
+    )
+    return rows[:limit], len(rows) > limit
+
+
+def _rating_page(ticket_id, before=None, limit=DETAIL_PAGE_SIZE):
+    rows = TicketRating.objects.filter(ticket_id=ticket_id)
+    if before:
+        rows = rows.filter(pk__lt=before)
+    rows = list(rows.order_by("-pk")[: limit + 1])
+    return rows[:limit], len(rows) > limit
+
+
+def _archived_detail(request, pk):
+    ticket = get_object_or_404(ArchivedTicket.objects.select_related("category"), pk=pk)
+    comments = archive.thaw_items(ticket.comments[:DETAIL_PAGE_SIZE])
+    ratings = archive.thaw_items(ticket.ratings[:DETAIL_PAGE_SIZE])
+    return render(
+        request,
+        "complaints/ticket_detail.html",
+        {
+            "ticket": ticket,
+            "archived": True,
+            "comments": comments,
+            "more_comments": len(ticket.comments) > DETAIL_PAGE_SIZE,
+            "ratings": ratings,
+            "more_ratings": len(ticket.ratings) > DETAIL_PAGE_SIZE,
+            "avg_rating": ticket.rating_avg,
+            "rating_count": ticket.rating_count,
+        },
+    )
+
+
 def ticket_detail(request, pk: int):
-    ticket = get_object_or_404(Ticket.objects.select_related("category"), pk=pk)
+    ticket = Ticket.objects.select_related("category").filter(pk=pk).first()
+    if ticket is None:
+        return _archived_detail(request, pk)
     rating_form = TicketRatingForm()
-    ratings = ticket.ratings.all()
-    avg_rating = ratings.aggregate(avg=Avg("score"))["avg"]
-    comments = ticket.comments.all()
+    comments, more_comments = _comment_page(ticket.pk)
+    ratings, more_ratings = _rating_page(ticket.pk)
     return render(
         request,
         "complaints/ticket_detail.html",
         {
             "ticket": ticket,
             "comments": comments,
+            "more_comments": more_comments,
             "ratings": ratings,
-            "avg_rating": avg_rating,
+            "more_ratings": more_ratings,
+            "avg_rating": ticket.rating_avg,
+            "rating_count": ticket.rating_count,
             "rating_form": rating_form,
         },
     )
 
 
+def _page_limit(request):
+    try:
+        limit = int(request.GET.get("limit") or DETAIL_PAGE_SIZE)
+    except ValueError:
+        limit = DETAIL_PAGE_SIZE
+    return max(1, min(limit, DETAIL_MAX_PAGE_SIZE))
+
+
+def _cursor(request, name):
+    try:
+        return int(request.GET.get(name) or 0)
+    except ValueError:
+        return 0
+
+
+def _archived_page(items, cursor, limit, newer_first):
+    if cursor:
+        items = [i for i in items if (i["id"] < cursor if newer_first else i["id"] > cursor)]
+    page = archive.thaw_items(items[: limit + 1])
+    return [SimpleNamespace(pk=i["id"], **i) for i in page[:limit]], len(page) > limit
+
+
+def ticket_comments(request, pk: int):
+    if Ticket.objects.filter(pk=pk).exists():
+        comments, has_more = _comment_page(pk, _cursor(request, "after"), _page_limit(request))
+    else:
+        archived = get_object_or_404(ArchivedTicket.objects.only("comments"), pk=pk)
+        comments, has_more = _archived_page(
+            archived.comments, _cursor(request, "after"), _page_limit(request), newer_first=False
+        )
+    return JsonResponse(
+        {
+            "results": [
+                {
+                    "id": c.pk,
+                    "author_name": c.author_name,
+                    "text": c.text,
+                    "created_at": c.created_at.isoformat(),
+                }
+                for c in comments
+            ],
+            "next": comments[-1].pk if has_more else None,
+        }
+    )
+
+
+def ticket_ratings(request, pk: int):
+    if Ticket.objects.filter(pk=pk).exists():
+        ratings, has_more = _rating_page(pk, _cursor(request, "before"), _page_limit(request))
+    else:
+        archived = get_object_or_404(ArchivedTicket.objects.only("ratings"), pk=pk)
+        ratings, has_more = _archived_page(
+            archived.ratings, _cursor(request, "before"), _page_limit(request), newer_first=True
+        )
+    return JsonResponse(
+        {
+            "results": [
+                {
+                    "id": r.pk,
+                    "score": r.score,
+                    "rater_name": r.rater_name,
+                    "comment": r.comment,
+                    "created_at": r.created_at.isoformat(),
+                }
+                for r in ratings
+            ],
+            "next": ratings[-1].pk if has_more else None,
+        }
+    )
+
+
 def rate_ticket(request, pk: int):
     ticket = get_object_or_404(Ticket, pk=pk)
     if request.method != "POST":
@@ -148,30 +295,63 @@ def rate_ticket(request, pk: int):
     return redirect("ticket_detail", pk=pk)
 
 
+def _with_archived(rows, field, archived):
+    """
+    Add archived ticket totals ({key: ArchiveTotal}) to hot-table GROUP BY rows.
+    """
+    counts = {str(row[field]): row["count"] for row in rows}
+    for key, total in archived.items():
+        counts[key] = counts.get(key, 0) + total.tickets
+    return [{field: key, "count": count} for key, count in counts.items()]
+
+
 def dashboard(request):
-    status_counts = (
-        Ticket.objects.values("status")
-        .annotate(count=Count("id"))
-        .order_by()
-    )
-    priority_counts = (
-        Ticket.objects.values("priority")
-        .annotate(count=Count("id"))
-        .order_by()
+    archived = archive.all_totals()
+    status_counts = _with_archived(
+        Ticket.objects.values("status").annotate(count=Count("id")).order_by(),
+        "status",
+        archived.get(ArchiveTotal.STATUS, {}),
     )
-    category_counts = (
-        Category.objects.annotate(count=Count("tickets"))
-        .values("name", "count")
-        .order_by("-count")[:5]
+    priority_counts = _with_archived(
+        Ticket.objects.values("priority").annotate(count=Count("id")).order_by(),
+        "priority",
+        archived.get(ArchiveTotal.PRIORITY, {}),
     )
-    avg_rating = Ticket.objects.aggregate(avg=Avg("ratings__score"))["avg"]
-
-    leaderboard = (
-        Ticket.objects.filter(is_anonymous=False)
-        .values("name")
-        .annotate(total=Count("id"), avg=Avg("ratings__score"))
-        .order_by("-total")[:5]
+    category_totals = _with_archived(
+        Ticket.objects.values("category_id").annotate(count=Count("id")).order_by(),
+        "category_id",
+        archived.get(ArchiveTotal.CATEGORY, {}),
     )
+    names = dict(Category.objects.values_list("id", "name"))
+    category_counts = sorted(
+        ({"name": names.get(int(row["category_id"]), "-"), "count": row["count"]} for row in category_totals),
+        key=lambda row: -row["count"],
+    )[:5]
+
+    ratings = Ticket.objects.aggregate(count=Sum("rating_count"), total=Sum("rating_sum"))
+    rating_count = ratings["count"] or 0
+    rating_sum = ratings["total"] or 0
+    archived_all = archived.get(ArchiveTotal.ALL, {}).get("")
+    if archived_all:
+        rating_count += archived_all.rating_count
+        rating_sum += archived_all.rating_sum
+    avg_rating = rating_sum / rating_count if rating_count else None
+
+    # дашборд публичный: только отображаемое имя, без email
+    leaderboard = [
+        {
+            "name": reporter.display_name or f"Reporter #{reporter.pk}",
+            "total": reporter.ticket_count,
+            "avg": round(reporter.rating_avg, 2) if reporter.rating_count else None,
+        }
+        for reporter in Reporter.objects.filter(ticket_count__gt=0).order_by("-ticket_count", "id")[:5]
+    ]
+
+    sla_rows = []
+    for data in sla.summaries(SlaAggregate.objects.select_related("category").filter(priority="")):
+        data["p50"] = sla.format_duration(data["p50_seconds"])
+        data["p95"] = sla.format_duration(data["p95_seconds"])
+        sla_rows.append(data)
 
     return render(
         request,
@@ -182,10 +362,76 @@ def dashboard(request):
             "category_counts": category_counts,
             "avg_rating": avg_rating,
             "leaderboard": leaderboard,
+            "sla_totals": [row for row in sla_rows if row["category"] is None],
+            "sla_by_category": [row for row in sla_rows if row["category"] is not None],
         },
     )
 
 
+def sla_metrics(request):
+    rows = SlaAggregate.objects.select_related("category")
+    metric = (request.GET.get("metric") or "").strip().lower()
+    if metric:
+        rows = rows.filter(metric=metric)
+    return JsonResponse({"results": sla.summaries(rows)})
+
+
+def analytics_tickets(request):
+    metric = (request.GET.get("metric") or "created").strip().lower()
+    resolution = (request.GET.get("resolution") or "day").strip().lower()
+    group_by = (request.GET.get("group_by") or "").strip().lower()
+
+    if metric not in {TicketRollup.CREATED, TicketRollup.STATUS}:
+        return JsonResponse({"error": "Unknown metric"}, status=400)
+    if resolution not in rollups.RESOLUTIONS:
+        return JsonResponse({"error": "Unknown resolution"}, status=400)
+    if group_by and group_by not in rollups.GROUP_FIELDS:
+        return JsonResponse({"error": "Unknown group_by"}, status=400)
+
+    start = _parse_moment(request.GET.get("start"))
+    end = _parse_moment(request.GET.get("end"))
+    if start is False or end is False:
+        return JsonResponse({"error": "Invalid range"}, status=400)
+    end = end or timezone.now()
+    start = start or end - timedelta(days=7)
+    if start >= end:
+        return JsonResponse({"error": "Invalid range"}, status=400)
+    if end - start > rollups.MAX_RANGE[resolution]:
+        return JsonResponse({"error": f"Range too long for {resolution} resolution"}, status=400)
+
+    return JsonResponse(
+        {
+            "metric": metric,
+            "resolution": resolution,
+            "group_by": group_by or None,
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "series": rollups.series(metric, start, end, resolution, group_by or None),
+        }
+    )
+
+
+def _parse_moment(value):
+    """
+    None for an empty value, False for an unparseable one.
+    """
+    value = (value or "").strip()
+    if not value:
+        return None
+    try:
+        moment = parse_datetime(value)
+        if moment is None:
+            day = parse_date(value)
+            moment = datetime.combine(day, time.min) if day else None
+    except ValueError:
+        moment = None
+    if moment is None:
+        return False
+    if timezone.is_naive(moment):
+        moment = moment.replace(tzinfo=dt_timezone.utc)
+    return moment
+
+
 @login_required
 @user_passes_test(lambda u: u.is_superuser)
 def create_admin(request):
@@ -228,10 +474,11 @@ def admin_queue(request):
     sort = (request.GET.get("sort") or "newest").strip().lower()
     q = (request.GET.get("q") or "").strip()
 
+    # средняя оценка из сохранённого агрегата: без JOIN и GROUP BY очередь
+    # сортируется прямо по индексам
     tickets = (
-        Ticket.objects.select_related("category", "user")
-        .annotate(avg_rating=Coalesce(Avg("ratings__score"), 0.0))
-        .annotate(rating_count=Count("ratings"))
+        Ticket.objects.select_related("category", "user", "suggested_category")
+        .annotate(avg_rating=Coalesce("rating_avg", 0.0))
     )
 
     if status in {Ticket.OPEN, Ticket.IN_PROGRESS, Ticket.CLOSED}:
@@ -250,7 +497,9 @@ def admin_queue(request):
     elif sort == "rating_asc":
         tickets = tickets.order_by("avg_rating", "-created_at")
     elif sort == "priority_desc":
-        tickets = tickets.order_by("-priority", "-created_at")
+        tickets = tickets.order_by("-priority_rank", "-created_at")
+    elif sort == "activity":
+        tickets = tickets.order_by("-last_activity_at", "-id")
     else:
         sort = "newest"
         tickets = tickets.order_by("-created_at")
@@ -262,6 +511,9 @@ def admin_queue(request):
         {
             "tickets": tickets,
             "categories": categories,
+            # под WSGI поток держал бы воркер вечно: страница опрашивает admin_queue_changes
+            "live_stream": isinstance(request, ASGIRequest),
+            "poll_interval_ms": LIVE_POLL_INTERVAL * 1000,
             "filters": {
                 "status": status,
                 "priority": priority,
@@ -273,6 +525,79 @@ def admin_queue(request):
     )
 
 
+# Seconds between SSE keep-alive comments when nothing changes.
+STREAM_HEARTBEAT = 15
+# Seconds between polls of admin_queue_changes when there is no stream.
+LIVE_POLL_INTERVAL = 10
+
+
+def _live_filters(request):
+    return {
+        "status": (request.GET.get("status") or "").strip().lower(),
+        "priority": (request.GET.get("priority") or "").strip().lower(),
+        "category": (request.GET.get("category") or "").strip().lower(),
+        "q": (request.GET.get("q") or "").strip(),
+    }
+
+
+@login_required
+@user_passes_test(_is_staff_user)
+def admin_queue_changes(request):
+    """
+    Polling fallback for the live queue: changes after ?since=&after=.
+    Without a cursor only returns a starting cursor.
+    """
+    since = parse_datetime(request.GET.get("since") or "")
+    changes, removed = [], []
+    if since is None:
+        cursor = live.initial_cursor()
+    else:
+        try:
+            after = int(request.GET.get("after") or 0)
+        except ValueError:
+            return JsonResponse({"error": "Invalid cursor"}, status=400)
+        payloads, cursor = live.fetch_changes((since, after))
+        filters = _live_filters(request)
+        for payload in payloads:
+            event, data = live.change_event(filters, payload)
+            if event == "ticket":
+                changes.append(data)
+            else:
+                removed.append(data["id"])
+    return JsonResponse(
+        {"tickets": changes, "removed": removed, "since": cursor[0].isoformat(), "after": cursor[1]}
+    )
+
+
+async def admin_queue_stream(request):
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse("The live stream needs an ASGI server; poll admin-queue/changes/.", status=501)
+    user = await request.auser()
+    if not user.is_authenticated or not _is_staff_user(user):
+        return HttpResponseForbidden()
+
+    filters = _live_filters(request)
+
+    async def stream():
+        sub = feed.subscribe(filters)
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    event, data = await asyncio.wait_for(sub.queue.get(), timeout=STREAM_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+        finally:
+            feed.unsubscribe(sub)
+
+    response = StreamingHttpResponse(stream(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
 @login_required
 @user_passes_test(_is_staff_user)
 def admin_ticket_status(request, pk: int):
@@ -286,12 +611,71 @@ def admin_ticket_status(request, pk: int):
         messages.error(request, "Invalid status.")
         return redirect(next_url)
 
+    before = events.snapshot(ticket)
     ticket.status = new_status
-    ticket.save(update_fields=["status", "updated_at"])
+    with transaction.atomic():
+        ticket.save(update_fields=["status", "updated_at"])
+        events.record_changes(ticket, before, request.user)
     messages.success(request, f"Ticket #{ticket.id} status changed to {ticket.get_status_display()}.")
     return redirect(next_url)
 
 
+@login_required
+@user_passes_test(_is_staff_user)
+def admin_ticket_batch(request):
+    if request.method != "POST":
+        return JsonResponse({"error": "POST required"}, status=405)
+
+    try:
+        ids = sorted({int(value) for value in request.POST.getlist("ids")})
+    except ValueError:
+        return JsonResponse({"error": "Invalid ticket id"}, status=400)
+    if not ids:
+        return JsonResponse({"error": "No tickets selected"}, status=400)
+    if len(ids) > MAX_BATCH_SIZE:
+        return JsonResponse({"error": f"At most {MAX_BATCH_SIZE} tickets per batch"}, status=400)
+
+    changes = {}
+    new_status = (request.POST.get("status") or "").strip().lower()
+    new_priority = (request.POST.get("priority") or "").strip().lower()
+    answered = (request.POST.get("is_answered") or "").strip().lower()
+    if new_status:
+        if new_status not in STATUS_VALUES:
+            return JsonResponse({"error": "Invalid status"}, status=400)
+        changes["status"] = new_status
+    if new_priority:
+        if new_priority not in PRIORITY_VALUES:
+            return JsonResponse({"error": "Invalid priority"}, status=400)
+        changes["priority"] = new_priority
+    if answered:
+        if answered not in {"true", "false"}:
+            return JsonResponse({"error": "Invalid answered flag"}, status=400)
+        changes["is_answered"] = answered == "true"
+    if not changes:
+        return JsonResponse({"error": "Nothing to change"}, status=400)
+
+    tickets = update_tickets(ids, changes, user=request.user)
+    found = {t.pk for t in tickets}
+    return JsonResponse(
+        {
+            "updated": len(tickets),
+            "missing": [pk for pk in ids if pk not in found],
+            "tickets": [
+                {
+                    "id": t.pk,
+                    "status": t.status,
+                    "status_display": t.get_status_display(),
+                    "priority": t.priority,
+                    "priority_display": t.get_priority_display(),
+                    "is_answered": t.is_answered,
+                    "updated_at": t.updated_at.isoformat(),
+                }
+                for t in tickets
+            ],
+        }
+    )
+
+
 def signup(request):
     if request.user.is_authenticated:
         return redirect("index")
@@ -299,7 +683,7 @@ def signup(request):
         form = SignUpForm(request.POST)
         if form.is_valid():
             user = form.save()
-            login(request, user)
+            login(request, user, backend=settings.AUTHENTICATION_BACKENDS[0])
             messages.success(request, "Account created.")
             return redirect("index")
     else:
@@ -307,6 +691,14 @@ def signup(request):
     return render(request, "registration/signup.html", {"form": form})
 
 
+def _profile_for(user):
+    # профиль приходит вместе с пользователем (users.backends.ModelBackend)
+    try:
+        return user.profile
+    except Profile.DoesNotExist:
+        return Profile.objects.get_or_create(user=user)[0]
+
+
 @login_required
 def account(request):
     tickets = (
@@ -314,14 +706,13 @@ def account(request):
         .select_related("category")
         .order_by("-created_at")
     )
-    avg_rating = Ticket.objects.filter(user=request.user).aggregate(
-        avg=Avg("ratings__score")
-    )["avg"]
-    rating_count = Ticket.objects.filter(user=request.user).aggregate(
-        cnt=Count("ratings")
-    )["cnt"]
+    ratings = Ticket.objects.filter(user=request.user).aggregate(
+        count=Sum("rating_count"), total=Sum("rating_sum")
+    )
+    rating_count = ratings["count"] or 0
+    avg_rating = ratings["total"] / rating_count if rating_count else None
     avatar_form = AvatarForm()
-    profile, _ = Profile.objects.get_or_create(user=request.user)
+    profile = _profile_for(request.user)
     return render(
         request,
         "complaints/account.html",
@@ -341,7 +732,7 @@ def upload_avatar(request):
         return redirect("account")
     form = AvatarForm(request.POST, request.FILES)
     if form.is_valid():
-        profile, _ = Profile.objects.get_or_create(user=request.user)
+        profile = _profile_for(request.user)
         profile.avatar = form.cleaned_data["avatar"]
         profile.save()
         messages.success(request, "Avatar updated.")
@@ -357,11 +748,178 @@ def upload_avatar(request):
 class TicketListCreateAPI(generics.ListCreateAPIView):
     queryset = Ticket.objects.all().order_by("-created_at")
     serializer_class = TicketSerializer
+    renderer_classes = renderers.API_RENDERERS
+
+    def list(self, request, *args, **kwargs):
+        return Response(ticket_rows(self.filter_queryset(self.get_queryset())))
+
+    def perform_create(self, serializer):
+        data = serializer.validated_data
+        similar = similarity.find_similar(data.get("subject", ""), data.get("message", ""))
+        suggestion = Ticket(subject=data.get("subject", ""), message=data.get("message", ""))
+        classifier.suggest(suggestion)
+        with transaction.atomic():
+            ticket = serializer.save(
+                duplicate_of=similar[0][0] if similar else None,
+                suggested_category_id=suggestion.suggested_category_id,
+                suggested_priority=suggestion.suggested_priority,
+            )
+            events.record_created(ticket, self.request.user)
 
 
 class TicketDetailAPI(generics.RetrieveUpdateDestroyAPIView):
     queryset = Ticket.objects.all()
     serializer_class = TicketSerializer
+    renderer_classes = renderers.API_RENDERERS
+
+    def retrieve(self, request, *args, **kwargs):
+        rows = ticket_rows(self.get_queryset().filter(pk=kwargs["pk"]))
+        if rows:
+            return Response(rows[0])
+        archived = get_object_or_404(ArchivedTicket, pk=kwargs["pk"])
+        return Response(ArchivedTicketSerializer(archived).data)
+
+    def perform_update(self, serializer):
+        before = events.snapshot(serializer.instance)
+        with transaction.atomic():
+            ticket = serializer.save()
+            events.record_changes(ticket, before, self.request.user)
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            TicketTombstone.record([instance.pk])
+            Ticket.release_reporters([instance.pk])
+            instance.delete()
+
+
+# Upper bound for tickets touched by one bulk API request.
+BULK_MAX_TICKETS = 5000
+
+
+def _bulk_queryset(filters):
+    """
+    Tickets matched by the "filter" form of the bulk API. Raises ValueError.
+    """
+    if not isinstance(filters, dict) or not filters:
+        raise ValueError("filter must be a non-empty object")
+    queryset = Ticket.objects.all()
+    for key, value in filters.items():
+        if key == "ids":
+            if not isinstance(value, list) or not all(isinstance(pk, int) for pk in value):
+                raise ValueError("ids must be a list of integers")
+            queryset = queryset.filter(pk__in=value)
+        elif key == "status" and value in STATUS_VALUES:
+            queryset = queryset.filter(status=value)
+        elif key == "priority" and value in PRIORITY_VALUES:
+            queryset = queryset.filter(priority=value)
+        elif key == "category" and isinstance(value, int):
+            queryset = queryset.filter(category_id=value)
+        elif key == "is_answered" and isinstance(value, bool):
+            queryset = queryset.filter(is_answered=value)
+        elif key == "updated_before" and isinstance(value, str) and parse_datetime(value):
+            queryset = queryset.filter(updated_at__lt=parse_datetime(value))
+        else:
+            raise ValueError(f"Invalid filter: {key}")
+    return queryset
+
+
+class TicketBulkAPI(APIView):
+    """
+    PATCH {"items": [{"id", "fields", "updated_at"?}, ...]} or
+    {"filter": {...}, "fields": {...}}.
+
+    Items with the same changes are applied together through update_tickets
+    in chunks of MAX_BATCH_SIZE. An item carrying updated_at is only changed
+    if the ticket still has that exact value; tickets matched by a filter are
+    checked against the updated_at read while matching. Every id gets an
+    outcome: updated, conflict (with the current updated_at), missing or
+    invalid.
+    """
+    permission_classes = [IsAdminUser]
+    renderer_classes = renderers.API_RENDERERS
+
+    def patch(self, request):
+        data = request.data
+        if not isinstance(data, dict):
+            return Response({"error": "Expected a JSON object"}, status=400)
+
+        results = {}
+        groups = {}  # изменения -> {pk: ожидаемый updated_at или None}
+        if "items" in data:
+            items = data["items"]
+            if not isinstance(items, list) or not items:
+                return Response({"error": "items must be a non-empty list"}, status=400)
+            if len(items) > BULK_MAX_TICKETS:
+                return Response({"error": f"At most {BULK_MAX_TICKETS} tickets per request"}, status=400)
+            order, seen = [], set()
+            for item in items:
+                pk = item.get("id") if isinstance(item, dict) else None
+                if not isinstance(pk, int) or isinstance(pk, bool):
+                    return Response({"error": "Every item needs an integer id"}, status=400)
+                if pk in seen:
+                    return Response({"error": f"Duplicate id {pk}"}, status=400)
+                seen.add(pk)
+                order.append(pk)
+                expected = item.get("updated_at")
+                try:
+                    changes = clean_changes(item.get("fields"))
+                    if expected is not None:
+                        expected = parse_datetime(expected) if isinstance(expected, str) else None
+                        if expected is None:
+                            raise ValueError("updated_at must be an ISO 8601 datetime")
+                except ValueError as exc:
+                    results[pk] = {"id": pk, "status": "invalid", "error": str(exc)}
+                    continue
+                groups.setdefault(tuple(sorted(changes.items())), {})[pk] = expected
+        elif "filter" in data:
+            try:
+                changes = clean_changes(data.get("fields"))
+                rows = list(_bulk_queryset(data["filter"]).order_by("pk").values_list("pk", "updated_at")[: BULK_MAX_TICKETS + 1])
+            except ValueError as exc:
+                return Response({"error": str(exc)}, status=400)
+            if len(rows) > BULK_MAX_TICKETS:
+                return Response({"error": f"Filter matches more than {BULK_MAX_TICKETS} tickets"}, status=400)
+            order = [pk for pk, _ in rows]
+            groups[tuple(sorted(changes.items()))] = dict(rows)
+        else:
+            return Response({"error": "Send either items or filter"}, status=400)
+
+        updated = 0
+        for changes, expected in groups.items():
+            ids = sorted(expected)
+            for start in range(0, len(ids), MAX_BATCH_SIZE):
+                chunk = ids[start : start + MAX_BATCH_SIZE]
+                for ticket in update_tickets(chunk, dict(changes), user=request.user, expected=expected):
+                    results[ticket.pk] = {"id": ticket.pk, "status": "updated", "updated_at": ticket.updated_at}
+                    updated += 1
+
+        pending = [pk for pk in order if pk not in results]
+        current = dict(Ticket.objects.filter(pk__in=pending).values_list("pk", "updated_at"))
+        for pk in pending:
+            if pk in current:
+                results[pk] = {"id": pk, "status": "conflict", "updated_at": current[pk]}
+            else:
+                results[pk] = {"id": pk, "status": "missing"}
+        return Response({"updated": updated, "results": [results[pk] for pk in order]})
+
+
+class TicketSyncAPI(APIView):
+    """
+    GET ?cursor=...&limit=N: tickets changed and removed since the cursor.
+    Keep calling with the returned cursor while has_more is true.
+    """
+    renderer_classes = renderers.API_RENDERERS
+
+    def get(self, request):
+        try:
+            limit = int(request.query_params.get("limit", sync.DEFAULT_LIMIT))
+        except ValueError:
+            return Response({"error": "limit must be an integer"}, status=400)
+        limit = max(1, min(limit, sync.MAX_LIMIT))
+        try:
+            return Response(sync.changes(request.query_params.get("cursor"), limit))
+        except sync.InvalidCursor as exc:
+            return Response({"error": str(exc)}, status=400)
 
 
 @csrf_exempt
@@ -380,69 +938,21 @@ def ai_generate(request):
     if not text:
         return JsonResponse({"error": "Empty text"}, status=400)
 
-    if mode == "summary":
-        prompt = (
-            "Summarize the issue in 3 bullets: What, Where, Impact.\n\n"
-            f"{text}"
-        )
-    elif mode == "rewrite":
-        prompt = (
-            "Rewrite this into a clear request for campus support, include location, "
-            "impact, urgency, and desired fix. Keep it under 120 words.\n\n"
-            f"{text}"
-        )
-    else:
+    try:
+        prompt = ai.build_prompt(mode, text)
+    except ValueError:
         return JsonResponse({"error": "Unknown mode"}, status=400)
 
-    provider = os.environ.get("AI_PROVIDER", "").strip().lower()
-    has_openai = bool(os.environ.get("OPENAI_API_KEY"))
-    has_gemini = bool(os.environ.get("GEMINI_API_KEY"))
+    try:
+        return JsonResponse({"text": ai.get_provider().generate(prompt)})
+    except ai.ProviderError as exc:
+        return JsonResponse({"error": str(exc), "user_message": exc.user_message}, status=exc.status)
 
-    if not provider:
-        provider = "openai" if has_openai else "gemini" if has_gemini else ""
 
+@user_passes_test(_is_staff_user)
+def ai_metrics(request):
     try:
-        if provider == "gemini":
-            if not has_gemini:
-                return JsonResponse(
-                    {"error": "GEMINI_API_KEY is not configured", "user_message": "AI ключ не настроен."},
-                    status=503,
-                )
-            from google import genai
-            client = genai.Client()
-            response = client.models.generate_content(
-                model=os.environ.get("GEMINI_MODEL", "gemini-2.5-flash"),
-                contents=prompt,
-            )
-            return JsonResponse({"text": (response.text or "").strip()})
-
-        if provider == "openai":
-            if not has_openai:
-                return JsonResponse(
-                    {"error": "OPENAI_API_KEY is not configured", "user_message": "AI ключ не настроен."},
-                    status=503,
-                )
-            from openai import OpenAI
-            client = OpenAI()
-            response = client.responses.create(
-                model=os.environ.get("OPENAI_MODEL", "gpt-5-mini"),
-                input=prompt,
-                max_output_tokens=180,
-            )
-            return JsonResponse({"text": response.output_text.strip()})
-
-        return JsonResponse(
-            {"error": "No AI provider configured", "user_message": "AI провайдер не настроен."},
-            status=503,
-        )
-    except Exception as exc:
-        raw = str(exc)
-        lower = raw.lower()
-        user_message = "Ошибка AI. Попробуй позже."
-        if "insufficient_quota" in lower or "quota" in lower:
-            user_message = "Лимит запросов исчерпан. Попробуй позже."
-        elif "api key" in lower or "permission" in lower or "unauthorized" in lower:
-            user_message = "Неверный ключ API."
-        elif "rate" in lower and "limit" in lower:
-            user_message = "Слишком много запросов. Подожди немного."
-        return JsonResponse({"error": raw, "user_message": user_message}, status=500)
+        router = ai.get_router()
+    except ai.ProviderError as exc:
+        return JsonResponse({"error": str(exc), "user_message": exc.user_message}, status=exc.status)
+    return JsonResponse(router.metrics())
@@ -0,0 +1,187 @@
+"""
+Outgoing webhooks for ticket events.
+
+events.record() calls enqueue(), which only inserts WebhookDelivery rows in
+the caller's transaction, so requests never wait on other systems. The
+deliver_webhooks command claims due rows in a short transaction (counting
+the attempt and leasing them for CLAIM_SECONDS), posts outside any
+transaction and settles the outcome in a second one. It groups rows per
+endpoint into batches of up to BATCH_EVENTS events and posts them through one pooled
+httpx.AsyncClient. Each endpoint gets at most ``max_concurrency`` requests in
+flight. Failed batches are retried with exponential backoff; after
+MAX_ATTEMPTS their events move to WebhookDeadLetter.
+
+Each POST carries ``{"events": [...]}`` and the headers
+
+    X-Hilla-Timestamp: <unix seconds>
+    X-Hilla-Signature: sha256=<hex HMAC-SHA256 of "<timestamp>.<body>">
+"""
+import asyncio
+import hashlib
+import hmac
+import json
+import time
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+try:
+    import httpx
+except Exception:
+    httpx = None
+
+from .models import WebhookDeadLetter, WebhookDelivery, WebhookEndpoint
+
+
+BATCH_EVENTS = 50
+MAX_ATTEMPTS = 8
+RETRY_BASE_SECONDS = 30
+RETRY_MAX_SECONDS = 6 * 3600
+REQUEST_TIMEOUT = 10.0
+# Claimed rows are hidden from other workers this long; a worker that dies
+# mid-run leaves them to be retried once the lease runs out.
+CLAIM_SECONDS = 600
+
+
+def event_payload(event):
+    return {
+        "id": event.pk,
+        "kind": event.kind,
+        "ticket_id": event.ticket_id,
+        "category_id": event.category_id,
+        "priority": event.priority,
+        "old_value": event.old_value,
+        "new_value": event.new_value,
+        "actor_id": event.actor_id,
+        "created_at": event.created_at.isoformat() if event.created_at else None,
+    }
+
+
+def enqueue(events):
+    """
+    Queue events for every active endpoint subscribed to their kind.
+    """
+    endpoints = list(WebhookEndpoint.objects.filter(is_active=True))
+    if not endpoints or not events:
+        return []
+    deliveries = [
+        WebhookDelivery(endpoint=endpoint, payload=event_payload(event))
+        for event in events
+        for endpoint in endpoints
+        if endpoint.wants(event.kind)
+    ]
+    return WebhookDelivery.objects.bulk_create(deliveries, batch_size=500)
+
+
+def sign(secret, timestamp, body):
+    message = f"{timestamp}.".encode() + body
+    return "sha256=" + hmac.new(secret.encode(), message, hashlib.sha256).hexdigest()
+
+
+def retry_delay(attempts):
+    return timedelta(seconds=min(RETRY_BASE_SECONDS * 2 ** (attempts - 1), RETRY_MAX_SECONDS))
+
+
+def deliver(limit=1000, batch_events=BATCH_EVENTS, transport=None):
+    """
+    Post up to `limit` due deliveries. Returns (delivered, retried, dead)
+    event counts.
+    """
+    if httpx is None:
+        raise RuntimeError("httpx is required to deliver webhooks.")
+    claimed = _claim(limit)
+    if not claimed:
+        return 0, 0, 0
+
+    batches = {}
+    for delivery in claimed:
+        batches.setdefault(delivery.endpoint, []).append(delivery)
+    jobs = [
+        (endpoint, rows[i : i + batch_events])
+        for endpoint, rows in batches.items()
+        for i in range(0, len(rows), batch_events)
+    ]
+    # ORM не трогаем внутри цикла событий и не держим транзакцию на время HTTP
+    results = asyncio.run(_post_all(jobs, transport))
+    with transaction.atomic():
+        return _settle(jobs, results)
+
+
+def _claim(limit):
+    """
+    Lock due rows, count the attempt and push available_at past the lease so
+    other workers skip them, then commit before anything is posted.
+    """
+    with transaction.atomic():
+        now = timezone.now()
+        claimed = list(
+            WebhookDelivery.objects.select_for_update(skip_locked=True)
+            .filter(available_at__lte=now, endpoint__is_active=True)
+            .select_related("endpoint")
+            .order_by("available_at", "id")[:limit]
+        )
+        if claimed:
+            WebhookDelivery.objects.filter(pk__in=[row.pk for row in claimed]).update(
+                attempts=F("attempts") + 1,
+                available_at=now + timedelta(seconds=CLAIM_SECONDS),
+            )
+        for row in claimed:
+            row.attempts += 1
+    return claimed
+
+
+async def _post_all(jobs, transport):
+    limits = {endpoint.pk: asyncio.Semaphore(max(endpoint.max_concurrency, 1)) for endpoint, _ in jobs}
+    async with httpx.AsyncClient(timeout=REQUEST_TIMEOUT, transport=transport) as client:
+
+        async def post(endpoint, rows):
+            body = json.dumps({"events": [row.payload for row in rows]}, separators=(",", ":")).encode()
+            timestamp = str(int(time.time()))
+            headers = {
+                "Content-Type": "application/json",
+                "X-Hilla-Timestamp": timestamp,
+                "X-Hilla-Signature": sign(endpoint.secret, timestamp, body),
+            }
+            async with limits[endpoint.pk]:
+                try:
+                    response = await client.post(endpoint.url, content=body, headers=headers)
+                except httpx.HTTPError as exc:
+                    return f"{type(exc).__name__}: {exc}"
+            if response.is_success:
+                return None
+            return f"HTTP {response.status_code}"
+
+        return await asyncio.gather(*(post(endpoint, rows) for endpoint, rows in jobs))
+
+
+def _settle(jobs, results):
+    now = timezone.now()
+    delivered, retry, dead = [], [], []
+    for (endpoint, rows), error in zip(jobs, results):
+        for row in rows:
+            if error is None:
+                delivered.append(row.pk)
+                continue
+            # попытка уже засчитана при захвате
+            row.last_error = error
+            if row.attempts >= MAX_ATTEMPTS:
+                dead.append(row)
+            else:
+                row.available_at = now + retry_delay(row.attempts)
+                retry.append(row)
+
+    WebhookDelivery.objects.bulk_update(retry, ["attempts", "last_error", "available_at"])
+    WebhookDeadLetter.objects.bulk_create(
+        WebhookDeadLetter(
+            endpoint_id=row.endpoint_id,
+            payload=row.payload,
+            attempts=row.attempts,
+            last_error=row.last_error,
+            created_at=row.created_at,
+        )
+        for row in dead
+    )
+    WebhookDelivery.objects.filter(pk__in=delivered + [row.pk for row in dead]).delete()
+    return len(delivered), len(retry), len(dead)
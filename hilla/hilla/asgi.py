@@ -3,6 +3,10 @@ ASGI config for hilla project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+The live moderation queue (``admin-queue/stream/``) is a long-lived async
+Server-Sent Events response, so it should be served from here, e.g.
+``gunicorn hilla.asgi:application -k uvicorn_worker.UvicornWorker``.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
 """
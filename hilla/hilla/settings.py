@@ -87,6 +87,7 @@ if ENABLE_RECAPTCHA:
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
+    "complaints.middleware.CompressionMiddleware",
 
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -118,6 +119,10 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "hilla.wsgi.application"
+# Живая очередь модерации (SSE) работает только под ASGI, например
+# gunicorn hilla.asgi:application -k uvicorn_worker.UvicornWorker;
+# под WSGI страница очереди переходит на опрос.
+ASGI_APPLICATION = "hilla.asgi.application"
 
 # --------------------
 # DATABASE
@@ -156,6 +161,57 @@ else:
         }
     }
 
+# --------------------
+# CACHE / SESSIONS
+# --------------------
+# REDIS_URL => shared Redis cache (needed with several workers), otherwise a
+# per-process local-memory cache.
+redis_url = os.environ.get("REDIS_URL", "").strip()
+if redis_url:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": redis_url,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+# Кэш сессий и пользователей имеет смысл только в общем кэше: в locmem у
+# каждого воркера своя копия, и logout / смена пароля не доходят до остальных.
+# cached_db reads sessions from the cache and falls back to the DB;
+# "django.contrib.sessions.backends.signed_cookies" removes the DB entirely.
+SESSION_ENGINE = os.environ.get(
+    "SESSION_ENGINE",
+    "django.contrib.sessions.backends.cached_db" if redis_url else "django.contrib.sessions.backends.db",
+)
+# Flash messages live in a signed cookie, so anonymous pages never load a session.
+MESSAGE_STORAGE = "django.contrib.messages.storage.cookie.CookieStorage"
+# Seconds users.backends keeps a session user (with profile) in the cache; 0 disables it.
+# Also the longest a queryset.update() of a user (e.g. is_active) goes unnoticed.
+AUTH_USER_CACHE_TIMEOUT = int(os.environ.get("AUTH_USER_CACHE_TIMEOUT", "300" if redis_url else "0"))
+
+# --------------------
+# EMAIL (ticket notifications, sent by manage.py send_notifications)
+# --------------------
+EMAIL_BACKEND = os.environ.get(
+    "EMAIL_BACKEND",
+    "django.core.mail.backends.console.EmailBackend" if DEBUG else "django.core.mail.backends.smtp.EmailBackend",
+)
+EMAIL_HOST = os.environ.get("EMAIL_HOST", "localhost")
+EMAIL_PORT = int(os.environ.get("EMAIL_PORT", "25"))
+EMAIL_HOST_USER = os.environ.get("EMAIL_HOST_USER", "")
+EMAIL_HOST_PASSWORD = os.environ.get("EMAIL_HOST_PASSWORD", "")
+EMAIL_USE_TLS = _truthy(os.environ.get("EMAIL_USE_TLS", "false"))
+EMAIL_TIMEOUT = 30
+DEFAULT_FROM_EMAIL = os.environ.get("DEFAULT_FROM_EMAIL", "support@localhost")
+# Absolute site root used for links in notification emails.
+SITE_URL = os.environ.get("SITE_URL", "").rstrip("/")
+
 # --------------------
 # PASSWORD VALIDATION
 # --------------------
@@ -179,13 +235,21 @@ USE_TZ = True
 # --------------------
 STATIC_URL = "/static/"
 STATIC_ROOT = BASE_DIR / "staticfiles"
+# collectstatic writes content-hashed copies plus .gz and .br (Brotli) next to
+# them; WhiteNoise serves hashed names with a one-year immutable Cache-Control.
 STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
     "staticfiles": {
         "BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage",
-    }
+    },
 }
-# Allow WhiteNoise to serve from app static dirs if collectstatic output is stale.
-WHITENOISE_USE_FINDERS = True
+# Outside DEBUG only the collected STATIC_ROOT is served (indexed once at
+# startup); "manage.py check --deploy" warns when it is older than the sources.
+WHITENOISE_USE_FINDERS = DEBUG
+WHITENOISE_AUTOREFRESH = DEBUG
+WHITENOISE_MAX_AGE = 0 if DEBUG else 3600
 
 # --------------------
 # MEDIA FILES (avatars)
@@ -201,6 +265,13 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 # --------------------
 # AUTH
 # --------------------
+AUTHENTICATION_BACKENDS = [
+    "users.backends.ModelBackend",
+    # Sessions from before the switch name the stock backend; listing it keeps
+    # them logged in. New logins use the backend above. Drop this once
+    # SESSION_COOKIE_AGE has passed since the deploy.
+    "django.contrib.auth.backends.ModelBackend",
+]
 LOGIN_URL = "/login/"
 LOGIN_REDIRECT_URL = "/"
 LOGOUT_REDIRECT_URL = "/"
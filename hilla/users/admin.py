@@ -0,0 +1,22 @@
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+
+from .models import users_with_email
+
+
+User = get_user_model()
+
+
+class UserAdmin(BaseUserAdmin):
+    def get_search_results(self, request, queryset, search_term):
+        # email ищется точным совпадением по индексу lower(email),
+        # а не icontains-сканированием всех полей
+        term = search_term.strip()
+        if "@" in term and " " not in term:
+            return users_with_email(term, queryset), False
+        return super().get_search_results(request, queryset, search_term)
+
+
+admin.site.unregister(User)
+admin.site.register(User, UserAdmin)
@@ -0,0 +1,102 @@
+from django.conf import settings
+from django.contrib.auth import backends, get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import router
+from django.db.models.fields.files import FieldFile
+
+from .models import Profile, users_with_email
+
+
+USER_CACHE_KEY = "auth-user:{pk}"
+
+
+def user_cache_key(pk):
+    return USER_CACHE_KEY.format(pk=pk)
+
+
+def invalidate_user(pk):
+    cache.delete(user_cache_key(pk))
+
+
+class ModelBackend(backends.ModelBackend):
+    """
+    ModelBackend that also accepts an email address as the username, and
+    loads the session user together with its profile. With
+    AUTH_USER_CACHE_TIMEOUT > 0 (only set by default with a shared cache) the
+    user is kept in the cache, so an authenticated request usually costs no
+    user or profile query. The entry holds field values and the session auth
+    hash, never the password hash. users.signals drops it whenever the user or
+    profile is saved or deleted; queryset.update() skips those signals, so
+    such changes (e.g. is_active) apply after at most AUTH_USER_CACHE_TIMEOUT
+    unless invalidate_user() is called.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        # "name@host" входит по email (индекс lower(email)); если email не
+        # подошёл — как обычный логин, в Django username тоже может содержать "@"
+        if username and password is not None and "@" in username:
+            matches = list(users_with_email(username)[:2])
+            if len(matches) == 1:
+                user = matches[0]
+                if user.check_password(password) and self.user_can_authenticate(user):
+                    return user
+        return super().authenticate(request, username=username, password=password, **kwargs)
+
+    def get_user(self, user_id):
+        timeout = settings.AUTH_USER_CACHE_TIMEOUT
+        key = user_cache_key(user_id)
+        entry = cache.get(key) if timeout > 0 else None
+        if entry is not None:
+            user = _from_entry(entry)
+        else:
+            UserModel = get_user_model()
+            try:
+                user = UserModel._default_manager.select_related("profile").get(pk=user_id)
+            except UserModel.DoesNotExist:
+                return None
+            if timeout > 0:
+                cache.set(key, _to_entry(user), timeout)
+        return user if self.user_can_authenticate(user) else None
+
+
+def _field_values(obj, exclude=()):
+    values = {}
+    for field in obj._meta.concrete_fields:
+        if field.attname not in exclude:
+            value = getattr(obj, field.attname)
+            values[field.attname] = value.name if isinstance(value, FieldFile) else value
+    return values
+
+
+def _to_entry(user):
+    """
+    What the cache keeps for a user: field values without the password hash,
+    the profile's values and the session auth hash the middleware checks.
+    """
+    try:
+        profile = _field_values(user.profile)
+    except ObjectDoesNotExist:
+        profile = None
+    return {
+        "user": _field_values(user, exclude={"password"}),
+        "profile": profile,
+        "session_hash": user.get_session_auth_hash(),
+    }
+
+
+def _from_entry(entry):
+    UserModel = get_user_model()
+    db = router.db_for_read(UserModel)
+    # password остаётся отложенным полем: check_password/set_password дочитают его из БД
+    user = UserModel.from_db(db, list(entry["user"]), list(entry["user"].values()))
+    if entry["profile"] is not None:
+        user.profile = Profile.from_db(db, list(entry["profile"]), list(entry["profile"].values()))
+
+    def get_session_auth_hash():
+        if "password" in user.__dict__:
+            return UserModel.get_session_auth_hash(user)
+        return entry["session_hash"]
+
+    user.get_session_auth_hash = get_session_auth_hash
+    return user
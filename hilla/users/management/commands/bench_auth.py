@@ -0,0 +1,92 @@
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+
+from users.backends import invalidate_user
+
+
+ENGINES = {
+    "db": "django.contrib.sessions.backends.db",
+    "cached_db": "django.contrib.sessions.backends.cached_db",
+    "signed_cookies": "django.contrib.sessions.backends.signed_cookies",
+}
+
+BENCH_USERNAME = "benchmark"
+
+
+class QueryTally:
+    """
+    execute_wrapper counting statements per request and by kind.
+    """
+
+    def __init__(self):
+        self.total = 0
+        self.kinds = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        self.total += 1
+        lowered = sql.lower()
+        if "django_session" in lowered:
+            self.kinds["session"] += 1
+        elif "auth_user" in lowered or "users_profile" in lowered:
+            self.kinds["user"] += 1
+        else:
+            self.kinds["other"] += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = "Measure DB round trips and latency per request for anonymous and logged-in traffic."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=50)
+        parser.add_argument("--path", default="/", help="Page to request.")
+        parser.add_argument(
+            "--engines",
+            default=",".join(ENGINES),
+            help=f"Comma separated session engines to compare ({', '.join(ENGINES)}).",
+        )
+
+    def handle(self, *args, **options):
+        host = next((h.lstrip(".") for h in settings.ALLOWED_HOSTS if h != "*"), "localhost")
+        user, created = get_user_model().objects.get_or_create(username=BENCH_USERNAME, defaults={"is_staff": True})
+        if created:
+            user.set_unusable_password()
+            user.save(update_fields=["password"])
+
+        self.stdout.write(f"{'engine':<16} {'traffic':<10} {'queries/req':>11} {'session':>8} {'user':>6} {'other':>6} {'ms/req':>8}")
+        try:
+            for name in [n.strip() for n in options["engines"].split(",") if n.strip()]:
+                with override_settings(SESSION_ENGINE=ENGINES.get(name, name)):
+                    # только свой ключ: общий кэш (Redis) не трогаем
+                    invalidate_user(user.pk)
+                    anonymous = Client(HTTP_HOST=host)
+                    self.run(name, "anonymous", anonymous, options["path"], options["requests"])
+
+                    logged_in = Client(HTTP_HOST=host)
+                    logged_in.force_login(user)
+                    self.run(name, "logged-in", logged_in, options["path"], options["requests"])
+                    logged_in.logout()
+        finally:
+            if created:
+                user.delete()
+
+    def run(self, engine, traffic, client, path, count):
+        client.get(path)  # прогрев: кэш пользователя, ContentType и т.п.
+        tally = QueryTally()
+        started = time.perf_counter()
+        with connection.execute_wrapper(tally):
+            for _ in range(count):
+                client.get(path)
+        elapsed_ms = (time.perf_counter() - started) * 1000 / count
+        self.stdout.write(
+            f"{engine:<16} {traffic:<10} {tally.total / count:>11.2f} "
+            f"{tally.kinds['session'] / count:>8.2f} {tally.kinds['user'] / count:>6.2f} "
+            f"{tally.kinds['other'] / count:>6.2f} {elapsed_ms:>8.2f}"
+        )
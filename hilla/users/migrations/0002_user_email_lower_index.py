@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import Lower
+
+
+# auth.User belongs to django.contrib.auth, so its index cannot be declared
+# in Meta; it is created here and matched by users.models.users_with_email.
+EMAIL_INDEX = models.Index(Lower("email"), name="auth_user_email_lower_idx")
+
+
+def add_index(apps, schema_editor):
+    schema_editor.add_index(apps.get_model(settings.AUTH_USER_MODEL), EMAIL_INDEX)
+
+
+def remove_index(apps, schema_editor):
+    schema_editor.remove_index(apps.get_model(settings.AUTH_USER_MODEL), EMAIL_INDEX)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0001_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(add_index, remove_index),
+    ]
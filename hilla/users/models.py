@@ -1,5 +1,7 @@
 from django.conf import settings
+from django.contrib.auth import get_user_model
 from django.db import models
+from django.db.models.functions import Lower
 
 
 class Profile(models.Model):
@@ -8,3 +10,13 @@ class Profile(models.Model):
 
     def __str__(self):
         return f"Profile for {self.user.username}"
+
+
+def users_with_email(email, queryset=None):
+    """
+    Users whose email matches case-insensitively. Compares lower(email) so the
+    auth_user_email_lower_idx expression index is used instead of a scan.
+    """
+    if queryset is None:
+        queryset = get_user_model()._default_manager.all()
+    return queryset.alias(email_lower=Lower("email")).filter(email_lower=email.strip().lower())
@@ -0,0 +1,137 @@
+from django.contrib.auth import BACKEND_SESSION_KEY, get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from complaints.forms import SignUpForm
+
+from .backends import ModelBackend, invalidate_user, user_cache_key
+
+
+@override_settings(AUTH_USER_CACHE_TIMEOUT=300)
+class CachedUserBackendTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user("student", password="secret-pass")
+        self.backend = ModelBackend()
+
+    def test_user_and_profile_come_from_cache(self):
+        self.backend.get_user(self.user.pk)
+        with self.assertNumQueries(0):
+            user = self.backend.get_user(self.user.pk)
+            user.profile
+
+    def test_saves_drop_the_cached_user(self):
+        self.backend.get_user(self.user.pk)
+        self.user.is_active = False
+        self.user.save()
+        self.assertIsNone(cache.get(user_cache_key(self.user.pk)))
+        self.assertIsNone(self.backend.get_user(self.user.pk))
+
+        self.backend.get_user(self.user.pk)
+        self.user.profile.save()
+        self.assertIsNone(cache.get(user_cache_key(self.user.pk)))
+
+    def test_delete_drops_the_cached_user(self):
+        pk = self.user.pk
+        self.backend.get_user(pk)
+        self.user.delete()
+        self.assertIsNone(self.backend.get_user(pk))
+
+    def test_cache_entry_holds_no_password_hash(self):
+        self.backend.get_user(self.user.pk)
+        entry = cache.get(user_cache_key(self.user.pk))
+        self.assertNotIn("password", entry["user"])
+        self.assertNotIn(self.user.password, repr(entry))
+
+        user = self.backend.get_user(self.user.pk)
+        self.assertEqual(user.get_session_auth_hash(), self.user.get_session_auth_hash())
+        self.assertTrue(user.check_password("secret-pass"))
+
+    def test_update_deactivation_applies_after_invalidate(self):
+        self.backend.get_user(self.user.pk)
+        get_user_model().objects.filter(pk=self.user.pk).update(is_active=False)
+        # update() обходит сигналы: до invalidate_user пользователь берётся из кэша
+        self.assertIsNotNone(self.backend.get_user(self.user.pk))
+        invalidate_user(self.user.pk)
+        self.assertIsNone(self.backend.get_user(self.user.pk))
+
+    def test_deactivated_user_loses_the_session(self):
+        self.client.login(username="student", password="secret-pass")
+        self.client.get(reverse("api_tickets"))
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get(reverse("api_tickets"))
+        self.assertFalse(response.wsgi_request.user.is_authenticated)
+
+    @override_settings(AUTH_USER_CACHE_TIMEOUT=0)
+    def test_disabled_cache_always_reads_the_database(self):
+        self.backend.get_user(self.user.pk)
+        self.assertIsNone(cache.get(user_cache_key(self.user.pk)))
+        with self.assertNumQueries(1):
+            self.backend.get_user(self.user.pk)
+
+
+class LegacySessionBackendTests(TestCase):
+    def test_sessions_from_the_stock_backend_stay_logged_in(self):
+        user = get_user_model().objects.create_user("student", password="secret-pass")
+        self.client.force_login(user, backend="django.contrib.auth.backends.ModelBackend")
+        response = self.client.get(reverse("api_tickets"))
+        self.assertEqual(response.wsgi_request.user, user)
+
+    def test_new_logins_use_the_cached_backend(self):
+        self.client.post(
+            reverse("signup"),
+            {"username": "newbie", "email": "newbie@example.com", "password1": "Str0ng-pass!", "password2": "Str0ng-pass!"},
+        )
+        self.assertEqual(self.client.session[BACKEND_SESSION_KEY], "users.backends.ModelBackend")
+
+
+class EmailLoginTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.student = User.objects.create_user("student", email="Student@Example.com", password="secret-pass")
+        # чужой логин, совпадающий с адресом студента
+        self.lookalike = User.objects.create_user("student@example.com", password="other-pass")
+        self.backend = ModelBackend()
+
+    def test_email_login_is_case_insensitive(self):
+        self.assertEqual(self.backend.authenticate(None, username="student@EXAMPLE.com", password="secret-pass"), self.student)
+
+    def test_falls_back_to_username_when_the_email_password_is_wrong(self):
+        self.assertEqual(self.backend.authenticate(None, username="student@example.com", password="other-pass"), self.lookalike)
+        self.assertIsNone(self.backend.authenticate(None, username="student@example.com", password="wrong"))
+
+    def test_duplicate_emails_only_log_in_by_username(self):
+        get_user_model().objects.create_user("twin", email="student@example.com", password="secret-pass")
+        self.assertIsNone(self.backend.authenticate(None, username="Student@Example.com", password="secret-pass"))
+        self.assertEqual(self.backend.authenticate(None, username="student", password="secret-pass"), self.student)
+
+
+@override_settings(
+    STORAGES={
+        "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+        "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+    }
+)
+class UserEmailLookupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = get_user_model().objects.create_superuser("admin", email="admin@example.com", password="x")
+        cls.student = get_user_model().objects.create_user("student", email="Student@Example.com")
+
+    def test_admin_search_matches_email_exactly(self):
+        self.client.force_login(self.staff)
+        url = reverse("admin:auth_user_changelist")
+        self.assertEqual(list(self.client.get(url, {"q": " student@example.COM "}).context["cl"].result_list), [self.student])
+        self.assertEqual(list(self.client.get(url, {"q": "@example.com"}).context["cl"].result_list), [])
+        self.assertEqual(list(self.client.get(url, {"q": "stud"}).context["cl"].result_list), [self.student])
+
+    def test_signup_rejects_taken_email(self):
+        data = {"username": "newbie", "password1": "Long-enough-pass1", "password2": "Long-enough-pass1"}
+        taken = SignUpForm(data={**data, "email": "STUDENT@example.com"})
+        self.assertFalse(taken.is_valid())
+        self.assertIn("email", taken.errors)
+        fresh = SignUpForm(data={**data, "email": " New@Example.com "})
+        self.assertTrue(fresh.is_valid(), fresh.errors)
+        self.assertEqual(fresh.cleaned_data["email"], "new@example.com")